@@ -1,14 +1,2 @@
-# FastAPI 应用初始化与路由注册
-
-from fastapi import FastAPI
-
-# 创建 FastAPI 应用实例，并添加元数据
-app = FastAPI(
-    title="CollabW",
-    description="后端 API",
-    version="0.1.0"
-)
-
-# 导入并注册 API 路由
-from .api.router import router as api_router
-app.include_router(api_router)
\ No newline at end of file
+# CollabW 后端应用包。应用实例在 backend/main.py 中创建；
+# 包初始化不导入任何子模块，导入 app.core.config 等轻量模块时不会连带加载全部路由
@@ -1,31 +1,62 @@
+from typing import Dict, NamedTuple
 from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
 from app.db.session import get_db
 from app.models.user import User
 from app.core.config import settings
+from app.core.constants import ErrorMessage, UserRole
+from app.services.tokens import token_versions
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """
-    从JWT token中获取当前用户
-    """
+class TokenUser(NamedTuple):
+    """只凭访问令牌得到的当前用户身份与角色"""
+    id: int
+    role: UserRole
+
+def decode_token(token: str) -> Dict:
+    """解码访问令牌，失败时返回 401"""
+    from jose import jwt, JWTError  # 首次鉴权时才导入
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             raise HTTPException(status_code=401, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
-    
-    db_user = db.query(User).filter(User.id == user_id).first()
+    return payload
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    """
+    从JWT token中获取当前用户
+    """
+    payload = decode_token(token)
+    db_user = db.query(User).filter(User.id == payload["sub"]).first()
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    if "ver" in payload and payload["ver"] != db_user.token_version:
+        raise HTTPException(status_code=401, detail=ErrorMessage.TOKEN_REVOKED)
     return db_user
 
-def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+def get_token_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> TokenUser:
+    """
+    从JWT token中获取当前用户的身份与角色：令牌版本号与进程内的令牌版本表一致时不查询用户表。
+    不带角色与版本号的旧令牌仍按用户表鉴权
+    """
+    payload = decode_token(token)
+    if "role" not in payload or "ver" not in payload:
+        db_user = get_current_user(token, db)
+        return TokenUser(db_user.id, db_user.role)
+    user_id = int(payload["sub"])
+    entry = token_versions.check(db, user_id, payload["ver"])
+    if entry is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if entry[0] != payload["ver"]:
+        raise HTTPException(status_code=401, detail=ErrorMessage.TOKEN_REVOKED)
+    return TokenUser(user_id, UserRole(payload["role"]))
+
+def get_admin_user(current_user: TokenUser = Depends(get_token_user)) -> TokenUser:
     """
     验证当前用户是否为管理员
     """
@@ -33,10 +64,10 @@ def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     return current_user
 
-def get_director_user(current_user: User = Depends(get_current_user)) -> User:
+def get_director_user(current_user: TokenUser = Depends(get_token_user)) -> TokenUser:
     """
     验证当前用户是否为总监
     """
     if current_user.role != "director":
         raise HTTPException(status_code=403, detail="Director permissions required")
-    return current_user
\ No newline at end of file
+    return current_user
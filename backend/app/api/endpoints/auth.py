@@ -1,32 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.user import User as UserModel
-from app.schemas.user import UserCreate, UserLogin, User as UserSchema, UserUpdate, PasswordChange
+from app.schemas.user import (
+    UserCreate, UserLogin, User as UserSchema, UserUpdate, PasswordChange, RefreshTokenRequest, Token,
+)
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password, get_password_hash
-from app.core.constants import UserRole, StatusCode, ErrorMessage, SuccessMessage
+from app.core.security import (
+    MIN_PASSWORD_LENGTH, PasswordHashBusy, create_user_access_token, get_password_hash, reserve_hash_slot,
+    verify_password,
+)
+from app.core.ratelimit import check_login_attempts, resolve_client_ip, record_login_failure, record_login_success
+from app.core.constants import UserRole, StatusCode, ErrorMessage, SuccessMessage, CacheEntity
+from app.core.cache import bump_versions
 from app.core.utils import create_error_response
 from app.api.dependencies import get_current_user
 from app.services.user import create_user
+from app.services.sync import record_change
+from app.services.tokens import (
+    issue_refresh_token, revoke_access_tokens, revoke_refresh_token, revoke_tokens, rotate_refresh_token, token_versions,
+)
+from app.models.refresh_token import RefreshToken
 
 router = APIRouter()
 
-@router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
+@router.post("/login", response_model=Token)
+def login(user: UserLogin, request: Request, db: Session = Depends(get_db)):
     """
-    用户登录，返回访问令牌
+    用户登录，返回访问令牌与刷新令牌
     支持用户名或邮箱登录
+    登录标识或客户端 IP 失败次数过多、或密码校验排队超时时直接返回 429，不做 bcrypt 计算与用户查询；
+    排队超时只说明服务繁忙，不计入失败次数（否则同一代理或 NAT 之后的正常用户会被一起限制）
     """
-    db_user = db.query(UserModel).filter(
-        (UserModel.username == user.identifier) | (UserModel.email == user.identifier)
-    ).first()
-    
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    client_ip = resolve_client_ip(request)
+    wait = check_login_attempts(user.identifier, client_ip)
+    if wait is not None:
+        raise HTTPException(status_code=429, detail=ErrorMessage.TOO_MANY_LOGIN_ATTEMPTS,
+                            headers={"Retry-After": str(wait)})
+
+    # 先占用密码哈希槽位再查询用户：饱和时在等待时限后直接拒绝，不做任何查询
+    timeout = settings.LOGIN_HASH_WAIT_MS / 1000 if settings.LOGIN_HASH_WAIT_MS >= 0 else None
+    try:
+        with reserve_hash_slot("verify", timeout):
+            db_user = db.query(UserModel).filter(
+                (UserModel.username == user.identifier) | (UserModel.email == user.identifier)
+            ).first()
+            verified = db_user is not None and verify_password(user.password, db_user.hashed_password)
+    except PasswordHashBusy:
+        raise HTTPException(status_code=429, detail=ErrorMessage.LOGIN_BUSY, headers={"Retry-After": "1"})
+    if not verified:
+        record_login_failure(user.identifier, client_ip)
         raise HTTPException(status_code=400, detail=ErrorMessage.INVALID_CREDENTIALS)
+    record_login_success(user.identifier)
     
-    access_token = create_access_token(data={"sub": str(db_user.id)})
-    return {"access_token": access_token, "token_type": "bearer"}
+    access_token = create_user_access_token(db_user.id, db_user.role, db_user.token_version)
+    refresh_token = issue_refresh_token(db, db_user.id)
+    db.commit()
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+@router.post("/refresh", response_model=Token)
+def refresh(body: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """
+    用刷新令牌换取新的访问令牌，同时换发新的刷新令牌（旧令牌随即失效）
+    角色与令牌版本号按主键查询用户后写入令牌版本表，不做密码校验；重复使用已换发过的令牌会注销整个登录会话
+    """
+    user_id, refresh_token = rotate_refresh_token(db, body.refresh_token)
+    current = token_versions.reload_user(db, user_id)
+    if current is None:
+        raise HTTPException(status_code=401, detail=ErrorMessage.INVALID_REFRESH_TOKEN)
+    token_version, role = current
+    access_token = create_user_access_token(user_id, role, token_version)
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+@router.post("/logout")
+def logout(body: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """
+    注销：吊销刷新令牌所在登录会话换发出的全部刷新令牌
+    """
+    revoke_refresh_token(db, body.refresh_token)
+    return {"success": True}
 
 @router.post("/register", response_model=UserSchema)
 def register(user: UserCreate, db: Session = Depends(get_db)):
@@ -38,7 +90,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         raise create_error_response(StatusCode.BAD_REQUEST, ErrorMessage.PASSWORDS_NOT_MATCH)
     
     # 密码强度校验
-    if len(user.password) < 8:
+    if len(user.password) < MIN_PASSWORD_LENGTH:
         raise create_error_response(StatusCode.BAD_REQUEST, ErrorMessage.PASSWORD_TOO_SHORT)
     
     # 注册密钥控制角色
@@ -52,7 +104,9 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     if not role:
         raise create_error_response(StatusCode.BAD_REQUEST, ErrorMessage.INVALID_REGISTER_KEY)
     
-    return create_user(user, db, role=role)
+    db_user = create_user(user, db, role=role)
+    bump_versions(CacheEntity.users)
+    return db_user
 
 @router.get("/me", response_model=UserSchema)
 def read_users_me(current_user: UserModel = Depends(get_current_user)):
@@ -97,12 +151,16 @@ def update_profile(
 
         # 更新用户信息
         update_data = user_data.model_dump(exclude_unset=True)
+        if "role" in update_data and update_data["role"] != current_user.role:
+            revoke_access_tokens(current_user)
         for key, value in update_data.items():
             if hasattr(current_user, key):
                 setattr(current_user, key, value)
+        record_change(db, CacheEntity.users, [current_user.id])
 
         db.commit()
         db.refresh(current_user)
+        bump_versions(CacheEntity.users)
 
         return {
             "success": True,
@@ -142,7 +200,12 @@ def change_password(
     
     # 更新密码
     current_user.hashed_password = get_password_hash(password_change.new_password)
+    # 修改密码后其他设备上的登录会话都需要重新登录
+    revoke_access_tokens(current_user)
+    revoke_tokens(db, RefreshToken.user_id == current_user.id)
+    record_change(db, CacheEntity.users, [current_user.id])
     
     db.commit()
+    bump_versions(CacheEntity.users)
     
     return {"success": True, "message": SuccessMessage.PASSWORD_CHANGED_SUCCESSFULLY}
\ No newline at end of file
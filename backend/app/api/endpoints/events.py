@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.events import hub
+from app.core.invalidation import get_event_relay
+
+router = APIRouter()
+
+# 客户端断线后的重连间隔（毫秒）
+RETRY_FRAME = b"retry: 3000\n\n"
+
+async def event_stream():
+    """
+    订阅变更事件并持续输出 SSE 帧，连接断开时自动退订
+    """
+    get_event_relay()  # 多进程部署时确保本进程在转发其他进程的事件
+    subscriber = hub.subscribe()
+    try:
+        yield RETRY_FRAME
+        while True:
+            yield await subscriber.next_frame(settings.EVENTS_HEARTBEAT_SECONDS)
+    finally:
+        hub.unsubscribe(subscriber)
+
+@router.get("/stream")
+def stream_events():
+    """
+    以 Server-Sent Events 推送任务与项目的变更事件。
+    """
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.db.session import get_db
+from app.core.constants import ExportEntity, DataFormat
+from app.services.export import stream_export, MEDIA_TYPES
+
+router = APIRouter()
+
+@router.get("/{entity}")
+def export_entity(
+    entity: ExportEntity,
+    format: DataFormat = Query(DataFormat.ndjson, description="导出格式：ndjson 或 csv"),
+    project_id: Optional[int] = Query(None, description="仅导出指定项目的任务或进度"),
+    db: Session = Depends(get_db)
+):
+    """
+    流式导出项目、任务或项目进度历史，服务端分批读取，内存占用与数据量无关。
+    """
+    filename = f"{entity.value}.{format.value}"
+    return StreamingResponse(
+        stream_export(db.get_bind(), entity, format, project_id),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
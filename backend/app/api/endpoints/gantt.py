@@ -1,58 +1,103 @@
-from fastapi import APIRouter, Depends
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import timedelta
-import networkx as nx
+from typing import List, Optional
+from datetime import date
 
 from app.db.session import get_db
+from app.api.routing import ProfiledRoute
+from app.core.cache import cached_response
+from app.core.config import settings
+from app.core.constants import CacheEntity, ErrorMessage, SimulationDistribution
 from app.models.project import Project as ProjectModel, ProjectStatus
-from app.schemas.gantt import GanttProject, CriticalPathResponse
-from app.services.gantt import get_dependency_end_time
-router = APIRouter()
+from app.schemas.gantt import GanttProject, CriticalPathResponse, ScheduleResponse, SimulationResponse
+from app.services.cpm import CircularDependencyError, build_schedule
+from app.services.simulation import MAX_TRIALS, build_simulation
+from app.services.gantt import build_gantt_data, programme_ids_query
+from app.services.serializers import scope_to_projects
+router = APIRouter(route_class=ProfiledRoute)
 
 
+# 可重复的 root 参数：只返回这些项目及其全部上游、下游项目组成的项目群
+RootsQuery = Query(None, alias="root", description="项目群的根项目ID，可重复，缺省时返回全部项目")
+
+def roots_param(roots: Optional[List[int]]) -> str:
+    """缓存键中的根项目参数，与顺序和重复无关"""
+    return "all" if roots is None else ",".join(map(str, sorted(set(roots))))
+
 @router.get("/project-data", response_model=List[GanttProject])
-def get_gantt_data(db: Session = Depends(get_db)):
-    projects = db.query(ProjectModel).all()
-    gantt_data = []
+def get_gantt_data(
+    request: Request,
+    roots: Optional[List[int]] = RootsQuery,
+    start: Optional[date] = Query(None, alias="from", description="时间窗口起始日期，只返回与窗口重叠的项目"),
+    end: Optional[date] = Query(None, alias="to", description="时间窗口结束日期（含）"),
+    db: Session = Depends(get_db),
+):
+    if start is not None and end is not None and end < start:
+        raise HTTPException(status_code=400, detail=ErrorMessage.INVALID_DATE_RANGE)
+    window = None if start is None and end is None else (start, end)
+    # 未设置开始时间的项目以当天为基准推算，因此缓存键包含日期
+    return cached_response(
+        request, "gantt:project-data", [CacheEntity.projects],
+        lambda: build_gantt_data(db, roots, window), params=[date.today(), roots_param(roots), start, end]
+    )
 
-    for project in projects:
-        dependencies = []
+@router.get("/critical-path", response_model=CriticalPathResponse)
+def get_critical_path(request: Request, roots: Optional[List[int]] = RootsQuery, db: Session = Depends(get_db)):
+    return cached_response(
+        request, "gantt:critical-path", [CacheEntity.projects],
+        lambda: build_critical_path(db, roots), CriticalPathResponse, params=[roots_param(roots)]
+    )
 
-        if project.dependencies:
-            for dep in project.dependencies:
-                dependencies.append(dep.id)
+@router.get("/schedule", response_model=ScheduleResponse)
+def get_schedule(request: Request, db: Session = Depends(get_db)):
+    """
+    全部项目的最早/最晚开始与完成时间、总时差和自由时差，以并列数组返回
+    """
+    def compute():
+        try:
+            return build_schedule(db)
+        except CircularDependencyError:
+            raise HTTPException(status_code=409, detail=ErrorMessage.CIRCULAR_DEPENDENCY)
 
-        start_time = project.start_time
-        if not start_time:
-            start_time = get_dependency_end_time(project, db)
-        
-        end_time = project.end_time or (
-            start_time + timedelta(days=(project.estimated_duration or 0))
-        )
+    return cached_response(request, "gantt:schedule", [CacheEntity.projects], compute)
 
-        if project.status.value == ProjectStatus.completed.value:
-            progress = 100.0
-        elif project.progress_records:
-            progress = sorted(project.progress_records, key=lambda x: x.date, reverse=True)[0].progress * 100
-        else:
-            progress = 0.0
+@router.get("/simulation", response_model=SimulationResponse)
+def get_simulation(
+    request: Request,
+    trials: int = Query(1000, ge=1, le=MAX_TRIALS),
+    seed: int = Query(0, ge=0),
+    distribution: SimulationDistribution = SimulationDistribution.pert,
+    optimistic: float = Query(0.8, gt=0, le=1, description="工期最乐观值相对于剩余工期的倍数"),
+    pessimistic: float = Query(1.5, ge=1, description="工期最悲观值相对于剩余工期的倍数"),
+    db: Session = Depends(get_db),
+):
+    """
+    蒙特卡洛模拟全部项目的剩余工期，返回整体完工日期的 P50/P80/P95 与每个项目的关键度。
+    相同参数与种子的结果相同，因此按日期和参数缓存
+    """
+    def compute():
+        try:
+            return build_simulation(db, trials, seed, distribution, optimistic, pessimistic,
+                                    workers=settings.SIMULATION_WORKERS or os.cpu_count() or 1)
+        except CircularDependencyError:
+            raise HTTPException(status_code=409, detail=ErrorMessage.CIRCULAR_DEPENDENCY)
 
-        gantt_data.append({
-            "id": project.id,
-            "name": project.name,
-            "status": project.status.value,
-            "start_time": start_time.strftime("%Y-%m-%d"),
-            "end_time": end_time.strftime("%Y-%m-%d"),
-            "progress": progress,
-            "dependencies": dependencies
-        })
+    return cached_response(
+        request, "gantt:simulation", [CacheEntity.projects], compute,
+        params=[date.today(), trials, seed, distribution.value, optimistic, pessimistic],
+    )
 
-    return gantt_data
+def build_critical_path(db: Session, roots: Optional[List[int]] = None) -> CriticalPathResponse:
+    """
+    计算剩余工期加权的关键路径，指定 roots 时只在其所在的项目群内计算
+    """
+    import networkx as nx  # 导入耗时较长，首次计算关键路径时才加载
 
-@router.get("/critical-path", response_model=CriticalPathResponse)
-def get_critical_path(db: Session = Depends(get_db)):
-    projects = db.query(ProjectModel).all()
+    query = db.query(ProjectModel)
+    if roots is not None:
+        query = scope_to_projects(query, ProjectModel.id, programme_ids_query(roots))
+    projects = query.all()
     
     G = nx.DiGraph()
     G.add_node("start", duration=0)
@@ -73,7 +118,8 @@ def get_critical_path(db: Session = Depends(get_db)):
     
     for project in projects:
         for dep in project.dependencies:
-            G.add_edge(dep.id, project.id)
+            if dep.id in weights:  # 项目群的下游项目可能依赖群外项目
+                G.add_edge(dep.id, project.id)
     
     for project in projects:
         if G.in_degree(project.id) == 0 and project.id != "start":
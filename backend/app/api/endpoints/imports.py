@@ -0,0 +1,26 @@
+import io
+from fastapi import APIRouter, Depends, File, Query, UploadFile
+from sqlalchemy.orm import Session
+from app.db.session import get_db
+from app.api.dependencies import TokenUser, get_director_user
+from app.core.constants import ImportEntity, DataFormat
+from app.schemas.imports import ImportReport
+from app.services.importer import run_import, DEFAULT_BATCH_SIZE
+
+router = APIRouter()
+
+@router.post("/{entity}", response_model=ImportReport)
+def import_entity(
+    entity: ImportEntity,
+    file: UploadFile = File(..., description="NDJSON 或 CSV 数据文件"),
+    format: DataFormat = Query(DataFormat.ndjson, description="数据格式：ndjson 或 csv"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=10000, description="每批校验与写入的行数"),
+    db: Session = Depends(get_db),
+    current_user: TokenUser = Depends(get_director_user)
+):
+    """
+    批量导入用户、项目、任务或依赖关系（仅总监）。
+    文件逐行流式读取，每批一个事务；单行错误记录在报告中，不会中断导入。
+    """
+    lines = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    return run_import(db, entity, lines, format, batch_size)
@@ -0,0 +1,71 @@
+from pathlib import Path
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.db.session import get_db
+from app.api.dependencies import TokenUser, get_admin_user
+from app.api.routing import ProfiledRoute
+from app.core.constants import ErrorMessage, JobKind, JobStatus
+from app.models.job import Job as JobModel
+from app.schemas.job import Job, JobCreate
+from app.services.jobs import enqueue, job_dict
+
+router = APIRouter(route_class=ProfiledRoute)
+
+def submit_job(db: Session, kind: JobKind, params: dict, created_by: Optional[int] = None) -> dict:
+    """入队并返回任务；已有相同的待执行任务时返回该任务"""
+    try:
+        job, _ = enqueue(db, kind, params, created_by=created_by)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    return job_dict(job)
+
+def get_job_or_404(db: Session, job_id: int) -> JobModel:
+    job = db.get(JobModel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=ErrorMessage.JOB_NOT_FOUND)
+    return job
+
+@router.post("/", response_model=Job, status_code=202)
+def create_job(job: JobCreate, db: Session = Depends(get_db), current_user: TokenUser = Depends(get_admin_user)):
+    """
+    提交后台任务（仅管理员），立即返回任务，通过 GET /jobs/{id} 轮询状态与进度。
+    """
+    return submit_job(db, job.kind, job.params, current_user.id)
+
+@router.get("/", response_model=List[Job])
+def read_jobs(
+    status: Optional[JobStatus] = None,
+    kind: Optional[JobKind] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """
+    最近的后台任务，按提交时间倒序。
+    """
+    query = db.query(JobModel)
+    if status is not None:
+        query = query.filter(JobModel.status == status)
+    if kind is not None:
+        query = query.filter(JobModel.kind == kind)
+    return [job_dict(job) for job in query.order_by(JobModel.id.desc()).limit(limit)]
+
+@router.get("/{job_id}", response_model=Job)
+def read_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    后台任务的状态、进度与结果。
+    """
+    return job_dict(get_job_or_404(db, job_id))
+
+@router.get("/{job_id}/download")
+def download_job_output(job_id: int, db: Session = Depends(get_db)):
+    """
+    下载导出任务生成的文件。
+    """
+    job = get_job_or_404(db, job_id)
+    result = job_dict(job)["result"]
+    if job.kind != JobKind.export or job.status != JobStatus.succeeded or not Path(result["path"]).exists():
+        raise HTTPException(status_code=409, detail=ErrorMessage.JOB_RESULT_NOT_READY)
+    return FileResponse(result["path"], filename=result["filename"])
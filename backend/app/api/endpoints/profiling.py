@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.api.dependencies import TokenUser, get_director_user
+from app.core.constants import ErrorMessage
+from app.core.profiling import SamplingProfiler
+
+router = APIRouter()
+
+@router.get("/sample", response_class=PlainTextResponse)
+async def sample_profile(
+    seconds: float = Query(5, gt=0, le=60, description="采样时长（秒）"),
+    interval_ms: float = Query(5, ge=1, le=1000, description="采样间隔（毫秒）"),
+    include_idle: bool = Query(False, description="是否包含空闲等待中的线程"),
+    current_user: TokenUser = Depends(get_director_user)
+):
+    """
+    对当前工作进程采样指定时长（仅总监），返回折叠栈文本，
+    可直接交给 flamegraph.pl、speedscope 等工具生成火焰图。
+    采样在专用线程中进行，既不阻塞事件循环也不占用请求线程池；同一进程同时只允许一个采样任务，其余返回 409。
+    """
+    profiler = SamplingProfiler(interval=interval_ms / 1000, include_idle=include_idle)
+    try:
+        await profiler.run_async(seconds)
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail=ErrorMessage.PROFILER_BUSY)
+    return PlainTextResponse(
+        profiler.render_collapsed(),
+        headers={"X-Profile-Samples": str(profiler.sample_count)},
+    )
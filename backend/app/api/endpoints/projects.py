@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Request, Response
 from typing import List
 from app.models.project import Project as ProjectModel, ProjectProgress as ProjectProgressModel
 from app.models.task import Task as TaskModel
@@ -8,12 +8,22 @@ from app.schemas.burndown import BurnDownProject
 from app.schemas.task import Task as TaskSchema
 from app.schemas.user import User as UserSchema
 from app.db.session import get_db
-from app.services.project import update_project_progress, get_filled_project_progress, get_ideal_project_progress, analyse_warning_level
+from app.api.routing import ProfiledRoute
+from app.core.cache import cached_response, bump_versions
+from app.core.events import publish_event
+from app.core.constants import CacheEntity, ErrorMessage
+from app.services.project import update_project_progress, publish_progress_changed, get_filled_project_progress, get_ideal_project_progress, analyse_warning_level
+from app.services.sync import record_change
+from app.services.assignment import project_member_ids
+from app.services.serializers import fetch_project_dicts, fetch_task_dicts
+from app.services.gantt import downstream_ids_query, planned_end, upstream_ids_query
+from app.services import reachability
+from app.core.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 # 创建路由
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/", response_model=Project, status_code=201)
 def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
@@ -21,18 +31,25 @@ def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
     创建新项目。
     """
     db_project = ProjectModel(**project.model_dump())
+    db_project.planned_end = planned_end(db_project.start_time, db_project.end_time, db_project.estimated_duration)
     db.add(db_project)
+    db.flush()
+    record_change(db, CacheEntity.projects, [db_project.id])
     db.commit()
     db.refresh(db_project)
+    bump_versions(CacheEntity.projects)
+    publish_event("project.created", id=db_project.id)
     return db_project
 
 @router.get("/", response_model=List[Project])
-def read_projects(db: Session = Depends(get_db)):
+def read_projects(request: Request, db: Session = Depends(get_db)):
     """
     获取项目列表。
     """
-    projects = db.query(ProjectModel).all()
-    return projects
+    return cached_response(
+        request, "projects:list", [CacheEntity.projects, CacheEntity.tasks],
+        lambda: fetch_project_dicts(db)
+    )
 
 @router.get("/{project_id}", response_model=Project)
 def read_project(project_id: int, db: Session = Depends(get_db)):
@@ -56,9 +73,14 @@ def update_project(project_id: int, project: ProjectUpdate, db: Session = Depend
         raise HTTPException(status_code=404, detail="Project not found")
     for key, value in project.model_dump(exclude_unset=True).items():
         setattr(db_project, key, value)
+    db_project.planned_end = planned_end(db_project.start_time, db_project.end_time, db_project.estimated_duration)
+    record_change(db, CacheEntity.projects, [project_id])
     db.commit()
     db.refresh(db_project)
-    update_project_progress(project_id, db) # 更新项目进度
+    progress_changed = update_project_progress(project_id, db) # 更新项目进度
+    bump_versions(CacheEntity.projects)
+    publish_event("project.updated", id=project_id)
+    publish_progress_changed(progress_changed)
     return db_project
 
 @router.delete("/{project_id}", response_model=Project)
@@ -69,8 +91,15 @@ def delete_project(project_id: int, db: Session = Depends(get_db)):
     db_project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
     if db_project is None:
         raise HTTPException(status_code=404, detail="Project not found")
+    # 项目删除时级联删除其任务，同样需要记录墓碑
+    record_change(db, CacheEntity.tasks, [task.id for task in db_project.tasks], deleted=True)
+    record_change(db, CacheEntity.projects, [project_id], deleted=True)
     db.delete(db_project)
+    db.flush()
+    reachability.remove_project(db, project_id)
     db.commit()
+    bump_versions(CacheEntity.projects, CacheEntity.tasks)
+    publish_event("project.deleted", id=project_id)
     return db_project
 
 @router.post("/{project_id}/dependencies/", response_model=Project)
@@ -88,11 +117,56 @@ def add_dependencies(
     dependencies = db.query(ProjectModel).filter(ProjectModel.id.in_(depends_on_ids)).all()
     if len(dependencies) != len(depends_on_ids):
         raise HTTPException(status_code=404, detail="Some dependency projects not found")
+    # 闭包表中一次查找即可判断新依赖是否成环
+    if reachability.cycle_dependencies(db, project_id, depends_on_ids):
+        raise HTTPException(status_code=409, detail=ErrorMessage.CIRCULAR_DEPENDENCY)
+    old_ids = [dependency.id for dependency in project.dependencies]
     project.dependencies = dependencies
+    db.flush()
+    reachability.replace_dependencies(db, project_id, old_ids, depends_on_ids)
+    record_change(db, CacheEntity.projects, [project_id])
     db.commit()
     db.refresh(project)
+    bump_versions(CacheEntity.projects)
+    publish_event("project.dependencies_changed", id=project_id, depends_on=depends_on_ids)
     return project
 
+def related_projects(request: Request, db: Session, project_id: int, namespace: str, ids_query) -> Response:
+    """依赖图中与项目相连的全部项目（不含自身），按ID排序"""
+    if not db.query(ProjectModel.id).filter(ProjectModel.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+    ids = ids_query([project_id])
+    ids = ids.where(ids.selected_columns.id != project_id)
+    return cached_response(
+        request, namespace, [CacheEntity.projects, CacheEntity.tasks],
+        lambda: fetch_project_dicts(db, ids), params=[project_id]
+    )
+
+@router.get("/{project_id}/upstream", response_model=List[Project])
+def get_upstream_projects(project_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    获取指定项目直接或间接依赖的全部项目
+    """
+    return related_projects(request, db, project_id, "projects:upstream", upstream_ids_query)
+
+@router.get("/{project_id}/downstream", response_model=List[Project])
+def get_downstream_projects(project_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    获取直接或间接依赖指定项目的全部项目
+    """
+    return related_projects(request, db, project_id, "projects:downstream", downstream_ids_query)
+
+@router.get("/{project_id}/upstream/{upstream_id}")
+def check_upstream(project_id: int, upstream_id: int, db: Session = Depends(get_db)):
+    """
+    判断 upstream_id 是否直接或间接被指定项目依赖
+    """
+    return {
+        "project_id": project_id,
+        "upstream_id": upstream_id,
+        "is_upstream": reachability.is_upstream(db, upstream_id, project_id),
+    }
+
 @router.get("/{project_id}/tasks", response_model=List[TaskSchema])
 def get_project_tasks(project_id: int, db: Session = Depends(get_db)):
     """
@@ -104,8 +178,7 @@ def get_project_tasks(project_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Project not found")
     
     # 获取项目的所有任务
-    tasks = db.query(TaskModel).filter(TaskModel.project_id == project_id).all()
-    return tasks
+    return ORJSONResponse(fetch_task_dicts(db, TaskModel.project_id == project_id))
 
 @router.get("/{project_id}/members", response_model=List[UserSchema])
 def get_project_members(project_id: int, db: Session = Depends(get_db)):
@@ -117,17 +190,28 @@ def get_project_members(project_id: int, db: Session = Depends(get_db)):
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # 通过任务获取项目成员
-    task_ids = db.query(TaskModel.id).filter(TaskModel.project_id == project_id).subquery()
-    members = db.query(UserModel).filter(UserModel.task_id.in_(task_ids)).distinct().all()
+    # 通过任务分配关系获取项目成员
+    members = db.query(UserModel).filter(UserModel.id.in_(project_member_ids(project_id)))\
+                .order_by(UserModel.id).all()
     
     return members
 
 @router.get("/{project_id}/burn-down/", response_model=BurnDownProject)
-def get_burn_down_data(project_id: int, db: Session = Depends(get_db)):
+def get_burn_down_data(project_id: int, request: Request, db: Session = Depends(get_db)):
     """
     获取燃尽图的数据以及预警等级信息
     """
+    # 实际进度会填充到当天，因此缓存键包含日期
+    return cached_response(
+        request, "projects:burn-down", [CacheEntity.projects],
+        lambda: build_burn_down_data(project_id, db), BurnDownProject,
+        params=[project_id, date.today()]
+    )
+
+def build_burn_down_data(project_id: int, db: Session) -> BurnDownProject:
+    """
+    计算燃尽图数据
+    """
     # 获取实际项目进度
     actual_progresses = get_filled_project_progress(project_id, db)
 
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.db.session import get_db
+from app.api.routing import ProfiledRoute
+from app.schemas.sync import SyncResponse
+from app.services.sync import sync
+
+router = APIRouter(route_class=ProfiledRoute)
+
+@router.get("/", response_model=SyncResponse)
+def get_sync(
+    since: Optional[int] = Query(None, ge=0, description="上次同步返回的游标，缺省时返回全量快照"),
+    limit: int = Query(1000, ge=1, le=10000, description="单次最多读取的变更日志条数"),
+    db: Session = Depends(get_db)
+):
+    """
+    增量同步：返回游标之后新增、更新的实体与已删除实体的墓碑。
+    has_more 为 true 时应使用返回的游标继续拉取。
+    """
+    return sync(db, since, limit)
@@ -1,15 +1,31 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.schemas.task import TaskCreate, TaskUpdate, Task as TaskSchema
 from app.schemas.user import User as UserSchema
 from app.models.project import Project as ProjectModel
-from app.models.task import Task as TaskModel
+from app.models.task import Task as TaskModel, task_assignments
 from app.models.user import User as UserModel
-from app.services.project import update_project_progress
+from app.services.project import update_project_progress, publish_progress_changed
+from app.services.assignment import add_assignments, remove_assignments, clear_task_assignments
+from app.services.sync import record_change
+from app.services.serializers import fetch_task_dicts
+from app.core.responses import ORJSONResponse
 from app.db.session import get_db
+from app.api.routing import ProfiledRoute
+from app.core.cache import bump_versions
+from app.core.events import publish_event
+from app.core.constants import CacheEntity
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
+
+def get_task_or_404(task_id: int, db: Session) -> TaskModel:
+    """查询任务，不存在时返回 404"""
+    task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
 
 @router.post("/", response_model=TaskSchema, status_code=201)
 def create_task(task: TaskCreate, db: Session = Depends(get_db)):
@@ -24,18 +40,24 @@ def create_task(task: TaskCreate, db: Session = Depends(get_db)):
     # 创建任务
     db_task = TaskModel(**task.model_dump())
     db.add(db_task)
+    db.flush()
+    record_change(db, CacheEntity.tasks, [db_task.id])
     db.commit()
     db.refresh(db_task)
     
-    # 验证并设置负责人任务ID（任务创建后）
+    # 验证负责人并将其分配到任务（任务创建后）
     if task.head_id:
         head = db.query(UserModel).filter(UserModel.id == task.head_id).first()
         if not head:
             raise HTTPException(status_code=404, detail="Head user not found")
-        head.task_id = db_task.id  # 使用数据库任务的ID
+        add_assignments(db, [(db_task.id, head.id)])
         db.commit()
+        db.refresh(db_task)
     
-    update_project_progress(db_task.project_id, db)  # 更新项目进度
+    progress_changed = update_project_progress(db_task.project_id, db)  # 更新项目进度
+    bump_versions(CacheEntity.tasks, CacheEntity.projects, CacheEntity.users)
+    publish_event("task.created", id=db_task.id, project_id=db_task.project_id, head_id=db_task.head_id)
+    publish_progress_changed(progress_changed)
     return db_task
 
 @router.get("/", response_model=List[TaskSchema])
@@ -43,8 +65,7 @@ def read_tasks(db: Session = Depends(get_db)):
     """
     获取任务列表
     """
-    tasks = db.query(TaskModel).all()
-    return tasks
+    return ORJSONResponse(fetch_task_dicts(db))
 
 @router.get("/{task_id}", response_model=TaskSchema)
 def read_task(task_id: int, db: Session = Depends(get_db)):
@@ -76,13 +97,20 @@ def update_task(task_id: int, task: TaskUpdate, db: Session = Depends(get_db)):
         head = db.query(UserModel).filter(UserModel.id == update_data["head_id"]).first()
         if not head:
             raise HTTPException(status_code=404, detail="Head user not found")
-        head.task_id = task_id
+        add_assignments(db, [(task_id, head.id)])
     
     for key, value in update_data.items():
         setattr(db_task, key, value)
+    record_change(db, CacheEntity.tasks, [task_id])
     db.commit()
     db.refresh(db_task)
-    update_project_progress(db_task.project_id, db) # 更新项目进度
+    progress_changed = update_project_progress(db_task.project_id, db) # 更新项目进度
+    bump_versions(CacheEntity.tasks, CacheEntity.projects, CacheEntity.users)
+    publish_progress_changed(progress_changed)
+    event_type = "task.finished" if update_data.get("finished") else "task.updated"
+    publish_event(event_type, id=task_id, project_id=db_task.project_id, fields=sorted(update_data))
+    if update_data.get("head_id"):
+        publish_event("task.assignment_changed", id=task_id, head_id=db_task.head_id)
     return db_task
 
 @router.delete("/{task_id}", response_model=TaskSchema)
@@ -94,14 +122,16 @@ def delete_task(task_id: int, db: Session = Depends(get_db)):
     if db_task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    # 清除关联用户的 task_id
-    users = db.query(UserModel).filter(UserModel.task_id == task_id).all()
-    for user in users:
-        user.task_id = None
+    # 移除任务的全部分配关系
+    clear_task_assignments(db, task_id)
     
     db.delete(db_task)
+    record_change(db, CacheEntity.tasks, [task_id], deleted=True)
     db.commit()
-    update_project_progress(db_task.project_id, db) # 更新项目进度
+    progress_changed = update_project_progress(db_task.project_id, db) # 更新项目进度
+    bump_versions(CacheEntity.tasks, CacheEntity.projects, CacheEntity.users)
+    publish_event("task.deleted", id=task_id, project_id=db_task.project_id)
+    publish_progress_changed(progress_changed)
     return db_task
 
 @router.get("/{task_id}/users", response_model=List[UserSchema])
@@ -113,7 +143,8 @@ def get_task_users(task_id: int, db: Session = Depends(get_db)):
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    users = db.query(UserModel).filter(UserModel.task_id == task_id).all()
+    users = db.query(UserModel).join(task_assignments, task_assignments.c.user_id == UserModel.id)\
+              .filter(task_assignments.c.task_id == task_id).order_by(UserModel.id).all()
     return users
 
 @router.post("/{task_id}/assign")
@@ -123,23 +154,46 @@ def assign_users_to_task(
     db: Session = Depends(get_db)
 ):
     """
-    将用户分配到任务
+    批量将用户分配到任务，已分配的用户跳过
     """
-    task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+    task = get_task_or_404(task_id, db)
     
     # 验证用户是否存在
-    users = db.query(UserModel).filter(UserModel.id.in_(user_ids)).all()
-    if len(users) != len(user_ids):
+    found = set(db.scalars(select(UserModel.id).where(UserModel.id.in_(user_ids))))
+    if len(found) != len(set(user_ids)):
         raise HTTPException(status_code=404, detail="Some users not found")
     
-    # 分配用户到任务
-    for user in users:
-        user.task_id = task_id
-    
+    added = add_assignments(db, [(task_id, user_id) for user_id in user_ids])
+    db.commit()
+    db.refresh(task)
+    bump_versions(CacheEntity.users, CacheEntity.tasks, CacheEntity.projects)
+    publish_event("task.assignment_changed", id=task_id, assigned=[user_id for _, user_id in added])
+    return {
+        "message": f"Successfully assigned {len(added)} users to task {task_id}",
+        "assigned": [user_id for _, user_id in added],
+        "participant_count": task.participant_count,
+    }
+
+@router.post("/{task_id}/unassign")
+def unassign_users_from_task(
+    task_id: int, 
+    user_ids: List[int], 
+    db: Session = Depends(get_db)
+):
+    """
+    批量从任务中移除用户，未分配的用户跳过
+    """
+    task = get_task_or_404(task_id, db)
+    removed = remove_assignments(db, [(task_id, user_id) for user_id in user_ids])
     db.commit()
-    return {"message": f"Successfully assigned {len(users)} users to task {task_id}"}
+    db.refresh(task)
+    bump_versions(CacheEntity.users, CacheEntity.tasks, CacheEntity.projects)
+    publish_event("task.assignment_changed", id=task_id, unassigned=[user_id for _, user_id in removed])
+    return {
+        "message": f"Successfully unassigned {len(removed)} users from task {task_id}",
+        "unassigned": [user_id for _, user_id in removed],
+        "participant_count": task.participant_count,
+    }
 
 @router.delete("/{task_id}/unassign/{user_id}")
 def unassign_user_from_task(
@@ -150,20 +204,11 @@ def unassign_user_from_task(
     """
     从任务中移除用户
     """
-    task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    user = db.query(UserModel).filter(
-        UserModel.id == user_id, 
-        UserModel.task_id == task_id
-    ).first()
-    if not user:
+    get_task_or_404(task_id, db)
+    if not remove_assignments(db, [(task_id, user_id)]):
         raise HTTPException(status_code=404, detail="User not assigned to this task")
     
-    if task.head_id == user_id:
-        task.head_id = None
-    user.task_id = None
-    
     db.commit()
+    bump_versions(CacheEntity.users, CacheEntity.tasks, CacheEntity.projects)
+    publish_event("task.assignment_changed", id=task_id, unassigned=[user_id])
     return {"message": f"Successfully unassigned user {user_id} from task {task_id}"}
\ No newline at end of file
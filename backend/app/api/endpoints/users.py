@@ -1,21 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.session import get_db
+from app.api.routing import ProfiledRoute
 from app.models.user import User as UserModel
 from app.models.task import Task as TaskModel
+from app.models.refresh_token import RefreshToken
 from app.schemas.user import UserCreate, UserUpdate, User as UserSchema
 from app.core.security import get_password_hash
-from app.services.user import create_user, calculate_all_users_performance
+from app.services.user import create_user
+from app.services.sync import record_change
+from app.services.assignment import add_assignments, remove_assignments, user_task_ids
+from app.services.tokens import revoke_access_tokens, revoke_tokens
+from app.core.cache import bump_versions
+from app.core.events import publish_event
+from app.core.constants import CacheEntity, JobKind
+from app.schemas.job import Job
+from app.api.endpoints.jobs import submit_job
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/", response_model=UserSchema, status_code=201)
 def create_user_endpoint(user: UserCreate, db: Session = Depends(get_db)):
     """
     创建用户。
     """
-    return create_user(user, db)
+    db_user = create_user(user, db)
+    bump_versions(CacheEntity.users)
+    return db_user
 
 @router.get("/outstanding", response_model=List[UserSchema])
 def get_outstanding_users(db: Session = Depends(get_db)):
@@ -28,21 +40,13 @@ def get_outstanding_users(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/calculate-performance")
+@router.post("/calculate-performance", response_model=Job, status_code=202)
 def calculate_all_users_performance_endpoint(db: Session = Depends(get_db)):
     """
-    计算所有用户的绩效，并更新outstanding字段
+    提交计算所有用户绩效、更新 outstanding 字段的后台任务，立即返回任务，通过 GET /jobs/{id} 轮询。
+    已有待执行的同类任务时直接返回该任务
     """
-    try:
-        calculate_all_users_performance(db)
-        db.commit()
-        return {"message": "Performance calculation completed successfully"}
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to calculate performance: {str(e)}"
-        )
+    return submit_job(db, JobKind.users_performance, {})
 
 @router.get("/{user_id}", response_model=UserSchema)
 def read_user(user_id: int, db: Session = Depends(get_db)):
@@ -73,21 +77,35 @@ def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
     
     update_data = user.model_dump(exclude_unset=True)
     
-    # 验证任务是否存在（如果要分配任务）
-    if "task_id" in update_data and update_data["task_id"]:
-        task = db.query(TaskModel).filter(TaskModel.id == update_data["task_id"]).first()
+    # 兼容旧接口：修改 task_id 即把用户从原任务移到新任务，其余分配关系保持不变
+    task_changed = "task_id" in update_data and update_data["task_id"] != db_user.task_id
+    new_task_id = update_data.pop("task_id", None)
+    if task_changed and new_task_id:
+        task = db.query(TaskModel).filter(TaskModel.id == new_task_id).first()
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
+    if task_changed:
+        if db_user.task_id:
+            remove_assignments(db, [(db_user.task_id, user_id)])
+        if new_task_id:
+            add_assignments(db, [(new_task_id, user_id)])
     
-    # 如果更新密码，需要加密
+    # 如果更新密码，需要加密；密码或角色变更后已签发的令牌全部失效
     if "password" in update_data:
         update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        revoke_tokens(db, RefreshToken.user_id == user_id)
+    if "hashed_password" in update_data or update_data.get("role", db_user.role) != db_user.role:
+        revoke_access_tokens(db_user)
     
     for key, value in update_data.items():
         setattr(db_user, key, value)
+    record_change(db, CacheEntity.users, [user_id])
     
     db.commit()
     db.refresh(db_user)
+    bump_versions(CacheEntity.users, *((CacheEntity.tasks, CacheEntity.projects) if task_changed else ()))
+    if task_changed:
+        publish_event("task.assignment_changed", id=db_user.task_id, user_id=user_id)
     return db_user
 
 @router.get("/{user_id}/task", response_model=dict)
@@ -101,6 +119,17 @@ def get_user_task(user_id: int, db: Session = Depends(get_db)):
     
     return {"task": user.task_id}
 
+@router.get("/{user_id}/tasks", response_model=List[int])
+def get_user_tasks(user_id: int, db: Session = Depends(get_db)):
+    """
+    获取用户参与的所有任务ID
+    """
+    user = db.query(UserModel.id).filter(UserModel.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return user_task_ids(db, user_id)
+
 @router.get("/{user_id}/headed-task", response_model=dict)
 def get_user_headed_task(user_id: int, db: Session = Depends(get_db)):
     """
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .endpoints import auth, projects, tasks, users, gantt
+from .endpoints import auth, projects, tasks, users, gantt, events, sync, export, imports, profiling, jobs
 
 router = APIRouter()
 
@@ -7,4 +7,10 @@ router.include_router(auth.router, prefix="/auth", tags=["auth"])
 router.include_router(projects.router, prefix="/projects", tags=["projects"])
 router.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
 router.include_router(users.router, prefix="/users", tags=["users"])
-router.include_router(gantt.router, prefix="/gantt", tags=["gantt"])
\ No newline at end of file
+router.include_router(gantt.router, prefix="/gantt", tags=["gantt"])
+router.include_router(events.router, prefix="/events", tags=["events"])
+router.include_router(sync.router, prefix="/sync", tags=["sync"])
+router.include_router(export.router, prefix="/export", tags=["export"])
+router.include_router(imports.router, prefix="/import", tags=["import"])
+router.include_router(profiling.router, prefix="/profiling", tags=["profiling"])
+router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
\ No newline at end of file
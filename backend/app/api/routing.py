@@ -0,0 +1,33 @@
+from typing import Any, Callable
+from fastapi import Depends, HTTPException, Request
+from fastapi.routing import APIRoute
+from sqlalchemy.orm import Session
+from app.api.dependencies import get_token_user
+from app.core.constants import ErrorMessage, UserRole
+from app.core.profiling import get_request_profile, profile_endpoint
+from app.db.session import get_db
+
+def authorize_request_profile(request: Request, db: Session = Depends(get_db)) -> None:
+    """
+    请求带 ?profile=1 时校验当前用户为总监，通过后启用单请求分析，否则返回 403。
+    未请求分析时直接返回，不做任何查询；令牌带角色声明时通常也不查询用户表。
+    """
+    profile = get_request_profile()
+    if profile is None:
+        return
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=403, detail=ErrorMessage.FORBIDDEN)
+    user = get_token_user(token, db)
+    if user.role != UserRole.director:
+        raise HTTPException(status_code=403, detail=ErrorMessage.FORBIDDEN)
+    profile.authorized = True
+
+class ProfiledRoute(APIRoute):
+    """
+    支持 ?profile=1 单请求分析的路由类：包装接口函数并追加鉴权依赖。
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        kwargs["dependencies"] = [*(kwargs.get("dependencies") or []), Depends(authorize_request_profile)]
+        super().__init__(path, profile_endpoint(endpoint), **kwargs)
@@ -0,0 +1,342 @@
+# 响应缓存：按实体版本号失效，支持强 ETag 与 If-None-Match 协商；
+# 缓存未命中时相同请求的并发计算合并为一次，重新计算期间其余请求可拿到有限年龄内的旧响应。
+# 版本号在新进程或清空的 Redis 中从 0 重新计数，ETag 另外混入后端的纪元（每次重新计数时随机生成），
+# 上一个生命周期签发的 ETag 不会因版本号恰好相同而被误判为未修改。
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.constants import CacheEntity
+from app.core.metrics import Gauge, registry
+from app.core.singleflight import SingleFlight
+
+
+class CacheBackend:
+    """
+    缓存后端接口：保存序列化后的响应体，并维护每个实体的版本号。
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes) -> None:
+        raise NotImplementedError
+
+    def get_versions(self, entities: Sequence[str]) -> List[int]:
+        raise NotImplementedError
+
+    def bump_version(self, entity: str) -> int:
+        raise NotImplementedError
+
+    def advance_version(self, entity: str, version: int) -> None:
+        """把实体版本号推进到 version（不会回退），由跨进程失效通道调用"""
+        raise NotImplementedError
+
+    def epoch(self) -> str:
+        """版本号的纪元：版本号重新从 0 计数时改变，参与 ETag 计算"""
+        raise NotImplementedError
+
+    def set_epoch(self, epoch: str) -> None:
+        """使用外部持久化的纪元（跨进程失效通道的版本号不会重新计数，各进程共用同一个纪元）"""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    进程内 LRU 缓存后端，超过容量时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._epoch = secrets.token_hex(8)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_versions(self, entities: Sequence[str]) -> List[int]:
+        versions = self._versions
+        return [versions.get(entity, 0) for entity in entities]
+
+    def bump_version(self, entity: str) -> int:
+        with self._lock:
+            version = self._versions.get(entity, 0) + 1
+            self._versions[entity] = version
+            return version
+
+    def advance_version(self, entity: str, version: int) -> None:
+        with self._lock:
+            if version > self._versions.get(entity, 0):
+                self._versions[entity] = version
+
+    def epoch(self) -> str:
+        return self._epoch
+
+    def set_epoch(self, epoch: str) -> None:
+        self._epoch = epoch
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._epoch = secrets.token_hex(8)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis 协议缓存后端，版本号保存在服务端，多个进程共享同一份失效状态。
+    """
+
+    KEY_PREFIX = "collabw:cache:"
+    VERSION_PREFIX = "collabw:version:"
+    EPOCH_KEY = "collabw:epoch"
+
+    def __init__(self, url: str, ttl_seconds: int = 600):
+        import redis  # 可选依赖，仅在启用 redis 后端时导入
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self._epoch = self._ensure_epoch()
+
+    def _ensure_epoch(self) -> str:
+        """读取服务端的纪元，不存在（首次使用或被清空）时生成；并发生成时以先写入的为准"""
+        self.client.set(self.EPOCH_KEY, secrets.token_hex(8), nx=True)
+        return self.client.get(self.EPOCH_KEY).decode()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.KEY_PREFIX + key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self.client.set(self.KEY_PREFIX + key, value, ex=self.ttl_seconds)
+
+    def get_versions(self, entities: Sequence[str]) -> List[int]:
+        # 纪元与版本号在同一次 MGET 中读取，Redis 被清空后随即换用新纪元
+        *values, epoch = self.client.mget([self.VERSION_PREFIX + entity for entity in entities] + [self.EPOCH_KEY])
+        self._epoch = epoch.decode() if epoch is not None else self._ensure_epoch()
+        return [int(value) if value is not None else 0 for value in values]
+
+    def bump_version(self, entity: str) -> int:
+        return int(self.client.incr(self.VERSION_PREFIX + entity))
+
+    def advance_version(self, entity: str, version: int) -> None:
+        from redis.exceptions import WatchError
+
+        key = self.VERSION_PREFIX + entity
+        with self.client.pipeline() as pipe:
+            # 乐观锁：版本号在读取后被其他进程修改时重试
+            while True:
+                try:
+                    pipe.watch(key)
+                    if int(pipe.get(key) or 0) >= version:
+                        pipe.unwatch()
+                        return
+                    pipe.multi()
+                    pipe.set(key, version)
+                    pipe.execute()
+                    return
+                except WatchError:
+                    continue
+
+    def epoch(self) -> str:
+        return self._epoch
+
+    def set_epoch(self, epoch: str) -> None:
+        self.client.set(self.EPOCH_KEY, epoch)
+        self._epoch = epoch
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match="collabw:*"):
+            self.client.delete(key)
+        self._epoch = self._ensure_epoch()
+
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_cache_backend() -> CacheBackend:
+    """根据配置懒加载缓存后端单例"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if settings.CACHE_BACKEND == "redis":
+                    _backend = RedisCacheBackend(settings.CACHE_REDIS_URL, settings.CACHE_TTL_SECONDS)
+                else:
+                    _backend = MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+    return _backend
+
+
+def set_cache_backend(backend: CacheBackend) -> None:
+    """替换缓存后端（用于测试或自定义部署）"""
+    global _backend
+    _backend = backend
+
+
+def bump_versions(*entities: CacheEntity) -> None:
+    """
+    递增实体版本号，使依赖这些实体的缓存响应全部失效。需要在写操作提交后调用！
+    启用跨进程失效通道时通过通道发布，其他工作进程在下次读取缓存前追平。
+    """
+    from app.core.invalidation import get_invalidation_bus
+
+    bus = get_invalidation_bus()
+    if bus is not None:
+        bus.publish(entities)
+        return
+    backend = get_cache_backend()
+    for entity in entities:
+        backend.bump_version(entity.value)
+
+
+def make_etag(namespace: str, params: Iterable[Any], versions: Iterable[int], epoch: str = "") -> str:
+    """根据版本号纪元、接口、参数与实体版本号生成强 ETag"""
+    raw = "|".join([epoch, namespace, *map(str, params), *map(str, versions)])
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断 If-None-Match 请求头是否命中当前 ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class StaleResponses:
+    """
+    每个（接口, 参数）最近一次计算出的响应，缓存失效后重新计算期间返回给并发请求。
+    只保存在进程内，容量与 CACHE_MAX_ENTRIES 相同，按最久未使用淘汰
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[Hashable, Tuple[str, bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, bytes, float]]:
+        """返回 (ETag, 响应体, 已过去的秒数)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        etag, body, computed_at = entry
+        return etag, body, time.monotonic() - computed_at
+
+    def put(self, key: Hashable, etag: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (etag, body, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_flights = SingleFlight()
+_stale = StaleResponses()
+
+registry.register(Gauge(
+    "cache_computations_in_flight", "缓存未命中、正在计算的响应数（相同请求合并后）", lambda: len(_flights),
+))
+
+
+@lru_cache(maxsize=None)
+def _type_adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _compute_body(backend: CacheBackend, etag: str, compute: Callable[[], Any], response_model: Any,
+                  stale_key: Hashable) -> bytes:
+    """计算并序列化响应，写入缓存与旧响应表；上一轮合并计算刚结束时直接复用其结果"""
+    body = backend.get(etag)
+    if body is None:
+        if response_model is None:
+            body = orjson.dumps(compute(), option=orjson.OPT_NON_STR_KEYS)
+        else:
+            adapter = _type_adapter(response_model)
+            body = adapter.dump_json(adapter.validate_python(compute(), from_attributes=True))
+        backend.set(etag, body)
+    _stale.put(stale_key, etag, body)
+    return body
+
+
+def entity_versions(entities: Sequence[CacheEntity]) -> List[int]:
+    """读取实体当前的版本号；启用跨进程失效通道时先追平其他进程的写入"""
+    from app.core.invalidation import get_invalidation_bus
+
+    bus = get_invalidation_bus()
+    if bus is not None:
+        bus.sync()
+    return get_cache_backend().get_versions([entity.value for entity in entities])
+
+
+def cached_response(
+    request: Request,
+    namespace: str,
+    entities: Sequence[CacheEntity],
+    compute: Callable[[], Any],
+    response_model: Any = None,
+    params: Iterable[Any] = (),
+) -> Response:
+    """
+    返回带 ETag 的缓存响应：
+    - If-None-Match 命中时直接返回 304，不做任何计算
+    - 缓存命中时返回已序列化的响应体
+    - 否则调用 compute 计算结果，按 response_model 校验并序列化后写入缓存；
+      未提供 response_model 时 compute 需直接返回符合输出模型的字典，由 orjson 序列化
+    - 同一进程中相同 ETag 的并发未命中只计算一次，其余请求等待并共享结果；
+      若该接口与参数有不超过 CACHE_STALE_SECONDS 秒的旧响应，则不等待，直接返回旧响应（带旧 ETag 与 Age 头）
+    """
+    params = list(params)
+    backend = get_cache_backend()
+    versions = entity_versions(entities)
+    etag = make_etag(namespace, params, versions, backend.epoch())
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    body = backend.get(etag)
+    if body is None:
+        stale_key = (namespace, *map(str, params))
+        stale = _stale.get(stale_key) if _flights.in_flight(etag) else None
+        if stale is not None and stale[2] <= settings.CACHE_STALE_SECONDS:
+            stale_etag, stale_body, age = stale
+            stale_headers = {"ETag": stale_etag, "Cache-Control": "no-cache", "Age": str(int(age))}
+            if etag_matches(if_none_match, stale_etag):
+                return Response(status_code=304, headers=stale_headers)
+            return Response(content=stale_body, media_type="application/json", headers=stale_headers)
+        body, _ = _flights.do(etag, lambda: _compute_body(backend, etag, compute, response_model, stale_key))
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Any
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -11,19 +14,82 @@ class Settings(BaseSettings):
     
     # 数据库配置
     DATABASE_URL: str = "sqlite:///./app/db/database.db"  # 指向 backend/app/db/database.db
+    AUTO_MIGRATE: bool = True  # 应用启动时建表并执行未应用的迁移
+    MIGRATION_BATCH_SIZE: int = 1000  # 回填每批处理的行数，每批一个短事务
+    MIGRATION_BATCH_PAUSE_MS: int = 50  # 回填批次之间的暂停，让在线写请求获得 SQLite 写锁
 
     # 安全配置
     SECRET_KEY: str  # 在 .env 中设置
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14  # 刷新令牌有效期，每次刷新换发的新令牌重新计时
+    TOKEN_VERSION_MAX_AGE_SECONDS: float = 30  # 进程内令牌版本表条目的最长使用时间，超过后按主键重新加载
+    PASSWORD_HASH_CONCURRENCY: int = 0  # 同时进行的密码哈希计算数上限（登录、注册与批量导入共用），0 表示等于 CPU 核数
+    LOGIN_HASH_WAIT_MS: int = 100  # 登录等待密码哈希计算槽位的最长时间，超时直接返回 429；负数表示一直等待
+    LOGIN_ATTEMPT_WINDOW_SECONDS: int = 300  # 登录失败次数的滑动窗口
+    LOGIN_ATTEMPTS_PER_IDENTIFIER: int = 5  # 窗口内同一登录标识（用户名或邮箱）允许的失败次数，0 表示不限制
+    LOGIN_ATTEMPTS_PER_IP: int = 30  # 窗口内同一客户端 IP 允许的失败次数，0 表示不限制
+    LOGIN_RATE_LIMIT_BACKEND: str = "memory"  # memory（进程内）或 sqlite（计数存放在 DATABASE_URL 指向的库，多进程共享）
+    TRUSTED_PROXIES: str = ""  # 受信任的反向代理地址或网段，逗号分隔；来自这些地址的请求按 X-Forwarded-For 取客户端 IP
 
     # 注册密钥配置
     DIRECTOR_REGISTER_KEY: str  # 在 .env 中设置
     MANAGER_REGISTER_KEY: str  # 在 .env 中设置
     USER_REGISTER_KEY: str  # 在 .env 中设置
 
+    # 响应缓存配置
+    CACHE_BACKEND: str = "memory"  # memory（进程内 LRU）或 redis（兼容 Redis 协议的本地服务）
+    CACHE_MAX_ENTRIES: int = 512  # 内存后端最多缓存的响应数量
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_TTL_SECONDS: int = 600  # Redis 后端缓存条目的过期时间
+    CACHE_INVALIDATION_BUS: bool = False  # 多进程部署时通过数据库通知表同步各进程的缓存版本号
+    CACHE_BUS_POLL_MS: int = 0  # 读取缓存前检查失效通知的最小间隔，0 表示每次都检查（写后立即可见）
+    CACHE_STALE_SECONDS: float = 10  # 失效后重新计算期间，并发请求可拿到的旧响应的最长年龄，0 表示一律等待新结果
+
+    # 服务进程配置
+    WEB_CONCURRENCY: int = 0  # 工作进程数，0 表示等于 CPU 核数
+
+    # 排程风险模拟配置
+    SIMULATION_WORKERS: int = 1  # 蒙特卡洛模拟的进程池大小，1 表示在请求线程中计算，0 表示等于 CPU 核数
+
+    # 后台任务配置
+    JOB_WORKERS: int = 1  # 每个服务进程中执行后台任务的线程数，0 表示只入队、不在本进程执行
+    JOB_POLL_MS: int = 1000  # 队列为空时工作线程检查新任务的间隔
+    JOB_SCHEDULE: str = "users.performance@02:00"  # 定时任务，逗号分隔的"任务类型@HH:MM"（本地时间），留空关闭
+    JOB_OUTPUT_DIR: str = "./app/db/job_output"  # 导出任务生成的文件目录
+    JOB_STALE_MINUTES: int = 60  # 运行中的任务超过该时长没有心跳时视为工作进程已退出，标记为失败
+    JOB_RETENTION_DAYS: int = 7  # 已结束任务的保留天数
+
+    # 实时事件推送配置
+    EVENTS_QUEUE_SIZE: int = 100  # 每个订阅者最多积压的事件数，超出后发送 resync
+    EVENTS_HEARTBEAT_SECONDS: int = 15  # 空闲连接的心跳间隔
+    EVENTS_RELAY_POLL_MS: int = 500  # 启用失效通道时检查其他进程所发布事件的间隔
+
+    # SQL 查询统计配置
+    QUERY_STATS_ENABLED: bool = True  # 在响应头中输出每个请求的查询次数与数据库耗时
+    N_PLUS_ONE_THRESHOLD: int = 5  # 同一语句形态在单个请求中重复执行达到该次数时视为疑似 N+1
+
     class Config:
         env_file = "./.env"  # 指向 backend/.env
         env_file_encoding = "utf-8"
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """首次使用时读取 .env 与环境变量并创建配置"""
+    return Settings()
+
+
+class LazySettings:
+    """
+    配置代理：导入时不读取 .env，首次访问属性时才创建 Settings。
+    属性赋值直接写入真实配置（用于命令行参数覆盖与测试）。
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_settings(), name, value)
+
+
+settings = LazySettings()
\ No newline at end of file
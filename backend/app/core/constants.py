@@ -57,6 +57,8 @@ class ErrorMessage:
     USERNAME_EXISTS = "用户名已被注册"
     EMAIL_EXISTS = "邮箱已被注册"
     INVALID_CREDENTIALS = "用户名或密码错误"
+    TOO_MANY_LOGIN_ATTEMPTS = "登录失败次数过多，请稍后再试"
+    LOGIN_BUSY = "登录请求过多，请稍后再试"
     PASSWORDS_NOT_MATCH = "两次输入的密码不一致"
     PASSWORD_TOO_SHORT = "密码需要至少8位"
     INVALID_REGISTER_KEY = "注册密钥无效"
@@ -65,6 +67,14 @@ class ErrorMessage:
     NEW_PASSWORD_SAME_AS_CURRENT = "新密码不能与当前密码相同"
     INVALID_TOKEN_PAYLOAD = "无效的令牌数据"
     COULD_NOT_VALIDATE_CREDENTIALS = "无法验证身份凭证"
+    TOKEN_REVOKED = "访问令牌已失效，请重新登录"
+    INVALID_REFRESH_TOKEN = "刷新令牌无效或已过期"
+    REFRESH_TOKEN_REUSED = "刷新令牌已被使用，该登录会话已注销"
+    PROFILER_BUSY = "已有采样分析任务正在运行"
+    CIRCULAR_DEPENDENCY = "项目依赖存在循环"
+    INVALID_DATE_RANGE = "结束日期不能早于开始日期"
+    JOB_NOT_FOUND = "后台任务不存在"
+    JOB_RESULT_NOT_READY = "后台任务尚未完成或没有可下载的文件"
 
 # 成功信息常量
 class SuccessMessage:
@@ -74,3 +84,51 @@ class SuccessMessage:
     UPDATED_SUCCESSFULLY = "更新成功"
     DELETED_SUCCESSFULLY = "删除成功"
     PASSWORD_CHANGED_SUCCESSFULLY = "密码修改成功"
+
+class CacheEntity(str, Enum):
+    """数据实体枚举：缓存按实体维护版本号，增量同步按实体记录变更"""
+    projects = "projects"
+    tasks = "tasks"
+    users = "users"
+
+class ChangeOperation(str, Enum):
+    """变更日志操作类型枚举"""
+    upsert = "upsert"
+    delete = "delete"
+
+class ExportEntity(str, Enum):
+    """可导出的数据类型枚举"""
+    projects = "projects"
+    tasks = "tasks"
+    progress = "progress"
+
+class DataFormat(str, Enum):
+    """导入导出格式枚举"""
+    ndjson = "ndjson"
+    csv = "csv"
+
+class ImportEntity(str, Enum):
+    """可批量导入的数据类型枚举"""
+    users = "users"
+    projects = "projects"
+    tasks = "tasks"
+    dependencies = "dependencies"
+
+class SimulationDistribution(str, Enum):
+    """蒙特卡洛排程模拟中项目工期倍数的分布"""
+    pert = "pert"
+    triangular = "triangular"
+
+class JobKind(str, Enum):
+    """后台任务类型枚举"""
+    users_performance = "users.performance"  # 全员绩效与优秀员工评定
+    projects_progress = "projects.progress"  # 重新计算项目进度
+    gantt_simulation = "gantt.simulation"  # 排程风险模拟快照
+    export = "export"  # 导出到文件
+
+class JobStatus(str, Enum):
+    """后台任务状态枚举"""
+    pending = "pending"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
@@ -0,0 +1,147 @@
+# 进程内变更事件分发中心，为 SSE 推送提供扇出与背压控制；
+# 多进程部署启用失效通道时，事件另经 app.core.invalidation 的事件通知表转发到其他工作进程
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+from app.core.config import settings
+
+
+def format_sse(event_type: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """将事件编码为 text/event-stream 帧"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+# 订阅者队列溢出后发送的重新同步事件，提示客户端重新拉取全量数据
+RESYNC_FRAME = format_sse("resync", {"reason": "queue_overflow"})
+HEARTBEAT_FRAME = b": keep-alive\n\n"
+
+
+class Subscriber:
+    """
+    单个订阅者的有界队列。
+
+    队列满时丢弃全部积压事件并标记为溢出，消费端随后收到一次 resync 事件，
+    慢客户端不会拖慢发布者，也不会无限占用内存。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int, lock: threading.Lock):
+        self.loop = loop
+        self.max_queue = max_queue
+        self._lock = lock
+        self.queue: Deque[bytes] = deque()
+        self.overflowed = False
+        self.dropped = 0
+        self._wakeup = asyncio.Event()
+        self._waiting = False
+
+    def push(self, frame: bytes) -> None:
+        """由发布者调用（可能在任意线程），调用方需持有分发中心的锁"""
+        if len(self.queue) >= self.max_queue:
+            self.dropped += len(self.queue) + 1
+            self.queue.clear()
+            self.overflowed = True
+        else:
+            self.queue.append(frame)
+        self._wake()
+
+    def resync(self) -> None:
+        """丢弃积压事件，消费端随后收到一次 resync 事件；调用方需持有分发中心的锁"""
+        self.dropped += len(self.queue)
+        self.queue.clear()
+        self.overflowed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        # 只唤醒正在等待的消费者，避免对积压中的订阅者重复调度
+        if self._waiting:
+            self._waiting = False
+            self.loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def next_frame(self, timeout: float) -> bytes:
+        """等待下一帧，超时返回心跳帧"""
+        with self._lock:
+            if self.overflowed:
+                self.overflowed = False
+                return RESYNC_FRAME
+            if self.queue:
+                return self.queue.popleft()
+            self._wakeup.clear()
+            self._waiting = True
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._waiting = False
+            return HEARTBEAT_FRAME
+        return await self.next_frame(timeout)
+
+
+class EventHub:
+    """
+    进程内事件分发中心：写接口发布事件，每个订阅者拥有独立的有界队列。
+    """
+
+    def __init__(self, max_queue: Optional[int] = None):
+        self._max_queue = max_queue
+        self._subscribers: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+
+    @property
+    def max_queue(self) -> int:
+        """未指定时读取配置（在首次订阅时，而不是导入时）"""
+        return self._max_queue or settings.EVENTS_QUEUE_SIZE
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscriber:
+        """在事件循环中创建订阅者"""
+        subscriber = Subscriber(asyncio.get_running_loop(), self.max_queue, self._lock)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def resync(self) -> None:
+        """通知全部订阅者重新拉取全量数据（跨进程转发错过了事件时调用）"""
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.resync()
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        """
+        发布事件，帧只编码一次并在所有订阅者间共享。可在工作线程中调用。
+        """
+        if not self._subscribers:
+            return
+        with self._lock:
+            frame = format_sse(event_type, data, next(self._sequence))
+            for subscriber in self._subscribers:
+                subscriber.push(frame)
+
+
+hub = EventHub()
+
+
+def publish_event(event_type: str, **data: Any) -> None:
+    """发布一条变更事件；启用失效通道时同时写入事件通知表，由其他工作进程转发给各自的订阅者"""
+    from app.core.invalidation import get_event_relay
+
+    hub.publish(event_type, data)
+    relay = get_event_relay()
+    if relay is not None:
+        relay.publish(event_type, data)
@@ -0,0 +1,235 @@
+# 跨进程缓存失效通道：写接口把失效的实体写入 SQLite 通知表，各工作进程在读取缓存前追平。
+# 同一开关下变更事件也经由事件通知表转发，连接在其他工作进程上的 SSE 客户端同样能收到。
+import json
+import logging
+import secrets
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, Text, delete, func, select
+from sqlalchemy.engine import Engine
+
+from app.core.cache import CacheBackend, get_cache_backend
+from app.core.config import settings
+from app.core.constants import CacheEntity
+from app.core.events import EventHub, hub
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+cache_invalidations = Table(
+    "cache_invalidations",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("entity", String(50), nullable=False),
+)
+
+event_notifications = Table(
+    "event_notifications",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("origin", String(32), nullable=False),
+    Column("type", String(100), nullable=False),
+    Column("data", Text, nullable=False),
+)
+
+# 版本号纪元：通知表的行ID不会重新计数，各进程共用库中最新的纪元；重建数据库或部署时换新
+cache_epochs = Table(
+    "cache_epochs",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("epoch", String(32), nullable=False),
+)
+
+
+def current_epoch(connection) -> Optional[str]:
+    return connection.execute(select(cache_epochs.c.epoch).order_by(cache_epochs.c.id.desc()).limit(1)).scalar()
+
+
+def rotate_cache_epoch(engine: Engine) -> str:
+    """生成新的纪元，此前签发的 ETag 全部失效（部署时由主进程调用，响应格式可能已经改变）"""
+    epoch = secrets.token_hex(8)
+    with engine.begin() as connection:
+        cache_epochs.create(connection, checkfirst=True)
+        connection.execute(cache_epochs.insert().values(epoch=epoch))
+    return epoch
+
+
+class InvalidationBus:
+    """
+    基于通知表的失效通道。
+
+    每次失效插入一行，行ID即该实体的新版本号：所有进程对同一实体得到相同的版本号，
+    生成的 ETag 也一致，客户端在不同工作进程之间切换仍能得到 304。
+    读取缓存前按主键范围查询上次之后的新行（poll_interval 内最多一次），写入后立即对其他进程可见。
+    """
+
+    def __init__(self, engine: Engine, backend: CacheBackend, poll_interval: float = 0.0,
+                 retention: int = 10000):
+        self.engine = engine
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._last_poll = 0.0
+        with engine.begin() as connection:
+            cache_invalidations.create(connection, checkfirst=True)
+            cache_epochs.create(connection, checkfirst=True)
+            if current_epoch(connection) is None:
+                connection.execute(cache_epochs.insert().values(epoch=secrets.token_hex(8)))
+            backend.set_epoch(current_epoch(connection))
+            rows = connection.execute(
+                select(cache_invalidations.c.entity, func.max(cache_invalidations.c.id))
+                .group_by(cache_invalidations.c.entity)
+            ).all()
+        self.last_id = max((version for _, version in rows), default=0)
+        self._advance(dict(rows))
+
+    def _advance(self, versions: Dict[str, int]) -> None:
+        for entity, version in versions.items():
+            self.backend.advance_version(entity, version)
+
+    def publish(self, entities: Iterable[CacheEntity]) -> None:
+        """记录实体失效，并清理超出保留行数的旧通知。需要在写操作提交后调用！"""
+        versions = {}
+        with self.engine.begin() as connection:
+            for entity in entities:
+                result = connection.execute(cache_invalidations.insert().values(entity=entity.value))
+                versions[entity.value] = result.inserted_primary_key[0]
+            if any(version % 100 == 0 for version in versions.values()):
+                newest = max(versions.values())
+                connection.execute(delete(cache_invalidations).where(cache_invalidations.c.id <= newest - self.retention))
+        # 只推进本进程的版本号；last_id 由 sync 推进，期间其他进程发布的通知不会被跳过
+        self._advance(versions)
+
+    def sync(self) -> None:
+        """追平其他进程发布的失效通知"""
+        now = time.monotonic()
+        if self.poll_interval and now - self._last_poll < self.poll_interval:
+            return
+        with self._lock:
+            self._last_poll = now
+            with self.engine.connect() as connection:
+                rows = connection.execute(
+                    select(cache_invalidations.c.entity, func.max(cache_invalidations.c.id),
+                           func.min(cache_invalidations.c.id))
+                    .where(cache_invalidations.c.id > self.last_id)
+                    .group_by(cache_invalidations.c.entity)
+                ).all()
+            if not rows:
+                return
+            versions = {entity: newest for entity, newest, _ in rows}
+            newest = max(versions.values())
+            if min(oldest for _, _, oldest in rows) > self.last_id + 1:
+                # 中间的通知已被清理，无法确定错过了哪些实体，全部失效
+                versions = {entity.value: newest for entity in CacheEntity}
+            self._advance(versions)
+            self.last_id = newest
+
+
+_bus: Optional[InvalidationBus] = None
+_bus_lock = threading.Lock()
+
+
+def get_invalidation_bus() -> Optional[InvalidationBus]:
+    """根据配置懒加载失效通道单例，未启用时返回 None。在每个工作进程中首次使用时创建"""
+    global _bus
+    if _bus is None and settings.CACHE_INVALIDATION_BUS:
+        with _bus_lock:
+            if _bus is None:
+                from app.db.session import get_engine
+
+                _bus = InvalidationBus(get_engine(), get_cache_backend(), settings.CACHE_BUS_POLL_MS / 1000)
+    return _bus
+
+
+def set_invalidation_bus(bus: Optional[InvalidationBus]) -> None:
+    """替换失效通道（用于测试）"""
+    global _bus
+    _bus = bus
+
+
+class EventRelay:
+    """
+    基于事件通知表的跨进程事件转发：本进程发布的事件写入通知表，
+    后台线程每 poll_interval 秒按主键范围读取其他进程写入的新行，发布到本进程的分发中心。
+    错过的通知已被清理时无法补发，向本进程全部订阅者发送 resync
+    """
+
+    def __init__(self, engine: Engine, hub: EventHub, poll_interval: float = 0.5, retention: int = 1000):
+        self.engine = engine
+        self.hub = hub
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.origin = secrets.token_hex(8)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        with engine.begin() as connection:
+            event_notifications.create(connection, checkfirst=True)
+            self.last_id = connection.execute(select(func.max(event_notifications.c.id))).scalar() or 0
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        """写入通知表，并清理超出保留行数的旧通知。需要在写操作提交后调用！"""
+        encoded = json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                event_notifications.insert().values(origin=self.origin, type=event_type, data=encoded)
+            )
+            newest = result.inserted_primary_key[0]
+            if newest % 100 == 0:
+                connection.execute(delete(event_notifications).where(event_notifications.c.id <= newest - self.retention))
+
+    def poll(self) -> int:
+        """转发其他进程发布的新事件，返回转发的事件数"""
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(event_notifications).where(event_notifications.c.id > self.last_id)
+                .order_by(event_notifications.c.id)
+            ).all()
+        if not rows:
+            return 0
+        if rows[0].id > self.last_id + 1:
+            self.hub.resync()
+        forwarded = 0
+        for row in rows:
+            if row.origin != self.origin:
+                self.hub.publish(row.type, json.loads(row.data))
+                forwarded += 1
+        self.last_id = rows[-1].id
+        return forwarded
+
+    def _poll_loop(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("转发跨进程事件失败")
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._poll_loop, name="event-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_relay: Optional[EventRelay] = None
+_relay_lock = threading.Lock()
+
+
+def get_event_relay() -> Optional[EventRelay]:
+    """根据配置懒加载事件转发单例并启动轮询线程，未启用失效通道时返回 None"""
+    global _relay
+    if _relay is None and settings.CACHE_INVALIDATION_BUS:
+        with _relay_lock:
+            if _relay is None:
+                from app.db.session import get_engine
+
+                _relay = EventRelay(get_engine(), hub, settings.EVENTS_RELAY_POLL_MS / 1000)
+                _relay.start()
+    return _relay
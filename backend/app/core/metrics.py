@@ -0,0 +1,259 @@
+# Prometheus 文本格式指标：按路由统计延迟直方图、并发请求、线程池饱和度、连接池等待与 bcrypt 排队耗时
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.pool import QueuePool
+from starlette.routing import Mount
+
+# 与 Prometheus 客户端默认值一致的延迟分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# 排队等待通常远小于请求耗时，使用更细的分桶
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    带标签的累积直方图。记录时只做一次二分查找与计数累加，
+    分桶在输出时才累积，保证热路径开销在微秒以内。
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # 每组标签对应 [各分桶计数..., +Inf 计数, 总和]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self, label_values: LabelValues = ()) -> Optional[Dict[str, float]]:
+        """返回某组标签的计数与总和（用于测试与调试）"""
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                return None
+            return {"count": sum(series[:-1]), "sum": series[-1]}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    无标签的瞬时值指标，可增减或设置固定值，也可提供采集时调用的回调函数。
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, collect=None):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+        self._collect = collect
+
+    # 仅在事件循环线程中修改，无需加锁
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: int = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def render(self) -> List[str]:
+        value = self._collect() if self._collect is not None else self.value
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_format_value(value)}",
+        ]
+
+
+class MetricsRegistry:
+    """指标注册表，按注册顺序输出 Prometheus 文本格式"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _threadpool_statistics():
+    """读取 AnyIO 默认线程池（FastAPI 执行同步接口所用）的占用情况，需在事件循环中调用"""
+    from anyio import to_thread
+
+    try:
+        return to_thread.current_default_thread_limiter().statistics()
+    except RuntimeError:  # 不在事件循环中
+        return None
+
+
+def _threadpool_value(attribute: str):
+    def collect():
+        statistics = _threadpool_statistics()
+        return getattr(statistics, attribute) if statistics is not None else 0
+    return collect
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP 请求处理耗时（按路由模板）", ("method", "route", "status"),
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge("http_requests_in_flight", "正在处理的 HTTP 请求数"))
+THREADPOOL_TOTAL = registry.register(Gauge(
+    "threadpool_tokens_total", "执行同步接口的线程池容量", _threadpool_value("total_tokens"),
+))
+THREADPOOL_BORROWED = registry.register(Gauge(
+    "threadpool_tokens_borrowed", "线程池中正在使用的线程数", _threadpool_value("borrowed_tokens"),
+))
+THREADPOOL_WAITING = registry.register(Gauge(
+    "threadpool_tasks_waiting", "等待线程池空闲线程的任务数", _threadpool_value("tasks_waiting"),
+))
+DB_POOL_WAIT = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "从数据库连接池获取连接的等待耗时", buckets=WAIT_BUCKETS,
+))
+BCRYPT_QUEUE_WAIT = registry.register(Histogram(
+    "bcrypt_queue_wait_seconds", "密码哈希排队等待计算槽位的耗时", ("operation",), buckets=WAIT_BUCKETS,
+))
+BCRYPT_DURATION = registry.register(Histogram(
+    "bcrypt_duration_seconds", "密码哈希计算耗时", ("operation",), buckets=WAIT_BUCKETS,
+))
+
+
+class TimedQueuePool(QueuePool):
+    """记录连接获取等待耗时的连接池"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+_route_templates: Optional[Dict[int, str]] = None
+
+
+def collect_route_templates(routes, prefix: str = "") -> Dict[int, str]:
+    """
+    遍历路由表，得到每个路由对象的完整路由模板（path_format 加上所挂载路由器与 Mount 的前缀）。
+    include_router 挂载的路由器由 FastAPI 按需展开，路由对象本身只保存相对路径，因此前缀逐层累加
+    """
+    templates: Dict[int, str] = {}
+    for route in routes:
+        router = getattr(route, "original_router", None)
+        if router is not None:
+            templates.update(collect_route_templates(router.routes, prefix + route.include_context.prefix))
+        elif isinstance(route, Mount):
+            templates.update(collect_route_templates(route.routes, prefix + route.path))
+        elif getattr(route, "path_format", None) is not None:
+            templates.setdefault(id(route), prefix + route.path_format)
+    return templates
+
+
+def route_template(scope) -> str:
+    """
+    返回请求所匹配路由的模板，例如 /api/projects/5 -> /api/projects/{project_id}。
+    模板表在首个请求时从应用的路由表生成一次（路由在启动后不再变化），与请求中的参数值无关；
+    未匹配到路由的请求归为同一标签。
+    """
+    global _route_templates
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    if _route_templates is None:
+        if "app" not in scope:
+            return route.path_format
+        _route_templates = collect_route_templates(scope["app"].routes)
+    return _route_templates.get(id(route), route.path_format)
+
+
+class MetricsMiddleware:
+    """
+    ASGI 中间件：记录并发请求数与按路由模板聚合的请求耗时。
+    使用路由模板（如 /api/projects/{project_id}）而不是实际路径作为标签，避免标签数量失控。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start, scope["method"], route_template(scope), str(status_code),
+            )
+            REQUESTS_IN_FLIGHT.dec()
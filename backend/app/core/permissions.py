@@ -5,7 +5,7 @@ from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.core.constants import UserRole, StatusCode, ErrorMessage
 from app.models.user import User as UserModel
-from app.api.dependencies import get_current_user
+from app.api.dependencies import TokenUser, get_token_user
 
 class PermissionChecker:
     """权限检查类"""
@@ -55,7 +55,7 @@ class PermissionChecker:
         return PermissionChecker.require_roles([UserRole.user, UserRole.manager, UserRole.director])
 
 # 权限依赖项
-def get_director_user(current_user: UserModel = Depends(get_current_user)) -> UserModel:
+def get_director_user(current_user: TokenUser = Depends(get_token_user)) -> TokenUser:
     """获取总监用户"""
     if current_user.role != UserRole.director:
         raise HTTPException(
@@ -64,7 +64,7 @@ def get_director_user(current_user: UserModel = Depends(get_current_user)) -> Us
         )
     return current_user
 
-def get_manager_or_director_user(current_user: UserModel = Depends(get_current_user)) -> UserModel:
+def get_manager_or_director_user(current_user: TokenUser = Depends(get_token_user)) -> TokenUser:
     """获取经理或总监用户"""
     if current_user.role not in [UserRole.manager, UserRole.director]:
         raise HTTPException(
@@ -0,0 +1,222 @@
+# 运行时性能分析：进程内采样分析器（输出折叠栈，兼容火焰图工具）与单请求 cProfile 分析
+import asyncio
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs
+
+# 处于这些函数中的线程视为空闲（等待事件、锁或 IO），默认不计入采样结果
+IDLE_FUNCTIONS = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse_stack(frame) -> tuple:
+    """把调用栈转换为从根到叶的帧标签元组"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FUNCTIONS
+
+
+# 采样任务专用的线程（同一进程同时只有一个采样任务）
+_sampler_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sampling-profiler")
+
+
+class SamplingProfiler:
+    """
+    低开销采样分析器：按固定间隔读取所有线程的当前调用栈（sys._current_frames），
+    不注入任何追踪钩子，被分析的线程几乎不受影响。同一进程同时只允许一个采样任务。
+    """
+
+    _running = threading.Lock()
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+
+    @classmethod
+    def is_running(cls) -> bool:
+        return cls._running.locked()
+
+    def _acquire(self) -> None:
+        if not self._running.acquire(blocking=False):
+            raise RuntimeError("sampling profiler is already running")
+
+    def run(self, duration: float) -> Counter:
+        """在当前线程中采样 duration 秒，返回折叠栈计数。已有采样任务时抛出 RuntimeError"""
+        self._acquire()
+        try:
+            return self._sample(duration)
+        finally:
+            self._running.release()
+
+    async def run_async(self, duration: float) -> Counter:
+        """
+        在专用的采样线程中采样，不占用请求线程池（采样最长一分钟，占用会拖慢被观察的同步接口）。
+        已有采样任务时立即抛出 RuntimeError，而不是排队等待
+        """
+        self._acquire()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_sampler_executor, self._sample, duration)
+        finally:
+            self._running.release()
+
+    def _sample(self, duration: float) -> Counter:
+        own_thread = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                if not self.include_idle and _is_idle(frame):
+                    continue
+                thread_name = names.get(thread_id) or f"thread-{thread_id}"
+                self.samples[(thread_name,) + _collapse_stack(frame)] += 1
+            self.sample_count += 1
+            time.sleep(self.interval)
+        return self.samples
+
+    def render_collapsed(self) -> str:
+        """输出折叠栈格式（每行“帧;帧;帧 次数”），可直接交给 flamegraph.pl 或 speedscope"""
+        lines = [";".join(stack) + f" {count}" for stack, count in self.samples.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+class RequestProfile:
+    """单个请求的 cProfile 分析状态：由中间件创建，鉴权通过后才真正启用"""
+
+    def __init__(self):
+        self.authorized = False
+        self.profiler: Optional[cProfile.Profile] = None
+        self.elapsed = 0.0
+
+    def summary(self, limit: int = 40) -> str:
+        stream = io.StringIO()
+        stream.write(f"# request profile: {self.elapsed * 1000:.2f} ms in endpoint\n")
+        if self.profiler is not None:
+            stats = pstats.Stats(self.profiler, stream=stream)
+            stats.strip_dirs().sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+_request_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def get_request_profile() -> Optional[RequestProfile]:
+    return _request_profile.get()
+
+
+def profile_endpoint(endpoint: Callable) -> Callable:
+    """
+    包装接口函数：当前请求开启了分析且已鉴权时，在执行接口函数的线程中用 cProfile 运行。
+    同步接口在线程池中执行，上下文变量会随之复制，因此同样可以分析。
+    """
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            profile = _request_profile.get()
+            if profile is None or not profile.authorized:
+                return await endpoint(*args, **kwargs)
+            profile.profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profile.profiler.enable()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profile.profiler.disable()
+                profile.elapsed = time.perf_counter() - start
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        profile = _request_profile.get()
+        if profile is None or not profile.authorized:
+            return endpoint(*args, **kwargs)
+        profile.profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            return profile.profiler.runcall(endpoint, *args, **kwargs)
+        finally:
+            profile.elapsed = time.perf_counter() - start
+    return wrapper
+
+
+def _wants_profile(scope) -> bool:
+    query = scope.get("query_string", b"")
+    if b"profile=" not in query:
+        return False
+    values = parse_qs(query.decode("latin-1")).get("profile", [])
+    return bool(values) and values[-1] in ("1", "true")
+
+
+class RequestProfileMiddleware:
+    """
+    ASGI 中间件：请求带 ?profile=1 时为其创建分析状态。
+    接口执行后若分析已启用，丢弃原响应体，改为返回 cProfile 摘要（text/plain），
+    原状态码通过 X-Original-Status 响应头返回。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _request_profile.set(profile)
+        original_status: Dict[str, int] = {}
+
+        async def send_or_capture(message):
+            if profile.profiler is None:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                original_status["status"] = message["status"]
+
+        try:
+            await self.app(scope, receive, send_or_capture)
+        finally:
+            _request_profile.reset(token)
+
+        if profile.profiler is not None:
+            body = profile.summary().encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-original-status", str(original_status.get("status", 500)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
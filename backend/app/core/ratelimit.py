@@ -0,0 +1,242 @@
+# 登录失败次数限制：按登录标识与客户端 IP 分别计数的滑动窗口限流器，在校验密码之前判断，
+# 超出次数的请求直接返回 429，不再消耗 bcrypt 计算。
+#
+# 滑动窗口用“两个固定窗口加权”近似：当前窗口的次数加上前一窗口次数乘以其仍在滑动窗口内的比例。
+# 每个键只保存窗口序号与两个计数，内存与键数成正比；多进程部署时可改用 SQLite 表共享计数。
+#
+# 部署在反向代理之后时，连接的对端地址是代理而不是客户端，所有请求会共用同一个 IP 计数：
+# 在 TRUSTED_PROXIES 中列出代理的地址，客户端 IP 改从 X-Forwarded-For 中取最后一个不受信任的地址。
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+
+from fastapi import Request
+from sqlalchemy import Column, Integer, MetaData, PrimaryKeyConstraint, String, Table, delete, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+metadata = MetaData()
+
+login_attempts = Table(
+    "login_attempts",
+    metadata,
+    Column("key", String(320), nullable=False),
+    Column("window", Integer, nullable=False),
+    Column("count", Integer, nullable=False),
+    PrimaryKeyConstraint("key", "window"),
+)
+
+
+def weighted_count(previous: int, current: int, elapsed: float, window: float) -> float:
+    """滑动窗口内的近似次数：elapsed 为当前固定窗口已经过去的秒数"""
+    return previous * (1 - elapsed / window) + current
+
+
+def retry_after(previous: int, current: int, elapsed: float, window: float, limit: int) -> float:
+    """次数已达上限时还需等待的秒数：前一窗口的计数随时间线性滑出，当前窗口的计数要等到下一窗口才开始滑出"""
+    if current >= limit:
+        # 到下一窗口时当前计数成为“前一窗口”，需再等到其滑出足够的比例
+        return window - elapsed + window * (1 - limit / current) + 0.001
+    # previous * (1 - t / window) + current < limit  =>  t > window * (1 - (limit - current) / previous)
+    return window * (1 - (limit - current) / previous) - elapsed + 0.001
+
+
+class RateLimiter:
+    """限流器接口：limit 为 0 表示不限制"""
+
+    def retry_after(self, key: str, limit: int, window: float) -> float:
+        """key 的次数已达上限时返回需等待的秒数，否则返回 0"""
+        raise NotImplementedError
+
+    def record(self, key: str, window: float) -> None:
+        """记录一次失败"""
+        raise NotImplementedError
+
+    def reset(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryRateLimiter(RateLimiter):
+    """进程内限流器，最多跟踪 max_keys 个键，按最久未使用淘汰（被淘汰的键计数归零）"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, List[int]]" = OrderedDict()  # 键 → [窗口序号, 前一窗口次数, 当前窗口次数]
+        self._lock = threading.Lock()
+
+    def _counts(self, key: str, window: float, now: float) -> Tuple[int, int, float]:
+        index, elapsed = divmod(now, window)
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0, 0, elapsed
+        if entry[0] == index:
+            return entry[1], entry[2], elapsed
+        return (entry[2] if entry[0] == index - 1 else 0), 0, elapsed
+
+    def retry_after(self, key: str, limit: int, window: float) -> float:
+        if not limit:
+            return 0.0
+        with self._lock:
+            previous, current, elapsed = self._counts(key, window, time.time())
+        if weighted_count(previous, current, elapsed, window) < limit:
+            return 0.0
+        return retry_after(previous, current, elapsed, window, limit)
+
+    def record(self, key: str, window: float) -> None:
+        now = time.time()
+        with self._lock:
+            previous, current, _ = self._counts(key, window, now)
+            self._entries[key] = [int(now // window), previous, current + 1]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """
+    计数存放在 login_attempts 表中，同一数据库上的多个工作进程共享。
+    每个键每个窗口一行，读取是主键范围查询；早于前一窗口的行在写入时顺带清理
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._purged_window: Optional[int] = None
+        with engine.begin() as connection:
+            login_attempts.create(connection, checkfirst=True)
+
+    def _counts(self, connection, key: str, index: int) -> Dict[int, int]:
+        rows = connection.execute(
+            select(login_attempts.c.window, login_attempts.c.count)
+            .where(login_attempts.c.key == key, login_attempts.c.window >= index - 1)
+        )
+        return dict(rows.all())
+
+    def retry_after(self, key: str, limit: int, window: float) -> float:
+        if not limit:
+            return 0.0
+        index, elapsed = divmod(time.time(), window)
+        with self.engine.connect() as connection:
+            counts = self._counts(connection, key, int(index))
+        previous, current = counts.get(int(index) - 1, 0), counts.get(int(index), 0)
+        if weighted_count(previous, current, elapsed, window) < limit:
+            return 0.0
+        return retry_after(previous, current, elapsed, window, limit)
+
+    def record(self, key: str, window: float) -> None:
+        index = int(time.time() // window)
+        statement = insert(login_attempts).values(key=key, window=index, count=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=["key", "window"], set_={"count": login_attempts.c.count + 1},
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement)
+            if self._purged_window != index:
+                connection.execute(delete(login_attempts).where(login_attempts.c.window < index - 1))
+                self._purged_window = index
+
+    def reset(self, key: str) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(delete(login_attempts).where(login_attempts.c.key == key))
+
+    def clear(self) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(delete(login_attempts))
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_login_limiter() -> RateLimiter:
+    """根据配置懒加载登录限流器单例"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                if settings.LOGIN_RATE_LIMIT_BACKEND == "sqlite":
+                    from app.db.session import get_engine
+
+                    _limiter = SQLiteRateLimiter(get_engine())
+                else:
+                    _limiter = MemoryRateLimiter()
+    return _limiter
+
+
+def set_login_limiter(limiter: Optional[RateLimiter]) -> None:
+    """替换登录限流器（用于测试或自定义部署）"""
+    global _limiter
+    _limiter = limiter
+
+
+@lru_cache(maxsize=8)
+def _trusted_networks(spec: str) -> Tuple[Network, ...]:
+    """解析 TRUSTED_PROXIES："10.0.0.1,172.16.0.0/12"，格式错误时抛出 ValueError"""
+    return tuple(ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip())
+
+
+def _is_trusted(address: str, networks: Tuple[Network, ...]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def resolve_client_ip(request: Request) -> Optional[str]:
+    """
+    计数用的客户端 IP：连接对端是 TRUSTED_PROXIES 中的代理时，从 X-Forwarded-For 由右向左跳过受信任的代理，
+    取第一个不受信任的地址（更左侧的值由客户端自行填写，不可信）；否则为连接对端地址
+    """
+    peer = request.client.host if request.client else None
+    networks = _trusted_networks(settings.TRUSTED_PROXIES)
+    if peer is None or not networks or not _is_trusted(peer, networks):
+        return peer
+    forwarded = [part.strip() for header in request.headers.getlist("x-forwarded-for")
+                 for part in header.split(",") if part.strip()]
+    for address in reversed(forwarded):
+        if not _is_trusted(address, networks):
+            return address
+    return forwarded[0] if forwarded else peer
+
+
+def check_login_attempts(identifier: str, client_ip: Optional[str]) -> Optional[int]:
+    """登录标识或客户端 IP 的失败次数已达上限时返回需等待的整秒数，否则返回 None"""
+    limiter = get_login_limiter()
+    window = settings.LOGIN_ATTEMPT_WINDOW_SECONDS
+    wait = max(
+        limiter.retry_after(f"id:{identifier.lower()}", settings.LOGIN_ATTEMPTS_PER_IDENTIFIER, window),
+        limiter.retry_after(f"ip:{client_ip}", settings.LOGIN_ATTEMPTS_PER_IP, window) if client_ip else 0.0,
+    )
+    return math.ceil(wait) if wait > 0 else None
+
+
+def record_login_failure(identifier: str, client_ip: Optional[str]) -> None:
+    limiter = get_login_limiter()
+    window = settings.LOGIN_ATTEMPT_WINDOW_SECONDS
+    limiter.record(f"id:{identifier.lower()}", window)
+    if client_ip:
+        limiter.record(f"ip:{client_ip}", window)
+
+
+def record_login_success(identifier: str) -> None:
+    """登录成功后清零该登录标识的失败次数（IP 的计数保留）"""
+    get_login_limiter().reset(f"id:{identifier.lower()}")
@@ -0,0 +1,13 @@
+# 基于 orjson 的 JSON 响应类
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+class ORJSONResponse(JSONResponse):
+    """
+    使用 orjson 序列化的 JSON 响应，原生支持 datetime、date、Enum 与非字符串键。
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -1,31 +1,99 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
 from typing import Optional, Dict
 from fastapi import HTTPException, status
 from app.core.config import settings
-from app.core.constants import ErrorMessage
+from app.core.constants import ErrorMessage, UserRole
+from app.core.metrics import BCRYPT_DURATION, BCRYPT_QUEUE_WAIT
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib 与 bcrypt 导入较慢，首次计算哈希时才加载
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+MIN_PASSWORD_LENGTH = 8  # 注册与批量导入共用的密码最短长度
+
+def hash_concurrency() -> int:
+    """同时进行的密码哈希计算数上限，登录、注册与批量导入共用"""
+    return settings.PASSWORD_HASH_CONCURRENCY or os.cpu_count() or 1
+
+# bcrypt 为 CPU 密集计算，并发数超过核数只会互相抢占，超出部分在此排队并记录等待耗时
+@lru_cache(maxsize=None)
+def _hash_slots() -> threading.BoundedSemaphore:
+    return threading.BoundedSemaphore(hash_concurrency())
+
+class PasswordHashBusy(Exception):
+    """限定时间内没有空闲的密码哈希计算槽位"""
+
+_reserved = threading.local()
+
+@contextmanager
+def reserve_hash_slot(operation: str, timeout: Optional[float] = None):
+    """
+    占用一个密码哈希计算槽位并记录排队耗时；timeout 秒内未获取到时抛出 PasswordHashBusy。
+    登录在查询用户之前先占用槽位（准入控制），饱和时不做任何查询即可拒绝；
+    同一线程在其中计算哈希时不再重复获取槽位
+    """
+    if getattr(_reserved, "held", False):
+        yield
+        return
+    start = time.perf_counter()
+    slots = _hash_slots()
+    acquired = slots.acquire(timeout=timeout)
+    BCRYPT_QUEUE_WAIT.observe(time.perf_counter() - start, operation)
+    if not acquired:
+        raise PasswordHashBusy(operation)
+    _reserved.held = True
+    try:
+        yield
+    finally:
+        _reserved.held = False
+        slots.release()
+
+@contextmanager
+def _hash_slot(operation: str):
+    """在哈希计算槽位中执行，记录计算耗时"""
+    with reserve_hash_slot(operation):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            BCRYPT_DURATION.observe(time.perf_counter() - start, operation)
 
 def get_password_hash(password: str) -> str:
     """对明文密码进行加密"""
-    return pwd_context.hash(password)
+    with _hash_slot("hash"):
+        return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """校验明文密码与加密密码是否一致"""
-    return pwd_context.verify(plain_password, hashed_password)
+    with _hash_slot("verify"):
+        return get_pwd_context().verify(plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """生成 JWT 访问令牌"""
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def create_user_access_token(user_id: int, role: UserRole, token_version: int) -> str:
+    """生成携带角色与令牌版本号的访问令牌，只需身份与角色的接口据此鉴权，不必查询用户表"""
+    return create_access_token(data={"sub": str(user_id), "role": UserRole(role).value, "ver": token_version})
+
 def decode_access_token(token: str) -> Dict:
     """解码 JWT 令牌，失败时抛出异常"""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         if "sub" not in payload:
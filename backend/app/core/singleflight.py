@@ -0,0 +1,56 @@
+# 单飞（single-flight）请求合并：相同键的并发调用只执行一次计算，其余调用等待并共享同一结果
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Flight:
+    """一次进行中的计算：完成后唤醒全部等待者"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    进程内的单飞组。同步接口运行在线程池中，并发的相同请求各占一个线程：
+    第一个调用者（leader）执行 fn，之后到达的调用者阻塞等待，得到同一个结果或同一个异常。
+    计算结束即移除，之后的调用重新执行（结果的复用交给调用方的缓存）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def __len__(self) -> int:
+        """进行中的计算数"""
+        return len(self._flights)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """执行或加入 key 对应的计算，返回 (结果, 是否共享了其他调用者的计算)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        try:
+            flight.result = fn()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
@@ -1,9 +1,12 @@
-from app.db.session import engine
-from app.db.base import Base
+from app.db.session import get_engine
+from app.db.migrations import upgrade_database
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    # create_all 不会修改已有的表，索引、新列等结构变更通过迁移补齐
+    applied = upgrade_database(get_engine())
     print("数据库表已初始化。")
+    if applied:
+        print("已应用迁移：" + ", ".join(applied))
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_db()
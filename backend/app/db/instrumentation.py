@@ -0,0 +1,153 @@
+# SQL 查询统计：按请求统计查询次数与数据库耗时，识别疑似 N+1 查询
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))*\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    将 SQL 归一化为语句形态：折叠空白、数字字面量与展开后的 IN 列表，
+    仅参数不同的语句得到相同形态。
+    """
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _IN_LIST.sub("(?)", shape)
+    return _NUMBER.sub("N", shape)
+
+
+class QueryStats:
+    """
+    单个统计范围（通常是一次请求）内的查询次数、数据库耗时与语句形态计数。
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.shapes[normalize_statement(statement)] += 1
+
+    @property
+    def total_time_ms(self) -> float:
+        return self.total_time * 1000
+
+    def repeated_statements(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """返回重复次数达到阈值的语句形态（疑似 N+1），按次数降序"""
+        threshold = threshold or settings.N_PLUS_ONE_THRESHOLD
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# 每个请求结束后的回调，参数为 (方法, 路径, 统计结果)，供测试插件等观察者使用
+request_observers: List[Callable[[str, str, QueryStats], None]] = []
+
+
+def get_current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    在当前上下文中统计查询。FastAPI 在线程池中执行同步接口时会复制上下文，
+    统计对象在请求内共享。
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+def _handle_error(context):
+    """语句执行失败时不会触发 after_cursor_execute，需弹出对应的开始时间，否则之后的查询耗时全部错位"""
+    starts = context.connection.info.get("query_start_time") if context.connection is not None else None
+    if context.execution_context is None or not starts:
+        return  # 创建执行上下文时就失败，before_cursor_execute 没有触发
+    start = starts.pop()
+    stats = _current_stats.get()
+    if stats is not None and context.statement is not None:
+        stats.record(context.statement, time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """为引擎注册查询统计监听器，重复调用不会重复注册"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI 中间件：为每个 HTTP 请求开启查询统计，在响应头中输出
+    X-DB-Query-Count 与 X-DB-Time-Ms，发现疑似 N+1 时追加 X-DB-N-Plus-One 并记录警告日志。
+
+    响应头在 http.response.start 时写入；流式响应在开始发送后执行的查询只计入日志与观察者。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # 配置在首次请求时读取，应用导入时不创建 Settings
+        if scope["type"] != "http" or not settings.QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.count).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.total_time_ms:.2f}".encode()))
+                    repeated = stats.repeated_statements()
+                    if repeated:
+                        headers.append((b"x-db-n-plus-one", str(len(repeated)).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                self._report(scope, stats)
+
+    @staticmethod
+    def _report(scope, stats: QueryStats) -> None:
+        method, path = scope.get("method", ""), scope.get("path", "")
+        logger.debug("%s %s: %d queries, %.2f ms", method, path, stats.count, stats.total_time_ms)
+        for shape, n in stats.repeated_statements():
+            logger.warning("疑似 N+1 查询 %s %s: 同一语句执行 %d 次: %s", method, path, n, shape)
+        for observer in list(request_observers):
+            observer(method, path, stats)
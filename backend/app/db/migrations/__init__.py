@@ -0,0 +1,12 @@
+# 数据库迁移：版本化的结构变更与在线分批回填，命令行入口见 __main__.py
+from app.db.migrations.runner import (
+    Migration,
+    applied_migrations,
+    load_migrations,
+    migration_lock,
+    migration_status,
+    run_migrations,
+    schema_migrations,
+    upgrade_database,
+)
+from app.db.migrations.backfill import BackfillResult, backfill_checkpoints, run_backfill, update_in_batches
@@ -0,0 +1,49 @@
+# 迁移命令行：python -m app.db.migrations status|upgrade
+import argparse
+import sys
+
+from sqlalchemy import create_engine, select
+
+from app.core.config import settings
+from app.db.migrations.backfill import backfill_checkpoints
+from app.db.migrations.runner import migration_status, upgrade_database
+
+
+def print_status(engine) -> None:
+    for item in migration_status(engine):
+        state = item["applied_at"].strftime("%Y-%m-%d %H:%M:%S") if item["applied_at"] else "未应用"
+        print(f"{item['id']:<40} {state:<20} {item['description']}")
+    with engine.begin() as connection:
+        backfill_checkpoints.create(connection, checkfirst=True)
+        checkpoints = connection.execute(select(backfill_checkpoints).order_by(backfill_checkpoints.c.name)).all()
+    for checkpoint in checkpoints:
+        state = "已完成" if checkpoint.completed_at else f"进行中（last_key={checkpoint.last_key}）"
+        print(f"回填 {checkpoint.name:<35} {checkpoint.rows_done:>10} 行  {state}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.db.migrations", description="数据库迁移")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="列出迁移与回填进度")
+    upgrade = subparsers.add_parser("upgrade", help="建表并执行未应用的迁移，回填中断后再次执行会从断点继续")
+    upgrade.add_argument("--batch-size", type=int, default=settings.MIGRATION_BATCH_SIZE)
+    upgrade.add_argument("--pause-ms", type=int, default=settings.MIGRATION_BATCH_PAUSE_MS)
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    try:
+        if args.command == "upgrade":
+            settings.MIGRATION_BATCH_SIZE = args.batch_size
+            settings.MIGRATION_BATCH_PAUSE_MS = args.pause_ms
+            applied = upgrade_database(engine)
+            print("已应用迁移：" + ", ".join(applied) if applied else "没有待应用的迁移")
+        else:
+            print_status(engine)
+    finally:
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# 在线回填：按主键分块、每块一个短事务，并把进度写入检查点表，中断后可从断点继续
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Union
+
+from sqlalchemy import Column, DateTime, Integer, String, Table, select, update
+from sqlalchemy.engine import Connection, Engine, Row
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.db.migrations.runner import metadata
+
+backfill_checkpoints = Table(
+    "backfill_checkpoints",
+    metadata,
+    Column("name", String(100), primary_key=True),
+    Column("last_key", Integer, nullable=False, default=0),
+    Column("rows_done", Integer, nullable=False, default=0),
+    Column("completed_at", DateTime, nullable=True),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+
+class BackfillResult(NamedTuple):
+    name: str
+    batches: int
+    rows: int
+    completed: bool
+
+
+def get_checkpoint(connection: Connection, name: str) -> Optional[Row]:
+    return connection.execute(select(backfill_checkpoints).where(backfill_checkpoints.c.name == name)).first()
+
+
+def _save_checkpoint(connection: Connection, name: str, last_key: int, rows_done: int,
+                     completed: bool = False) -> None:
+    now = datetime.utcnow()
+    values = {"last_key": last_key, "rows_done": rows_done, "updated_at": now,
+              "completed_at": now if completed else None}
+    result = connection.execute(
+        update(backfill_checkpoints).where(backfill_checkpoints.c.name == name).values(**values)
+    )
+    if result.rowcount == 0:
+        connection.execute(backfill_checkpoints.insert().values(name=name, **values))
+
+
+def run_backfill(
+    engine: Engine,
+    name: str,
+    key: Column,
+    process_batch: Callable[[Connection, Sequence[Row]], None],
+    columns: Sequence[ColumnElement] = (),
+    where: Optional[ColumnElement] = None,
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+    max_batches: Optional[int] = None,
+) -> BackfillResult:
+    """
+    按 key（整数主键）升序分块处理 key 大于检查点的行。
+
+    每块在一个事务中完成：读取至多 batch_size 行、调用 process_batch 写入、更新检查点，
+    事务很短，SQLite 的写锁只被占用很短时间；块之间暂停 pause 秒，让在线写请求有机会获得写锁。
+    进程中断后再次调用会从检查点继续，已完成的回填再次调用直接返回。
+    max_batches 用于限制单次调用处理的块数（测试或分多次执行时使用）。
+    """
+    batch_size = batch_size or settings.MIGRATION_BATCH_SIZE
+    pause = settings.MIGRATION_BATCH_PAUSE_MS / 1000 if pause is None else pause
+    with engine.begin() as connection:
+        backfill_checkpoints.create(connection, checkfirst=True)
+        checkpoint = get_checkpoint(connection, name)
+    if checkpoint is not None and checkpoint.completed_at is not None:
+        return BackfillResult(name, 0, 0, True)
+
+    last_key = checkpoint.last_key if checkpoint else 0
+    rows_done = checkpoint.rows_done if checkpoint else 0
+    batches = rows = 0
+    while max_batches is None or batches < max_batches:
+        with engine.begin() as connection:
+            statement = select(key, *columns).where(key > last_key).order_by(key).limit(batch_size)
+            if where is not None:
+                statement = statement.where(where)
+            chunk = connection.execute(statement).all()
+            if not chunk:
+                _save_checkpoint(connection, name, last_key, rows_done, completed=True)
+                return BackfillResult(name, batches, rows, True)
+            process_batch(connection, chunk)
+            last_key = chunk[-1][0]
+            rows_done += len(chunk)
+            _save_checkpoint(connection, name, last_key, rows_done)
+        batches += 1
+        rows += len(chunk)
+        if pause:
+            time.sleep(pause)
+    return BackfillResult(name, batches, rows, False)
+
+
+def update_in_batches(
+    engine: Engine,
+    name: str,
+    table: Table,
+    values: Union[Mapping[str, Any], Callable[[Row], Dict[str, Any]]],
+    where: Optional[ColumnElement] = None,
+    **kwargs: Any,
+) -> BackfillResult:
+    """
+    分批执行 UPDATE table SET values WHERE where。values 可以是固定的列值（可包含 SQL 表达式），
+    也可以是按行计算列值的函数（此时逐行更新，适合无法用单条 SQL 表达的回填）。
+    """
+    key = table.primary_key.columns.values()[0]
+
+    def process_batch(connection: Connection, chunk: Sequence[Row]) -> None:
+        if callable(values):
+            for row in chunk:
+                connection.execute(update(table).where(key == row[0]).values(**values(row)))
+        else:
+            first, last = chunk[0][0], chunk[-1][0]
+            statement = update(table).where(key >= first, key <= last).values(**values)
+            if where is not None:
+                statement = statement.where(where)
+            connection.execute(statement)
+
+    columns: List[ColumnElement] = list(table.columns) if callable(values) else []
+    return run_backfill(engine, name, key, process_batch, columns=columns, where=where, **kwargs)
@@ -0,0 +1,153 @@
+# 迁移执行器：按版本顺序执行尚未应用的迁移，并在 schema_migrations 表中记录。
+# 多个进程同时启动（uvicorn --workers、gunicorn 且开启 AUTO_MIGRATE）时由 schema_migration_lock 表中的锁行串行化，
+# 后获得锁的进程重新读取已应用的迁移，不会与先行者并发执行“检查后再变更”的结构修改。
+import importlib
+import os
+import pkgutil
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, delete, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateTable
+
+import app.models  # noqa: F401  注册全部模型，create_all 才能建出所有表
+from app.db.base import Base
+from app.db.migrations import versions
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("id", String(100), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+schema_migration_lock = Table(
+    "schema_migration_lock",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("holder", String(100), nullable=False),
+    Column("acquired_at", DateTime, nullable=False),
+)
+
+LOCK_POLL_INTERVAL = 0.2  # 等待其他进程释放迁移锁的轮询间隔（秒）
+LOCK_STALE_AFTER = timedelta(minutes=30)  # 持有者超过该时长没有续期时视为已退出，锁可被接管
+
+
+class Migration(NamedTuple):
+    """
+    单个迁移：upgrade 在一个事务中完成结构变更，backfill（可选）在事务外分批回填数据。
+    两者都必须幂等：新库由 create_all 建好后仍会执行一遍，多个进程同时启动时也可能并发执行。
+    """
+    id: str
+    description: str
+    upgrade: Callable[[Connection], None]
+    backfill: Optional[Callable[[Engine], None]] = None
+
+
+def load_migrations() -> List[Migration]:
+    """按模块名顺序加载 versions 包中的迁移，模块需定义 ID 与 upgrade，可选定义 backfill"""
+    migrations = []
+    for info in sorted(pkgutil.iter_modules(versions.__path__), key=lambda info: info.name):
+        module = importlib.import_module(f"{versions.__name__}.{info.name}")
+        description = (module.__doc__ or "").strip().splitlines()[0] if module.__doc__ else ""
+        migrations.append(Migration(module.ID, description, module.upgrade, getattr(module, "backfill", None)))
+    return migrations
+
+
+def applied_migrations(engine: Engine) -> Dict[str, datetime]:
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        return dict(connection.execute(select(schema_migrations.c.id, schema_migrations.c.applied_at)).all())
+
+
+@contextmanager
+def migration_lock(engine: Engine) -> Iterator[Callable[[], None]]:
+    """
+    获取跨进程的迁移锁（插入 id=1 的锁行，主键冲突表示其他进程持有），返回续期函数。
+    锁表用 CREATE TABLE IF NOT EXISTS 创建，并发创建也不会失败；持有者异常退出后锁在 LOCK_STALE_AFTER 后可被接管
+    """
+    holder = f"{os.getpid()}@{time.time()}"
+    with engine.begin() as connection:
+        connection.execute(CreateTable(schema_migration_lock, if_not_exists=True))
+    while True:
+        try:
+            with engine.begin() as connection:
+                connection.execute(schema_migration_lock.insert().values(
+                    id=1, holder=holder, acquired_at=datetime.utcnow()))
+            break
+        except IntegrityError:
+            with engine.begin() as connection:
+                connection.execute(delete(schema_migration_lock).where(
+                    schema_migration_lock.c.acquired_at < datetime.utcnow() - LOCK_STALE_AFTER))
+            time.sleep(LOCK_POLL_INTERVAL)
+
+    def renew() -> None:
+        with engine.begin() as connection:
+            connection.execute(update(schema_migration_lock).where(schema_migration_lock.c.holder == holder)
+                               .values(acquired_at=datetime.utcnow()))
+
+    try:
+        yield renew
+    finally:
+        with engine.begin() as connection:
+            connection.execute(delete(schema_migration_lock).where(schema_migration_lock.c.holder == holder))
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """
+    执行所有未应用的迁移，返回本次应用的迁移ID。
+    结构变更各自一个事务；回填分批执行，全部完成后才记录为已应用，中断后重新执行会从断点继续。
+    整个过程持有迁移锁，多个进程同时执行时依次进行
+    """
+    with migration_lock(engine) as renew:
+        return _run_migrations(engine, renew)
+
+
+def _run_migrations(engine: Engine, renew: Callable[[], None]) -> List[str]:
+    done = applied_migrations(engine)
+    applied = []
+    for item in load_migrations():
+        if item.id in done:
+            continue
+        renew()
+        try:
+            if item.backfill is None:
+                with engine.begin() as connection:
+                    item.upgrade(connection)
+                    _record(connection, item.id)
+            else:
+                with engine.begin() as connection:
+                    item.upgrade(connection)
+                item.backfill(engine)
+                with engine.begin() as connection:
+                    _record(connection, item.id)
+        except IntegrityError:
+            continue  # 其他进程已完成同一迁移
+        applied.append(item.id)
+    return applied
+
+
+def _record(connection: Connection, migration_id: str) -> None:
+    connection.execute(schema_migrations.insert().values(id=migration_id, applied_at=datetime.utcnow()))
+
+
+def upgrade_database(engine: Engine) -> List[str]:
+    """在迁移锁内创建缺失的表并执行迁移（create_all 不会修改已有的表）"""
+    with migration_lock(engine) as renew:
+        Base.metadata.create_all(bind=engine)
+        return _run_migrations(engine, renew)
+
+
+def migration_status(engine: Engine) -> List[dict]:
+    """返回每个迁移的应用状态"""
+    done = applied_migrations(engine)
+    return [
+        {"id": item.id, "description": item.description, "applied_at": done.get(item.id)}
+        for item in load_migrations()
+    ]
@@ -0,0 +1 @@
+# 迁移版本：每个模块一个迁移，按模块名顺序执行（m0001_xxx、m0002_xxx ...）
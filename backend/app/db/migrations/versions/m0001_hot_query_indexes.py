@@ -0,0 +1,23 @@
+"""为热点查询添加复合索引，移除被复合索引前缀覆盖的单列索引"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+ID = "0001_hot_query_indexes"
+
+# 索引定义按本迁移编写时固定下来，不读取模型：模型上之后新增的索引可能依赖更晚的迁移才加上的列
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_users_role ON users (role)",
+    "CREATE INDEX IF NOT EXISTS ix_users_outstanding ON users (outstanding) WHERE outstanding = 1",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_project_id_finished ON tasks (project_id, finished)",
+    "CREATE INDEX IF NOT EXISTS ix_project_progress_project_id_date ON project_progress (project_id, date)",
+    "CREATE INDEX IF NOT EXISTS ix_project_dependencies_depends_on_id ON project_dependencies (depends_on_id)",
+]
+
+
+def upgrade(connection: Connection) -> None:
+    for statement in INDEXES:
+        connection.execute(text(statement))
+    connection.execute(text("DROP INDEX IF EXISTS ix_tasks_project_id"))
+    connection.execute(text("DROP INDEX IF EXISTS ix_project_progress_project_id"))
+    # 更新统计信息，让查询规划器在低基数列（如 role、outstanding）上做出正确选择
+    connection.execute(text("ANALYZE"))
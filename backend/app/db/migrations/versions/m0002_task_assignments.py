@@ -0,0 +1,56 @@
+"""新增 task_assignments 关联表与任务参与人数，并从 users.task_id 回填分配关系"""
+from sqlalchemy import Column, Integer, MetaData, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.migrations.backfill import run_backfill, update_in_batches
+
+ID = "0002_task_assignments"
+
+# 表结构按本迁移编写时固定下来，不读取模型；回填只用到下面声明的列
+metadata = MetaData()
+users = Table("users", metadata, Column("id", Integer, primary_key=True), Column("task_id", Integer))
+tasks = Table("tasks", metadata, Column("id", Integer, primary_key=True), Column("participant_count", Integer))
+task_assignments = Table(
+    "task_assignments", metadata,
+    Column("task_id", Integer, primary_key=True), Column("user_id", Integer, primary_key=True),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS task_assignments ("
+        "task_id INTEGER NOT NULL, user_id INTEGER NOT NULL, PRIMARY KEY (task_id, user_id), "
+        "FOREIGN KEY(task_id) REFERENCES tasks (id), FOREIGN KEY(user_id) REFERENCES users (id))"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_task_assignments_user_id_task_id ON task_assignments (user_id, task_id)"
+    ))
+    if "participant_count" not in {column["name"] for column in inspect(connection).get_columns("tasks")}:
+        connection.execute(text("ALTER TABLE tasks ADD COLUMN participant_count INTEGER NOT NULL DEFAULT 0"))
+
+
+def copy_assignments(connection: Connection, chunk) -> None:
+    """把一批用户的 task_id 写入关联表，已存在的关系跳过"""
+    pairs = {(task_id, user_id) for user_id, task_id in chunk}
+    existing = set(connection.execute(
+        select(task_assignments.c.task_id, task_assignments.c.user_id)
+        .where(task_assignments.c.user_id.in_([user_id for _, user_id in pairs]))
+    ).all())
+    rows = [{"task_id": task_id, "user_id": user_id} for task_id, user_id in sorted(pairs - existing)]
+    if rows:
+        connection.execute(task_assignments.insert(), rows)
+
+
+def backfill(engine: Engine) -> None:
+    # 只迁移仍指向存在任务的用户，避免写入悬空的关联
+    run_backfill(
+        engine, f"{ID}:assignments", users.c.id, copy_assignments,
+        columns=[users.c.task_id],
+        where=users.c.task_id.in_(select(tasks.c.id)),
+    )
+    participants = (
+        select(func.count())
+        .where(task_assignments.c.task_id == tasks.c.id)
+        .scalar_subquery()
+    )
+    update_in_batches(engine, f"{ID}:participant_count", tasks, {"participant_count": participants})
@@ -0,0 +1,60 @@
+"""新增依赖传递闭包表 project_reachability，并按现有依赖边回填"""
+from sqlalchemy import Column, Integer, MetaData, Table, delete, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.migrations.backfill import run_backfill
+
+ID = "0003_project_reachability"
+
+# 表结构与回填逻辑按本迁移编写时固定下来，不读取模型、不调用业务代码
+metadata = MetaData()
+projects = Table("projects", metadata, Column("id", Integer, primary_key=True))
+project_dependencies = Table(
+    "project_dependencies", metadata,
+    Column("project_id", Integer, primary_key=True), Column("depends_on_id", Integer, primary_key=True),
+)
+project_reachability = Table(
+    "project_reachability", metadata,
+    Column("ancestor_id", Integer, primary_key=True), Column("descendant_id", Integer, primary_key=True),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS project_reachability ("
+        "ancestor_id INTEGER NOT NULL, descendant_id INTEGER NOT NULL, PRIMARY KEY (ancestor_id, descendant_id), "
+        "FOREIGN KEY(ancestor_id) REFERENCES projects (id), FOREIGN KEY(descendant_id) REFERENCES projects (id))"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_project_reachability_descendant_id_ancestor_id "
+        "ON project_reachability (descendant_id, ancestor_id)"
+    ))
+
+
+def rebuild_ancestors(connection: Connection, chunk) -> None:
+    """
+    重写一批项目的上游行；先删除，回填期间在线写入的行不会造成主键冲突。
+    递归 CTE 以 UNION 去重，即使存在循环依赖也能终止；项目自身不作为自己的上游
+    """
+    project_ids = [project_id for project_id, in chunk]
+    connection.execute(delete(project_reachability).where(project_reachability.c.descendant_id.in_(project_ids)))
+    pairs = select(
+        project_dependencies.c.project_id.label("descendant_id"),
+        project_dependencies.c.depends_on_id.label("ancestor_id"),
+    ).where(project_dependencies.c.project_id.in_(project_ids)).cte("reachable_pairs", recursive=True)
+    pairs = pairs.union(
+        select(pairs.c.descendant_id, project_dependencies.c.depends_on_id)
+        .where(project_dependencies.c.project_id == pairs.c.ancestor_id)
+    )
+    connection.execute(insert(project_reachability).from_select(
+        ["descendant_id", "ancestor_id"],
+        select(pairs.c.descendant_id, pairs.c.ancestor_id).where(pairs.c.descendant_id != pairs.c.ancestor_id),
+    ))
+
+
+def backfill(engine: Engine) -> None:
+    # 只有依赖其他项目的项目才有上游
+    run_backfill(
+        engine, f"{ID}:ancestors", projects.c.id, rebuild_ancestors,
+        where=projects.c.id.in_(select(project_dependencies.c.project_id)),
+    )
@@ -0,0 +1,37 @@
+"""新增 projects.planned_end 列及甘特图时间窗口查询的复合索引，并按开始时间、结束时间与预计时长回填"""
+from datetime import timedelta
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.migrations.backfill import update_in_batches
+
+ID = "0004_project_planned_end"
+
+# 表结构与回填规则按本迁移编写时固定下来，不读取模型、不调用业务代码
+metadata = MetaData()
+projects = Table(
+    "projects", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("start_time", DateTime),
+    Column("end_time", DateTime),
+    Column("estimated_duration", Integer),
+    Column("planned_end", DateTime),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    if "planned_end" not in {column["name"] for column in inspect(connection).get_columns("projects")}:
+        connection.execute(text("ALTER TABLE projects ADD COLUMN planned_end DATETIME"))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_projects_planned_end_start_time ON projects (planned_end, start_time)"
+    ))
+
+
+def backfill(engine: Engine) -> None:
+    # 结束时间为 end_time 或开始时间加预计时长；未设置开始时间的项目保持为空
+    update_in_batches(
+        engine, f"{ID}:planned_end", projects,
+        lambda row: {"planned_end": row.end_time or row.start_time + timedelta(days=row.estimated_duration or 0)},
+        where=projects.c.start_time.isnot(None),
+    )
@@ -0,0 +1,23 @@
+"""新增刷新令牌表 refresh_tokens"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+ID = "0005_refresh_tokens"
+
+# 表结构按本迁移编写时固定下来，不读取模型
+STATEMENTS = [
+    "CREATE TABLE IF NOT EXISTS refresh_tokens ("
+    "id INTEGER NOT NULL, token_hash VARCHAR(64) NOT NULL, user_id INTEGER NOT NULL, "
+    "family_id VARCHAR(32) NOT NULL, created_at DATETIME NOT NULL, expires_at DATETIME NOT NULL, "
+    "used_at DATETIME, revoked_at DATETIME, PRIMARY KEY (id), UNIQUE (token_hash), "
+    "FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE)",
+    "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_id ON refresh_tokens (id)",
+    "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_user_id ON refresh_tokens (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_family_id ON refresh_tokens (family_id)",
+    "CREATE INDEX IF NOT EXISTS ix_refresh_tokens_expires_at ON refresh_tokens (expires_at)",
+]
+
+
+def upgrade(connection: Connection) -> None:
+    for statement in STATEMENTS:
+        connection.execute(text(statement))
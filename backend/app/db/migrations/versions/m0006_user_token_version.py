@@ -0,0 +1,10 @@
+"""新增 users.token_version 列：访问令牌携带该版本号，修改密码或角色时加一使旧令牌失效"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+ID = "0006_user_token_version"
+
+
+def upgrade(connection: Connection) -> None:
+    if "token_version" not in {column["name"] for column in inspect(connection).get_columns("users")}:
+        connection.execute(text("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
@@ -1,25 +1,53 @@
+import threading
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Generator, Optional
 from app.core.config import settings
+from app.core.metrics import TimedQueuePool
+from app.db.instrumentation import instrument_engine
 
-# 根据数据库类型配置引擎（SQLite 需特殊参数）
-if settings.DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        settings.DATABASE_URL, connect_args={"check_same_thread": False}
-    )
-else:
-    engine = create_engine(settings.DATABASE_URL)
+# 创建数据库会话工厂，每个请求独立 session；引擎在首次使用时（通常是应用启动的 lifespan 中）创建并绑定
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
-# 创建数据库会话工厂，每个请求独立 session
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+def get_engine() -> Engine:
+    """
+    懒加载数据库引擎：导入本模块不会读取配置或创建连接池
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                # 根据数据库类型配置引擎（SQLite 需特殊参数）
+                if settings.DATABASE_URL.startswith("sqlite"):
+                    engine = create_engine(
+                        settings.DATABASE_URL, connect_args={"check_same_thread": False},
+                        poolclass=TimedQueuePool,  # 记录连接获取等待耗时
+                    )
+                else:
+                    engine = create_engine(settings.DATABASE_URL, poolclass=TimedQueuePool)
+                # 统计每个请求的查询次数与耗时
+                instrument_engine(engine)
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+def __getattr__(name: str):
+    """兼容 from app.db.session import engine：访问时才创建引擎"""
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_db() -> Generator[Session, None, None]:
     """
     FastAPI 依赖注入：获取数据库会话，用完自动关闭
     """
+    get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -3,5 +3,8 @@
 from .user import User
 from .project import Project
 from .task import Task
+from .change_log import ChangeLog
+from .job import Job
+from .refresh_token import RefreshToken
 
-__all__ = ["User", "Project", "Task"]
+__all__ = ["User", "Project", "Task", "ChangeLog", "Job", "RefreshToken"]
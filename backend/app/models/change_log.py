@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Enum, DateTime
+from datetime import datetime
+from ..db.base import Base
+from ..core.constants import ChangeOperation
+
+class ChangeLog(Base):
+    """
+    变更日志表模型，自增主键即为单调递增的同步游标。
+    """
+    __tablename__ = 'change_log'
+
+    id = Column(Integer, primary_key=True, autoincrement=True, doc="同步游标")
+    entity = Column(String(20), nullable=False, doc="实体类型（projects/tasks/users）")
+    entity_id = Column(Integer, nullable=False, doc="实体ID")
+    operation = Column(Enum(ChangeOperation), nullable=False, doc="操作类型")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, doc="变更时间")
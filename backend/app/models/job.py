@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, Float, String, Text, Enum, DateTime, Index
+from datetime import datetime
+from ..db.base import Base
+from ..core.constants import JobKind, JobStatus
+
+class Job(Base):
+    """
+    后台任务队列表模型：接口只写入一行待执行的任务，由各服务进程的工作线程认领执行，
+    状态、进度与结果写回本行供轮询。
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # 认领任务：按状态与可执行时间找最早的待执行任务
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        # 相同的待执行任务只保留一个：并发入队时由唯一约束去重，多个进程之间同样有效
+        Index("uq_jobs_pending_dedup_key", "dedup_key", unique=True,
+              sqlite_where=Column("status") == JobStatus.pending.name,
+              postgresql_where=Column("status") == JobStatus.pending.name),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(Enum(JobKind), nullable=False, doc="任务类型")
+    params = Column(Text, nullable=False, default="{}", doc="任务参数（键排序的 JSON）")
+    dedup_key = Column(String(500), nullable=False, doc="去重键：任务类型与参数，定时任务另加计划时间")
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.pending, doc="任务状态")
+    progress = Column(Float, nullable=False, default=0.0, doc="完成进度（0-1之间）")
+    result = Column(Text, nullable=True, doc="任务结果（JSON）")
+    error = Column(Text, nullable=True, doc="失败原因")
+    created_by = Column(Integer, nullable=True, doc="提交任务的用户ID，定时任务为空")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, doc="入队时间")
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow, doc="最早执行时间")
+    started_at = Column(DateTime, nullable=True, doc="开始执行时间")
+    heartbeat_at = Column(DateTime, nullable=True, doc="执行中最近一次上报进度的时间")
+    finished_at = Column(DateTime, nullable=True, doc="结束时间")
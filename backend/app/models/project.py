@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, Float, String, Enum, Date, DateTime, ForeignKey, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Float, String, Enum, Date, DateTime, ForeignKey, Table, Index
+from sqlalchemy.orm import relationship, backref
 from ..db.base import Base
 from ..core.constants import ProjectStatus
 
@@ -7,7 +7,19 @@ project_dependencies = Table(
     "project_dependencies",
     Base.metadata,
     Column("project_id", Integer, ForeignKey("projects.id"), primary_key=True),
-    Column("depends_on_id", Integer, ForeignKey("projects.id"), primary_key=True)
+    Column("depends_on_id", Integer, ForeignKey("projects.id"), primary_key=True),
+    # 主键以 project_id 开头，反向查询依赖某项目的项目需要单独索引
+    Index("ix_project_dependencies_depends_on_id", "depends_on_id"),
+)
+
+# 依赖的传递闭包：ancestor_id 直接或间接被 descendant_id 依赖（即位于其上游），由 app.services.reachability 维护
+project_reachability = Table(
+    "project_reachability",
+    Base.metadata,
+    Column("ancestor_id", Integer, ForeignKey("projects.id"), primary_key=True),
+    Column("descendant_id", Integer, ForeignKey("projects.id"), primary_key=True),
+    # 按后代查询全部上游、重建某些项目的可达关系时使用
+    Index("ix_project_reachability_descendant_id_ancestor_id", "descendant_id", "ancestor_id"),
 )
 
 class Project(Base):
@@ -15,6 +27,11 @@ class Project(Base):
     项目表模型，描述项目的基本信息和与任务、依赖的关系。
     """
     __tablename__ = 'projects'
+    __table_args__ = (
+        # 甘特图时间窗口的区间重叠查询：planned_end >= 窗口起点 且 start_time <= 窗口终点，
+        # 以及 planned_end IS NULL（开始时间需由依赖推算的项目）
+        Index("ix_projects_planned_end_start_time", "planned_end", "start_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, index=True, doc="项目名称")
@@ -23,9 +40,15 @@ class Project(Base):
     estimated_duration = Column(Integer, nullable=True, doc="预计时长（单位：小时）")
     start_time = Column(DateTime, nullable=True, doc="项目开始时间")
     end_time = Column(DateTime, nullable=True, doc="项目结束时间")
+    planned_end = Column(
+        DateTime, nullable=True,
+        doc="设置了开始时间的项目的结束时间（结束时间或开始时间加预计时长），由 app.services.gantt.planned_end 计算；"
+            "未设置开始时间时为空",
+    )
 
     # 关系：项目下有多个任务，删除项目时级联删除任务
-    tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan")
+    # 按ID排序：按项目加载任务会命中 (project_id, finished) 复合索引，不排序时返回顺序随索引而变
+    tasks = relationship("Task", back_populates="project", cascade="all, delete-orphan", order_by="Task.id")
 
     # 关系：项目依赖的其他项目
     dependencies = relationship(
@@ -49,12 +72,16 @@ class ProjectProgress(Base):
     项目进度表模型，记录项目的每日进度。
     """
     __tablename__ = 'project_progress'
+    __table_args__ = (
+        # 按项目查询某天的进度、按日期排序的进度历史以及每个项目的最新日期；前缀可替代 project_id 单列索引
+        Index("ix_project_progress_project_id_date", "project_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey('projects.id'), nullable=False, index=True, doc="所属项目ID")
+    project_id = Column(Integer, ForeignKey('projects.id'), nullable=False, doc="所属项目ID")
     date = Column(Date, nullable=False, index=True, doc="日期")
     progress = Column(Float, nullable=False, doc="完成进度（0-1之间）")
     
-    # 关系：进度记录属于某个项目
-    project = relationship("Project", backref="progress_records")
+    # 关系：进度记录属于某个项目，删除项目时级联删除进度记录
+    project = relationship("Project", backref=backref("progress_records", cascade="all, delete-orphan"))
 
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from datetime import datetime
+from ..db.base import Base
+
+class RefreshToken(Base):
+    """
+    刷新令牌表模型：只保存令牌的 SHA-256 摘要。每次刷新都换发新令牌并标记旧令牌已使用，
+    同一次登录换发出的令牌属于同一个 family；已使用的令牌再次出现说明被盗用，整个 family 一并吊销。
+    """
+    __tablename__ = 'refresh_tokens'
+    __table_args__ = (
+        # 吊销同一次登录的全部令牌、清理过期令牌
+        Index("ix_refresh_tokens_family_id", "family_id"),
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String(64), unique=True, nullable=False, doc="令牌的 SHA-256 摘要（十六进制）")
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False, index=True, doc="用户ID")
+    family_id = Column(String(32), nullable=False, doc="同一次登录换发出的令牌共用的标识")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, doc="签发时间")
+    expires_at = Column(DateTime, nullable=False, doc="过期时间")
+    used_at = Column(DateTime, nullable=True, doc="换发新令牌的时间，非空表示已使用")
+    revoked_at = Column(DateTime, nullable=True, doc="吊销时间（注销、修改密码或检测到重复使用）")
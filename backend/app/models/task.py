@@ -1,30 +1,46 @@
-from sqlalchemy import Column, Integer, String, Boolean, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Enum, ForeignKey, Index, Table
 from sqlalchemy.orm import relationship
 from ..db.base import Base
 from ..core.constants import TaskWorkload
 
+task_assignments = Table(
+    "task_assignments",
+    Base.metadata,
+    Column("task_id", Integer, ForeignKey("tasks.id"), primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    # 主键以 task_id 开头，按用户查询参与的任务需要反向的复合索引（只读索引即可得到结果）
+    Index("ix_task_assignments_user_id_task_id", "user_id", "task_id"),
+)
+
 class Task(Base):
     """
     任务表模型，描述任务的基本信息和与项目的关系。
     """
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # 按项目查询任务及统计完成情况；前缀可替代 project_id 单列索引
+        Index("ix_tasks_project_id_finished", "project_id", "finished"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, index=True, doc="任务名称")
     description = Column(String, nullable=True, doc="任务描述")
     workload = Column(Enum(TaskWorkload), nullable=False, default=TaskWorkload.light, doc="任务工作量")
     finished = Column(Boolean, nullable=False, default=False, doc="任务是否完成")
-    project_id = Column(Integer, ForeignKey('projects.id'), nullable=False, index=True, doc="所属项目ID")
+    project_id = Column(Integer, ForeignKey('projects.id'), nullable=False, doc="所属项目ID")
     head_id = Column(Integer, ForeignKey('users.id'), nullable=True, index=True, doc="任务负责人ID")
+    participant_count = Column(Integer, nullable=False, default=0, server_default="0",
+                               doc="参与人数，由 app.services.assignment 随分配关系维护")
 
     # 任务属于一个项目
     project = relationship("Project", back_populates="tasks")
 
-    # 任务的所有成员
+    # 任务的所有成员。分配关系通过 app.services.assignment 修改以同步参与人数，
+    # 这里只在删除任务时由 ORM 一并删除关联行
     users = relationship(
         "User",
-        back_populates="task",
-        foreign_keys="User.task_id"
+        secondary=task_assignments,
+        back_populates="tasks"
     )
 
     # 任务负责人
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, Boolean, Enum, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, Boolean, Enum, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from ..db.base import Base
 from ..core.constants import UserRole
@@ -8,6 +8,12 @@ class User(Base):
     用户表模型，描述用户的基本信息。
     """
     __tablename__ = 'users'
+    __table_args__ = (
+        Index("ix_users_role", "role"),  # 按角色筛选用户列表
+        # 优秀员工列表：只有约两成用户为 True，部分索引只收录这些行，规划器才会选择走索引
+        Index("ix_users_outstanding", "outstanding",
+              sqlite_where=text("outstanding = 1"), postgresql_where=text("outstanding")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(100), unique=True, index=True, nullable=False, doc="用户名")
@@ -17,15 +23,25 @@ class User(Base):
     profile = Column(String, nullable=True, doc="用户简介")
     performance = Column(Float, nullable=True, doc="用户绩效评分")
     outstanding = Column(Boolean, nullable=True, default=False, doc="是否为优秀员工")
-    task_id = Column(Integer, ForeignKey('tasks.id'), nullable=True, index=True, doc="参与的任务ID")
+    token_version = Column(Integer, nullable=False, default=0, server_default=text("0"),
+                           doc="访问令牌版本号，修改密码或角色时加一，之前签发的访问令牌随即失效")
+    task_id = Column(Integer, ForeignKey('tasks.id'), nullable=True, index=True,
+                     doc="最近分配的任务ID（兼容字段，完整的分配关系见 task_assignments）")
 
-    # 用户参与的任务
+    # 最近分配的任务
     task = relationship(
         "Task",
-        back_populates="users",
         foreign_keys=[task_id]
     )
 
+    # 用户参与的所有任务
+    tasks = relationship(
+        "Task",
+        secondary="task_assignments",
+        back_populates="users",
+        viewonly=True
+    )
+
     # 用户作为负责人的任务
     headed_task = relationship(
         "Task",
@@ -21,4 +21,35 @@ class CriticalPathResponse(BaseModel):
     total_duration_days: float
     weights: Dict[int, float]
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+class ScheduleResponse(BaseModel):
+    """
+    关键路径法（CPM）排程：ids 与其余数组按下标一一对应，时间以天为单位、从 0 开始。
+    critical 为总时差为零的项目ID
+    """
+    project_duration: float
+    ids: List[int]
+    duration: List[float]
+    earliest_start: List[float]
+    earliest_finish: List[float]
+    latest_start: List[float]
+    latest_finish: List[float]
+    total_float: List[float]
+    free_float: List[float]
+    critical: List[int]
+
+
+class SimulationResponse(BaseModel):
+    """
+    蒙特卡洛排程风险模拟结果：finish_days / finish_dates 以 p50、p80、p95 为键，
+    criticality 与 ids 按下标对应，为项目处于关键路径上的试验比例
+    """
+    trials: int
+    start_date: str
+    deterministic_days: float
+    mean_days: float
+    finish_days: Dict[str, float]
+    finish_dates: Dict[str, str]
+    ids: List[int]
+    criticality: List[float]
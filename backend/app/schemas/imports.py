@@ -0,0 +1,57 @@
+from pydantic import BaseModel, model_validator
+from typing import Optional, List
+from ..core.constants import UserRole
+from .project import ProjectCreate
+from .task import TaskBase
+
+class UserImport(BaseModel):
+    """批量导入用户的单行数据"""
+    username: str
+    email: str
+    password: str
+    role: UserRole = UserRole.user
+    profile: Optional[str] = None
+
+class ProjectImport(ProjectCreate):
+    """批量导入项目的单行数据"""
+    pass
+
+class TaskImport(TaskBase):
+    """批量导入任务的单行数据，项目与负责人可通过名称引用"""
+    project_id: Optional[int] = None
+    project_name: Optional[str] = None
+    head_username: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_project_reference(self):
+        if self.project_id is None and not self.project_name:
+            raise ValueError("project_id or project_name is required")
+        return self
+
+class DependencyImport(BaseModel):
+    """批量导入依赖边的单行数据：project 依赖 depends_on，均可通过ID或名称引用"""
+    project_id: Optional[int] = None
+    project_name: Optional[str] = None
+    depends_on_id: Optional[int] = None
+    depends_on_name: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_references(self):
+        if self.project_id is None and not self.project_name:
+            raise ValueError("project_id or project_name is required")
+        if self.depends_on_id is None and not self.depends_on_name:
+            raise ValueError("depends_on_id or depends_on_name is required")
+        return self
+
+class ImportRowError(BaseModel):
+    """导入失败的行（行号从 1 开始，不含 CSV 表头）"""
+    row: int
+    error: str
+
+class ImportReport(BaseModel):
+    """批量导入结果"""
+    entity: str
+    total: int = 0
+    inserted: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
@@ -0,0 +1,52 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from ..core.constants import DataFormat, ExportEntity, JobKind, JobStatus, SimulationDistribution
+
+class PerformanceJobParams(BaseModel):
+    """全员绩效任务没有参数"""
+    pass
+
+class ProgressJobParams(BaseModel):
+    """重新计算进度的项目，缺省时为全部项目"""
+    project_ids: Optional[List[int]] = None
+
+class SimulationJobParams(BaseModel):
+    """排程风险模拟参数，与 /gantt/simulation 一致"""
+    trials: int = Field(1000, ge=1, le=100_000)
+    seed: int = Field(0, ge=0)
+    distribution: SimulationDistribution = SimulationDistribution.pert
+    optimistic: float = Field(0.8, gt=0, le=1)
+    pessimistic: float = Field(1.5, ge=1)
+
+class ExportJobParams(BaseModel):
+    """导出参数，与 /export/{entity} 一致"""
+    entity: ExportEntity
+    format: DataFormat = DataFormat.ndjson
+    project_id: Optional[int] = None
+
+JOB_PARAMS = {
+    JobKind.users_performance: PerformanceJobParams,
+    JobKind.projects_progress: ProgressJobParams,
+    JobKind.gantt_simulation: SimulationJobParams,
+    JobKind.export: ExportJobParams,
+}
+
+class JobCreate(BaseModel):
+    """提交后台任务请求体，params 按任务类型校验"""
+    kind: JobKind
+    params: Dict[str, Any] = {}
+
+class Job(BaseModel):
+    """后台任务输出模型"""
+    id: int
+    kind: JobKind
+    status: JobStatus
+    progress: float
+    params: Dict[str, Any]
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    run_after: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
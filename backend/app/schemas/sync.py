@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List
+from .project import Project
+from .task import Task
+from .user import User
+
+class SyncDeleted(BaseModel):
+    """已删除实体的ID（墓碑）"""
+    projects: List[int] = []
+    tasks: List[int] = []
+    users: List[int] = []
+
+class SyncResponse(BaseModel):
+    """增量同步响应模型"""
+    cursor: int
+    full: bool = False
+    has_more: bool = False
+    projects: List[Project] = []
+    tasks: List[Task] = []
+    users: List[User] = []
+    deleted: SyncDeleted = SyncDeleted()
@@ -26,6 +26,7 @@ class TaskUpdate(BaseModel):
 
 class Task(TaskBase):
     """任务输出模型"""
+    participant_count: int = 0
     id: int
 
     model_config = {"from_attributes": True}
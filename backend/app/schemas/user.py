@@ -25,6 +25,16 @@ class UserLogin(BaseModel):
     identifier: str  # 用户名或邮箱
     password: str
 
+class RefreshTokenRequest(BaseModel):
+    """刷新访问令牌 / 注销请求体"""
+    refresh_token: str
+
+class Token(BaseModel):
+    """登录与刷新返回的令牌"""
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
 class UserUpdate(BaseModel):
     """用户信息更新请求体"""
     username: str = Field(..., min_length=1, max_length=50)
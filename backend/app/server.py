@@ -0,0 +1,109 @@
+# 生产环境启动入口：多个 Uvicorn 工作进程，数量默认等于 CPU 核数
+#
+# 运行方式（在 backend 目录下）：
+#     python -m app.server [--host 0.0.0.0] [--port 8000] [--workers N]
+#
+# 安装了 gunicorn 时由 gunicorn 管理 Uvicorn 工作进程并预加载应用（preload_app），
+# 否则退回 uvicorn 自带的多进程模式。迁移只在主进程执行一次；
+# 多于一个进程且使用进程内缓存时启用跨进程缓存失效通道，写接口的失效与 SSE 变更事件对所有进程可见；
+# 登录失败次数改为在 SQLite 表中计数，限制不会随进程数成倍放宽。
+import argparse
+import importlib.util
+import os
+import sys
+from typing import Optional
+
+from app.core.config import settings
+
+
+def worker_count(requested: Optional[int] = None) -> int:
+    """工作进程数：命令行参数 > WEB_CONCURRENCY > CPU 核数"""
+    return requested or settings.WEB_CONCURRENCY or os.cpu_count() or 1
+
+
+def prepare(workers: int) -> None:
+    """在主进程中执行迁移，并设置工作进程的配置（环境变量供新进程读取，settings 供预加载后 fork 的进程继承）"""
+    if settings.AUTO_MIGRATE:
+        from app.db.migrations import upgrade_database
+        from app.db.session import get_engine
+
+        engine = get_engine()
+        applied = upgrade_database(engine)
+        engine.dispose()
+        if applied:
+            print("已应用迁移：" + ", ".join(applied))
+
+    overrides = {"AUTO_MIGRATE": False}
+    if workers > 1 and settings.CACHE_BACKEND == "memory" and "CACHE_INVALIDATION_BUS" not in os.environ:
+        overrides["CACHE_INVALIDATION_BUS"] = True
+    if workers > 1 and "LOGIN_RATE_LIMIT_BACKEND" not in os.environ:
+        overrides["LOGIN_RATE_LIMIT_BACKEND"] = "sqlite"
+    for key, value in overrides.items():
+        os.environ[key] = value if isinstance(value, str) else ("true" if value else "false")
+        setattr(settings, key, value)
+    if settings.CACHE_INVALIDATION_BUS:
+        from app.core.invalidation import rotate_cache_epoch
+        from app.db.session import get_engine
+
+        engine = get_engine()
+        rotate_cache_epoch(engine)
+        engine.dispose()
+
+
+def post_fork(server, worker) -> None:
+    """预加载时引擎在主进程中创建，子进程丢弃继承的连接，避免多个进程共用同一个 SQLite 连接"""
+    from app.db.session import get_engine
+
+    get_engine().dispose(close=False)
+
+
+def run_gunicorn(host: str, port: int, workers: int) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    worker_class = ("uvicorn_worker.UvicornWorker" if importlib.util.find_spec("uvicorn_worker")
+                    else "uvicorn.workers.UvicornWorker")
+
+    class Application(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{host}:{port}",
+                "workers": workers,
+                "worker_class": worker_class,
+                "preload_app": True,
+                "post_fork": post_fork,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+
+            return app
+
+    Application().run()
+
+
+def run_uvicorn(host: str, port: int, workers: int) -> None:
+    import uvicorn
+
+    uvicorn.run("main:app", host=host, port=port, workers=workers)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.server", description="生产环境多进程服务")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认等于 CPU 核数")
+    args = parser.parse_args(argv)
+
+    workers = worker_count(args.workers)
+    prepare(workers)
+    if importlib.util.find_spec("gunicorn") and sys.platform != "win32":
+        run_gunicorn(args.host, args.port, workers)
+    else:
+        run_uvicorn(args.host, args.port, workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
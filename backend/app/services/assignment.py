@@ -0,0 +1,150 @@
+# 任务分配：维护 task_assignments 关联表、任务的参与人数与用户的兼容字段 task_id
+from collections import Counter
+from typing import Iterable, List, Set, Tuple
+
+from sqlalchemy import case, delete, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.constants import CacheEntity
+from app.models.task import Task as TaskModel, task_assignments
+from app.models.user import User as UserModel
+from app.services.sync import record_change
+
+Pair = Tuple[int, int]  # (task_id, user_id)
+
+CHUNK_SIZE = 500  # 单条语句中的分配关系数量上限，避免超出 SQLite 参数个数限制
+
+
+def _existing_pairs(db: Session, pairs: List[Pair]) -> Set[Pair]:
+    """查询已存在的分配关系，按主键 (task_id, user_id) 分块查询"""
+    existing = set()
+    for start in range(0, len(pairs), CHUNK_SIZE):
+        chunk = pairs[start:start + CHUNK_SIZE]
+        existing.update(db.execute(
+            select(task_assignments.c.task_id, task_assignments.c.user_id)
+            .where(tuple_(task_assignments.c.task_id, task_assignments.c.user_id).in_(chunk))
+        ).all())
+    return existing
+
+
+def _adjust_participant_counts(db: Session, deltas: Counter) -> None:
+    """按增量更新参与人数，一条语句更新所有涉及的任务"""
+    deltas = {task_id: delta for task_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    db.execute(
+        update(TaskModel)
+        .where(TaskModel.id.in_(deltas))
+        .values(participant_count=TaskModel.participant_count + case(deltas, value=TaskModel.id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def add_assignments(db: Session, pairs: Iterable[Pair]) -> List[Pair]:
+    """
+    批量添加分配关系，已存在的跳过，返回新增的关系。不提交事务！
+    新分配的任务同时写入用户的 task_id（最近分配的任务），保持旧接口可用。
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return []
+    existing = _existing_pairs(db, pairs)
+    added = [pair for pair in pairs if pair not in existing]
+    if not added:
+        return []
+
+    db.execute(insert(task_assignments), [{"task_id": task_id, "user_id": user_id} for task_id, user_id in added])
+    _adjust_participant_counts(db, Counter(task_id for task_id, _ in added))
+    latest = {user_id: task_id for task_id, user_id in added}
+    db.execute(update(UserModel), [{"id": user_id, "task_id": task_id} for user_id, task_id in latest.items()])
+    record_change(db, CacheEntity.tasks, sorted({task_id for task_id, _ in added}))
+    record_change(db, CacheEntity.users, sorted(latest))
+    return added
+
+
+def remove_assignments(db: Session, pairs: Iterable[Pair]) -> List[Pair]:
+    """
+    批量移除分配关系，不存在的跳过，返回实际移除的关系。不提交事务！
+    被移除的用户若不再参与某任务，同时取消其负责人身份；task_id 指向被移除任务时改为剩余任务中最新的一个。
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return []
+    existing = _existing_pairs(db, pairs)
+    removed = [pair for pair in pairs if pair in existing]
+    if not removed:
+        return []
+
+    for start in range(0, len(removed), CHUNK_SIZE):
+        chunk = removed[start:start + CHUNK_SIZE]
+        db.execute(delete(task_assignments).where(
+            tuple_(task_assignments.c.task_id, task_assignments.c.user_id).in_(chunk)
+        ))
+        db.execute(
+            update(TaskModel)
+            .where(tuple_(TaskModel.id, TaskModel.head_id).in_(chunk))
+            .values(head_id=None)
+            .execution_options(synchronize_session=False)
+        )
+    _adjust_participant_counts(db, Counter({task_id: -count for task_id, count in
+                                            Counter(task_id for task_id, _ in removed).items()}))
+
+    user_ids = sorted({user_id for _, user_id in removed})
+    _repoint_primary_tasks(db, user_ids, set(removed))
+    record_change(db, CacheEntity.tasks, sorted({task_id for task_id, _ in removed}))
+    record_change(db, CacheEntity.users, user_ids)
+    return removed
+
+
+def _repoint_primary_tasks(db: Session, user_ids: List[int], removed: Set[Pair]) -> None:
+    """task_id 指向已移除的分配关系时，改为剩余分配中ID最大的任务"""
+    current = db.execute(select(UserModel.id, UserModel.task_id).where(UserModel.id.in_(user_ids))).all()
+    stale = [user_id for user_id, task_id in current if (task_id, user_id) in removed]
+    if not stale:
+        return
+    remaining = dict(db.execute(
+        select(task_assignments.c.user_id, func.max(task_assignments.c.task_id))
+        .where(task_assignments.c.user_id.in_(stale))
+        .group_by(task_assignments.c.user_id)
+    ).all())
+    db.execute(update(UserModel), [{"id": user_id, "task_id": remaining.get(user_id)} for user_id in stale])
+
+
+def clear_task_assignments(db: Session, task_id: int) -> List[int]:
+    """移除任务的全部分配关系（删除任务前调用），返回受影响的用户ID。不提交事务！"""
+    user_ids = list(db.scalars(select(task_assignments.c.user_id).where(task_assignments.c.task_id == task_id)))
+    remove_assignments(db, [(task_id, user_id) for user_id in user_ids])
+    # 兜底：仍指向该任务的 task_id（例如迁移前遗留的数据）一并清除
+    db.execute(
+        update(UserModel).where(UserModel.task_id == task_id).values(task_id=None)
+        .execution_options(synchronize_session=False)
+    )
+    return user_ids
+
+
+def task_member_ids(db: Session, task_id: int) -> List[int]:
+    """任务成员ID，只读主键索引"""
+    return list(db.scalars(
+        select(task_assignments.c.user_id)
+        .where(task_assignments.c.task_id == task_id)
+        .order_by(task_assignments.c.user_id)
+    ))
+
+
+def user_task_ids(db: Session, user_id: int) -> List[int]:
+    """用户参与的任务ID，只读 (user_id, task_id) 索引"""
+    return list(db.scalars(
+        select(task_assignments.c.task_id)
+        .where(task_assignments.c.user_id == user_id)
+        .order_by(task_assignments.c.task_id)
+    ))
+
+
+def project_member_ids(project_id: int):
+    """项目成员ID的子查询：项目任务走 (project_id, finished) 索引，成员走关联表主键"""
+    return (
+        select(task_assignments.c.user_id)
+        .join(TaskModel, TaskModel.id == task_assignments.c.task_id)
+        .where(TaskModel.project_id == project_id)
+        .distinct()
+    )
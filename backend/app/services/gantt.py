@@ -1,6 +1,17 @@
+import threading
+from collections import defaultdict
+from sqlalchemy import Select, select, union
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from app.models.project import Project as ProjectModel
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from app.core.cache import entity_versions
+from app.core.constants import CacheEntity
+from app.models.project import Project as ProjectModel, ProjectStatus, project_dependencies
+from app.services.intervals import IntervalTree
+from app.services.serializers import fetch_latest_progress, scope_to_projects
+
+# 甘特图时间窗口 (起始日期, 结束日期)，闭区间，任一端为 None 表示不限
+Window = Tuple[Optional[date], Optional[date]]
 
 def get_dependency_end_time(project: ProjectModel, db: Session, current_path=None) -> datetime:
     """
@@ -57,4 +68,277 @@ def get_dependency_end_time(project: ProjectModel, db: Session, current_path=Non
             else datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)  # 使用当前日期，时间归零
         )
     )
-    return result
\ No newline at end of file
+    return result
+
+def planned_end(start_time: Optional[datetime], end_time: Optional[datetime],
+                estimated_duration: Optional[int]) -> Optional[datetime]:
+    """
+    Project.planned_end 列的取值：设置了开始时间的项目，结束时间为 end_time 或开始时间加预计时长；
+    未设置开始时间的项目开始时间由依赖推算，返回 None。写入项目的各处都需要同步更新该列！
+    """
+    if start_time is None:
+        return None
+    return end_time or start_time + timedelta(days=(estimated_duration or 0))
+
+
+def _own_end_time(project, today: datetime) -> datetime:
+    """项目自身的结束时间：结束时间、开始时间加预计时长或当天"""
+    if project.end_time:
+        return project.end_time
+    if project.start_time:
+        return project.start_time + timedelta(days=(project.estimated_duration or 0))
+    return today
+
+
+def get_dependency_end_times(
+    project_ids: Iterable[int],
+    projects: Dict[int, Any],
+    dependencies: Dict[int, List[int]],
+    today: datetime,
+) -> Dict[int, datetime]:
+    """
+    批量计算指定项目的依赖结束时间，语义与 get_dependency_end_time 一致，
+    但基于内存中的邻接表并缓存中间结果，每个项目只计算一次。
+
+    Raises:
+        ValueError: 检测到循环依赖
+    """
+    result: Dict[int, datetime] = {}
+    visiting = set()
+
+    def visit(project_id: int) -> datetime:
+        if project_id in result:
+            return result[project_id]
+        if project_id in visiting:
+            raise ValueError(f"Circular dependency detected for project {project_id}")
+        visiting.add(project_id)
+        deps = dependencies.get(project_id)
+        if deps:
+            end_time = max(visit(dep_id) for dep_id in deps)
+        else:
+            end_time = _own_end_time(projects[project_id], today)
+        visiting.discard(project_id)
+        result[project_id] = end_time
+        return end_time
+
+    for project_id in project_ids:
+        visit(project_id)
+    return result
+
+
+def dependency_closure(seed: Select, upstream: bool) -> Select:
+    """
+    递归 CTE：seed 查询给出的项目及其全部上游（所依赖的项目）或下游（依赖它们的项目）的项目ID。
+    UNION 去重，存在循环依赖时也能终止；上游沿主键、下游沿 depends_on_id 索引展开，
+    代价与子图大小成正比，与项目总数无关
+    """
+    follow, towards = project_dependencies.c.project_id, project_dependencies.c.depends_on_id
+    if not upstream:
+        follow, towards = towards, follow
+    closure = seed.cte(f"{'upstream' if upstream else 'downstream'}_closure", recursive=True)
+    closure = closure.union(select(towards.label("id")).where(follow == closure.c.id))
+    return select(closure.c.id)
+
+
+def _roots_query(roots: Iterable[int]) -> Select:
+    return select(ProjectModel.id.label("id")).where(ProjectModel.id.in_(list(roots)))
+
+
+def upstream_ids_query(roots: Iterable[int]) -> Select:
+    """roots 及其全部上游项目的ID"""
+    return dependency_closure(_roots_query(roots), upstream=True)
+
+
+def downstream_ids_query(roots: Iterable[int]) -> Select:
+    """roots 及其全部下游项目的ID"""
+    return dependency_closure(_roots_query(roots), upstream=False)
+
+
+def programme_ids_query(roots: Iterable[int]) -> Select:
+    """roots 所在的项目群：roots 及其全部上游与下游项目的ID"""
+    roots = list(roots)
+    return select(union(upstream_ids_query(roots), downstream_ids_query(roots)).subquery().c.id)
+
+
+def load_dependency_map(db: Session, project_ids: Optional[Select] = None) -> Dict[int, List[int]]:
+    """一次查询加载依赖边：项目ID -> 所依赖的项目ID列表，project_ids 限定项目范围"""
+    dependencies: Dict[int, List[int]] = defaultdict(list)
+    query = scope_to_projects(
+        select(project_dependencies.c.project_id, project_dependencies.c.depends_on_id),
+        project_dependencies.c.project_id, project_ids,
+    )
+    rows = db.execute(
+        query.order_by(project_dependencies.c.project_id, project_dependencies.c.depends_on_id)
+    )
+    for project_id, depends_on_id in rows:
+        dependencies[project_id].append(depends_on_id)
+    return dependencies
+
+
+GANTT_COLUMNS = (
+    ProjectModel.id, ProjectModel.name, ProjectModel.status, ProjectModel.start_time,
+    ProjectModel.end_time, ProjectModel.estimated_duration,
+)
+
+
+def _today() -> datetime:
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)  # 使用当前日期，时间归零
+
+
+def _gantt_rows(
+    rows: Iterable[Any],
+    start_times: Dict[int, datetime],
+    dependencies: Dict[int, List[int]],
+    latest_progress: Dict[int, float],
+) -> List[dict]:
+    """组装与 GanttProject 一致的字典；未设置开始时间的项目从 start_times 取推算的开始时间"""
+    gantt_data = []
+    for row in rows:
+        start_time = row.start_time or start_times[row.id]
+        end_time = row.end_time or (start_time + timedelta(days=(row.estimated_duration or 0)))
+
+        if row.status == ProjectStatus.completed:
+            progress = 100.0
+        elif row.id in latest_progress:
+            progress = latest_progress[row.id] * 100
+        else:
+            progress = 0.0
+
+        gantt_data.append({
+            "id": row.id,
+            "name": row.name,
+            "status": row.status.value,
+            "start_time": start_time.strftime("%Y-%m-%d"),
+            "end_time": end_time.strftime("%Y-%m-%d"),
+            "progress": progress,
+            "dependencies": dependencies.get(row.id, []),
+        })
+    return gantt_data
+
+
+def in_window(project: dict, window: Window) -> bool:
+    """甘特图项目（日期为 YYYY-MM-DD 字符串）与时间窗口是否重叠"""
+    start, end = window
+    return ((start is None or project["end_time"] >= start.isoformat())
+            and (end is None or project["start_time"] <= end.isoformat()))
+
+
+def build_gantt_data(
+    db: Session, roots: Optional[Iterable[int]] = None, window: Optional[Window] = None,
+) -> List[dict]:
+    """
+    计算甘特图所需的项目数据。固定三次查询，直接返回与 GanttProject 一致的字典。
+    指定 roots 时只返回其所在的项目群，推算开始时间所需的上游项目也只加载这一子图。
+    指定 window 时只返回与时间窗口重叠的项目，未指定 roots 时见 build_gantt_window。
+    """
+    if window is not None and roots is None:
+        return build_gantt_window(db, window)
+    query = db.query(*GANTT_COLUMNS)
+    scope = needed = None
+    if roots is not None:
+        roots = list(roots)
+        scope = set(db.scalars(programme_ids_query(roots)))
+        # 下游项目还可能依赖项目群之外的项目，推算开始时间需要全部下游项目的上游（包含整个项目群）
+        needed = dependency_closure(downstream_ids_query(roots), upstream=True)
+        query = scope_to_projects(query, ProjectModel.id, needed).order_by(ProjectModel.id)
+    rows = query.all()
+    projects = {row.id: row for row in rows}
+    dependencies = load_dependency_map(db, needed)
+    latest_progress = fetch_latest_progress(db, needed)
+    if scope is not None:
+        rows = [row for row in rows if row.id in scope]
+
+    # 只有未设置开始时间的项目需要依赖结束时间
+    dependency_end_times = get_dependency_end_times(
+        [row.id for row in rows if not row.start_time], projects, dependencies, _today()
+    )
+    gantt_data = _gantt_rows(rows, dependency_end_times, dependencies, latest_progress)
+    if window is not None:
+        gantt_data = [project for project in gantt_data if in_window(project, window)]
+    return gantt_data
+
+
+class DerivedIntervals(NamedTuple):
+    """开始时间由依赖推算的项目：区间树的值为项目ID"""
+    tree: IntervalTree
+    rows: Dict[int, Any]
+    start_times: Dict[int, datetime]
+    dependencies: Dict[int, List[int]]
+
+
+def derived_intervals(db: Session, today: datetime) -> DerivedIntervals:
+    """
+    未设置开始时间的项目：加载它们及其全部上游（递归 CTE），推算开始时间，
+    以 (开始日期, 结束日期) 建区间树。推算结果随当天日期和任一上游变化，因此不持久化，
+    由 derived_intervals_cache 按当天日期与项目缓存版本号在进程内复用。
+    """
+    needed = dependency_closure(
+        select(ProjectModel.id.label("id")).where(ProjectModel.planned_end.is_(None)), upstream=True
+    )
+    projects = {row.id: row for row in scope_to_projects(db.query(*GANTT_COLUMNS), ProjectModel.id, needed)}
+    dependencies = load_dependency_map(db, needed)
+    rows = {project_id: row for project_id, row in projects.items() if row.start_time is None}
+    start_times = get_dependency_end_times(list(rows), projects, dependencies, today)
+
+    intervals = []
+    for project_id, row in rows.items():
+        start_time = start_times[project_id]
+        end_time = row.end_time or (start_time + timedelta(days=(row.estimated_duration or 0)))
+        intervals.append((start_time.date(), end_time.date(), project_id))
+    return DerivedIntervals(IntervalTree(intervals), rows, start_times, dependencies)
+
+
+class DerivedIntervalsCache:
+    """
+    进程内缓存最近一次的 derived_intervals 结果，键为 (当天日期, projects 缓存版本号)：
+    项目与依赖的写入都会递增版本号，之后的首个窗口查询重建区间树，其余查询直接复用。
+    重建时持有锁，并发的窗口查询等待同一次重建而不是各自加载
+    """
+
+    def __init__(self):
+        self._entry: Optional[Tuple[Tuple[datetime, int], DerivedIntervals]] = None
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, today: datetime) -> DerivedIntervals:
+        key = (today, entity_versions([CacheEntity.projects])[0])
+        entry = self._entry
+        if entry is None or entry[0] != key:
+            with self._lock:
+                entry = self._entry
+                if entry is None or entry[0] != key:
+                    entry = self._entry = (key, derived_intervals(db, today))
+        return entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entry = None
+
+
+derived_intervals_cache = DerivedIntervalsCache()
+
+
+def build_gantt_window(db: Session, window: Window) -> List[dict]:
+    """
+    只返回与时间窗口重叠的项目，代价随窗口内的项目数而非历史项目总数增长：
+    设置了开始时间的项目按 planned_end 与 start_time 在复合索引上做区间重叠查询；
+    开始时间由依赖推算的项目在进程内缓存的区间树中查找，项目数据不变时不再重新加载。
+    """
+    start, end = window
+    conditions = [ProjectModel.planned_end.isnot(None)]
+    if start is not None:
+        conditions.append(ProjectModel.planned_end >= datetime.combine(start, time.min))
+    if end is not None:
+        conditions.append(ProjectModel.start_time < datetime.combine(end + timedelta(days=1), time.min))
+    fixed = select(ProjectModel.id.label("id")).where(*conditions)
+    rows = db.query(*GANTT_COLUMNS).filter(*conditions).all()
+    dependencies = load_dependency_map(db, fixed)
+    latest_progress = fetch_latest_progress(db, fixed)
+
+    derived = derived_intervals_cache.get(db, _today())
+    hits = derived.tree.overlapping(start or date.min, end or date.max)
+    if hits:
+        latest_progress.update(fetch_latest_progress(db, hits))
+        dependencies.update({project_id: derived.dependencies.get(project_id, []) for project_id in hits})
+        rows.extend(derived.rows[project_id] for project_id in hits)
+    rows.sort(key=lambda row: row.id)
+    return _gantt_rows(rows, derived.start_times, dependencies, latest_progress)
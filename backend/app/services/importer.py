@@ -0,0 +1,388 @@
+# 批量导入：分批校验、集合查询解析引用、进程池并行哈希密码、分块事务批量写入
+#
+# 命令行用法（在 backend 目录下）：
+#     python -m app.services.importer users users.ndjson
+#     python -m app.services.importer tasks tasks.csv --format csv --batch-size 1000
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.cache import bump_versions
+from app.core.constants import CacheEntity, DataFormat, ErrorMessage, ImportEntity
+from app.core.events import publish_event
+from app.core.security import MIN_PASSWORD_LENGTH, _hash_slots, get_password_hash, hash_concurrency
+from app.models.project import Project as ProjectModel, project_dependencies
+from app.models.task import Task as TaskModel
+from app.models.user import User as UserModel
+from app.schemas.imports import (
+    DependencyImport, ImportReport, ImportRowError, ProjectImport, TaskImport, UserImport,
+)
+from app.services import reachability
+from app.services.assignment import add_assignments
+from app.services.gantt import planned_end
+from app.services.project import publish_progress_changed, update_project_progress
+from app.services.sync import record_change
+
+DEFAULT_BATCH_SIZE = 500
+
+# 少于该数量的密码直接在当前进程哈希，避免进程池调度开销
+PARALLEL_HASH_THRESHOLD = 8
+
+IMPORT_SCHEMAS = {
+    ImportEntity.users: UserImport,
+    ImportEntity.projects: ProjectImport,
+    ImportEntity.tasks: TaskImport,
+    ImportEntity.dependencies: DependencyImport,
+}
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    """懒加载密码哈希进程池（spawn 方式启动，避免在多线程服务进程中 fork），大小与哈希并发上限一致"""
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=hash_concurrency(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_pool
+
+
+def _hash_chunk(passwords: Sequence[str]) -> List[str]:
+    return [get_password_hash(password) for password in passwords]
+
+
+def hash_passwords(passwords: Sequence[str]) -> List[str]:
+    """
+    批量哈希密码，数量较多时分块分发到进程池并行计算。
+    进程池中的哈希不经过本进程的槽位，因此每个在途的块在本进程占用一个哈希槽位：
+    导入与登录共用 PASSWORD_HASH_CONCURRENCY 的并发预算，导入期间登录照常排队或快速拒绝
+    """
+    if len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return [get_password_hash(password) for password in passwords]
+    slots = _hash_slots()
+    chunksize = max(1, len(passwords) // (hash_concurrency() * 4))
+    futures = []
+    for start in range(0, len(passwords), chunksize):
+        slots.acquire()
+        try:
+            future = get_hash_pool().submit(_hash_chunk, passwords[start:start + chunksize])
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        futures.append(future)
+    return [hashed for future in futures for hashed in future.result()]
+
+
+def parse_records(lines: Iterable[str], data_format: DataFormat) -> Iterator[Dict[str, Any]]:
+    """逐行解析 NDJSON 或 CSV，CSV 中的空值视为未提供；无法解析的行返回 None 交由校验阶段报错"""
+    if data_format == DataFormat.csv:
+        for record in csv.DictReader(lines):
+            yield {key: value for key, value in record.items() if key and value not in ("", None)}
+        return
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = None
+        yield record if isinstance(record, dict) else None
+
+
+def validate_batch(records: Sequence[Tuple[int, Optional[Dict[str, Any]]]], schema: type,
+                   report: ImportReport) -> List[Tuple[int, BaseModel]]:
+    """校验一批记录，失败的行记入报告"""
+    valid = []
+    for row, record in records:
+        if record is None:
+            add_error(report, row, "Malformed record")
+            continue
+        try:
+            valid.append((row, schema.model_validate(record)))
+        except ValidationError as e:
+            add_error(report, row, "; ".join(
+                f"{'.'.join(map(str, err['loc'])) or 'record'}: {err['msg']}" for err in e.errors()
+            ))
+    return valid
+
+
+def add_error(report: ImportReport, row: int, error: str) -> None:
+    report.errors.append(ImportRowError(row=row, error=error))
+    report.failed += 1
+
+
+def insert_rows(db: Session, model, rows: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> List[int]:
+    """
+    在一个事务内批量插入并返回新ID。整块失败时逐行重试，只有出错的行被记入报告。
+    """
+    if not rows:
+        return []
+    statement = insert(model).returning(model.id)
+    try:
+        ids = list(db.scalars(statement, [values for _, values in rows]))
+        db.flush()
+        return ids
+    except SQLAlchemyError:
+        db.rollback()
+
+    ids = []
+    for row, values in rows:
+        try:
+            with db.begin_nested():
+                ids.append(db.scalar(statement, values))
+        except SQLAlchemyError as e:
+            add_error(report, row, f"Insert failed: {e.orig if hasattr(e, 'orig') else e}")
+    return ids
+
+
+def resolve_project_names(db: Session, names: Iterable[str]) -> Dict[str, Optional[int]]:
+    """集合查询按名称解析项目ID，重名的项目解析为 None"""
+    names = set(names)
+    if not names:
+        return {}
+    resolved: Dict[str, Optional[int]] = {}
+    for project_id, name in db.execute(select(ProjectModel.id, ProjectModel.name).where(ProjectModel.name.in_(names))):
+        resolved[name] = None if name in resolved else project_id
+    return resolved
+
+
+def existing_ids(db: Session, model, ids: Iterable[int]) -> set:
+    ids = set(ids)
+    if not ids:
+        return set()
+    return set(db.scalars(select(model.id).where(model.id.in_(ids))))
+
+
+def import_users(db: Session, batch: List[Tuple[int, UserImport]], report: ImportReport) -> None:
+    """导入一批用户：校验密码长度，两次集合查询检查唯一性，批量哈希后一次写入"""
+    usernames = {user.username for _, user in batch}
+    emails = {user.email for _, user in batch}
+    taken_usernames = set(db.scalars(select(UserModel.username).where(UserModel.username.in_(usernames))))
+    taken_emails = set(db.scalars(select(UserModel.email).where(UserModel.email.in_(emails))))
+
+    accepted = []
+    for row, user in batch:
+        if len(user.password) < MIN_PASSWORD_LENGTH:
+            add_error(report, row, ErrorMessage.PASSWORD_TOO_SHORT)  # 与注册接口相同的密码规则
+        elif user.username in taken_usernames:
+            add_error(report, row, f"Username already exists: {user.username}")
+        elif user.email in taken_emails:
+            add_error(report, row, f"Email already exists: {user.email}")
+        else:
+            # 同一批次内的重复也需要拦截
+            taken_usernames.add(user.username)
+            taken_emails.add(user.email)
+            accepted.append((row, user))
+
+    hashed = hash_passwords([user.password for _, user in accepted])
+    rows = [
+        (row, {
+            "username": user.username, "email": user.email, "hashed_password": hashed_pw,
+            "role": user.role, "profile": user.profile or "", "outstanding": False,
+        })
+        for (row, user), hashed_pw in zip(accepted, hashed)
+    ]
+    ids = insert_rows(db, UserModel, rows, report)
+    record_change(db, CacheEntity.users, ids)
+    db.commit()
+    report.inserted += len(ids)
+
+
+def import_projects(db: Session, batch: List[Tuple[int, ProjectImport]], report: ImportReport) -> None:
+    """导入一批项目"""
+    rows = []
+    for row, project in batch:
+        values = project.model_dump()
+        values["planned_end"] = planned_end(project.start_time, project.end_time, project.estimated_duration)
+        rows.append((row, values))
+    ids = insert_rows(db, ProjectModel, rows, report)
+    record_change(db, CacheEntity.projects, ids)
+    db.commit()
+    report.inserted += len(ids)
+
+
+def import_tasks(db: Session, batch: List[Tuple[int, TaskImport]], report: ImportReport) -> None:
+    """导入一批任务：项目与负责人引用均通过集合查询一次解析"""
+    project_names = resolve_project_names(db, (t.project_name for _, t in batch if t.project_id is None))
+    known_projects = existing_ids(db, ProjectModel, (t.project_id for _, t in batch if t.project_id is not None))
+    head_usernames = {t.head_username for _, t in batch if t.head_username}
+    heads_by_username = dict(db.execute(
+        select(UserModel.username, UserModel.id).where(UserModel.username.in_(head_usernames))
+    ).all()) if head_usernames else {}
+    known_heads = existing_ids(db, UserModel, (t.head_id for _, t in batch if t.head_id is not None))
+
+    rows = []
+    for row, task in batch:
+        project_id = task.project_id if task.project_id is not None else project_names.get(task.project_name)
+        if task.project_id is not None and task.project_id not in known_projects:
+            add_error(report, row, f"Project not found: {task.project_id}")
+            continue
+        if project_id is None:
+            reason = "ambiguous" if task.project_name in project_names else "not found"
+            add_error(report, row, f"Project {reason}: {task.project_name}")
+            continue
+        head_id = task.head_id
+        if task.head_username:
+            head_id = heads_by_username.get(task.head_username)
+            if head_id is None:
+                add_error(report, row, f"Head user not found: {task.head_username}")
+                continue
+        elif head_id is not None and head_id not in known_heads:
+            add_error(report, row, f"Head user not found: {head_id}")
+            continue
+        rows.append((row, {
+            "name": task.name, "description": task.description, "workload": task.workload,
+            "finished": task.finished, "project_id": project_id, "head_id": head_id,
+        }))
+
+    ids = insert_rows(db, TaskModel, rows, report)
+    # 与 create_task 一致：负责人参与其负责的任务
+    inserted = db.execute(select(TaskModel.id, TaskModel.head_id, TaskModel.project_id).where(TaskModel.id.in_(ids))).all() if ids else []
+    add_assignments(db, [(task_id, head_id) for task_id, head_id, _ in inserted if head_id])
+    record_change(db, CacheEntity.tasks, ids)
+    db.commit()
+    report.inserted += len(ids)
+
+    changes = [update_project_progress(project_id, db)
+               for project_id in sorted({project_id for _, _, project_id in inserted})]
+    if any(changes):
+        # 进度变化事件要在项目缓存版本更新之后发布，不等到整个导入结束
+        bump_versions(CacheEntity.projects)
+        publish_progress_changed(*changes)
+
+
+def import_dependencies(db: Session, batch: List[Tuple[int, DependencyImport]], report: ImportReport) -> None:
+    """导入一批依赖边，已存在的边视为成功并跳过"""
+    names = {name for _, dep in batch for name in (dep.project_name, dep.depends_on_name) if name}
+    project_names = resolve_project_names(db, names)
+    known_projects = existing_ids(
+        db, ProjectModel, (i for _, dep in batch for i in (dep.project_id, dep.depends_on_id) if i is not None)
+    )
+
+    def resolve(project_id: Optional[int], name: Optional[str]) -> Tuple[Optional[int], str]:
+        if project_id is not None:
+            return (project_id, "") if project_id in known_projects else (None, f"Project not found: {project_id}")
+        resolved = project_names.get(name)
+        if resolved is None:
+            return None, f"Project {'ambiguous' if name in project_names else 'not found'}: {name}"
+        return resolved, ""
+
+    edges = []
+    for row, dep in batch:
+        project_id, error = resolve(dep.project_id, dep.project_name)
+        depends_on_id, dep_error = resolve(dep.depends_on_id, dep.depends_on_name)
+        if error or dep_error:
+            add_error(report, row, error or dep_error)
+        elif project_id == depends_on_id:
+            add_error(report, row, "Project cannot depend on itself")
+        else:
+            edges.append((row, (project_id, depends_on_id)))
+
+    pairs = {edge for _, edge in edges}
+    existing = set(db.execute(
+        select(project_dependencies.c.project_id, project_dependencies.c.depends_on_id)
+        .where(tuple_(project_dependencies.c.project_id, project_dependencies.c.depends_on_id).in_(pairs))
+    ).all()) if pairs else set()
+
+    # 逐条检查成环并维护闭包表，同一批中前面的边对后面的边可见
+    new_rows, seen, accepted = [], set(existing), 0
+    for row, edge in edges:
+        if edge in seen:
+            accepted += 1
+        elif reachability.cycle_dependencies(db, edge[0], [edge[1]]):
+            add_error(report, row, "Dependency would create a cycle")
+        else:
+            seen.add(edge)
+            reachability.add_edges(db, [edge])
+            new_rows.append({"project_id": edge[0], "depends_on_id": edge[1]})
+            accepted += 1
+    if new_rows:
+        db.execute(insert(project_dependencies), new_rows)
+    record_change(db, CacheEntity.projects, sorted({row["project_id"] for row in new_rows}))
+    db.commit()
+    report.inserted += accepted
+
+
+IMPORTERS = {
+    ImportEntity.users: import_users,
+    ImportEntity.projects: import_projects,
+    ImportEntity.tasks: import_tasks,
+    ImportEntity.dependencies: import_dependencies,
+}
+
+INVALIDATED_ENTITIES = {
+    ImportEntity.users: (CacheEntity.users,),
+    ImportEntity.projects: (CacheEntity.projects,),
+    ImportEntity.tasks: (CacheEntity.tasks, CacheEntity.projects, CacheEntity.users),
+    ImportEntity.dependencies: (CacheEntity.projects,),
+}
+
+
+def run_import(db: Session, entity: ImportEntity, lines: Iterable[str],
+               data_format: DataFormat = DataFormat.ndjson, batch_size: int = DEFAULT_BATCH_SIZE) -> ImportReport:
+    """
+    流式导入：按批读取、校验并写入，每批一个短事务；单行错误不会中断整批。
+    """
+    schema = IMPORT_SCHEMAS[entity]
+    importer = IMPORTERS[entity]
+    report = ImportReport(entity=entity.value)
+    records = enumerate(parse_records(lines, data_format), start=1)
+
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+        report.total += len(chunk)
+        batch = validate_batch(chunk, schema, report)
+        if batch:
+            importer(db, batch, report)
+
+    report.errors.sort(key=lambda error: error.row)
+    if report.inserted:
+        bump_versions(*INVALIDATED_ENTITIES[entity])
+        publish_event(f"{entity.value}.imported", count=report.inserted)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="批量导入项目、任务、用户与依赖关系")
+    parser.add_argument("entity", choices=[e.value for e in ImportEntity])
+    parser.add_argument("path", help="数据文件路径，- 表示标准输入")
+    parser.add_argument("--format", choices=[f.value for f in DataFormat], default=None,
+                        help="数据格式，默认根据扩展名判断")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    data_format = DataFormat(args.format) if args.format else (
+        DataFormat.csv if args.path.endswith(".csv") else DataFormat.ndjson
+    )
+    from app.db.session import SessionLocal, get_engine
+
+    db = SessionLocal(bind=get_engine())
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8", newline="")
+    try:
+        report = run_import(db, ImportEntity(args.entity), stream, data_format, args.batch_size)
+    finally:
+        db.close()
+        if stream is not sys.stdin:
+            stream.close()
+    print(report.model_dump_json(indent=2))
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# 静态区间树：区间按开始值排序后存放在数组中，数组本身视为隐式平衡二叉搜索树
+# （[lo, hi) 段的根是中点），每个节点额外记录其子树中最大的结束值。
+# 查询与 [low, high] 重叠的区间时，最大结束值小于 low 的子树、开始值大于 high 的右侧整段都被剪掉，
+# 代价为 O(log n + k)，k 为命中的区间数。构建一次 O(n log n)，之后只读，可在线程间共享。
+from bisect import bisect_right
+from typing import Any, Generic, Iterable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class IntervalTree(Generic[T]):
+    """闭区间 [start, end] 到值的静态区间树，start、end 只需可比较（如日期）"""
+
+    def __init__(self, intervals: Iterable[Tuple[Any, Any, T]]):
+        items = sorted(intervals, key=lambda item: item[0])
+        self.starts = [start for start, _, _ in items]
+        self.ends = [end for _, end, _ in items]
+        self.values: List[T] = [value for _, _, value in items]
+        self.max_ends = list(self.ends)
+        if items:
+            self._build(0, len(items))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _build(self, lo: int, hi: int) -> Any:
+        """自底向上计算 [lo, hi) 段根节点的子树最大结束值；树高 O(log n)，递归不会过深"""
+        mid = (lo + hi) // 2
+        best = self.ends[mid]
+        if lo < mid:
+            best = max(best, self._build(lo, mid))
+        if mid + 1 < hi:
+            best = max(best, self._build(mid + 1, hi))
+        self.max_ends[mid] = best
+        return best
+
+    def overlapping(self, low: Any, high: Any) -> List[T]:
+        """与闭区间 [low, high] 重叠（start <= high 且 end >= low）的区间的值，按开始值升序"""
+        # 开始值大于 high 的区间一定不重叠，只需在前缀 [0, limit) 中查找
+        limit = bisect_right(self.starts, high)
+        result: List[T] = []
+        starts, ends, max_ends, values = self.starts, self.ends, self.max_ends, self.values
+        # 中序遍历：栈中保存待访问的段，(lo, hi, expanded) 中 expanded 表示左子树已处理
+        stack = [(0, len(values), False)]
+        while stack:
+            lo, hi, expanded = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if not expanded:
+                if max_ends[mid] < low or lo >= limit:
+                    continue  # 整棵子树都在窗口之前结束，或都在窗口之后开始
+                stack.append((lo, hi, True))
+                stack.append((lo, mid, False))
+                continue
+            if mid >= limit:
+                continue
+            if ends[mid] >= low:
+                result.append(values[mid])
+            stack.append((mid + 1, hi, False))
+        return result
@@ -0,0 +1,468 @@
+# 后台任务：耗时的重算以任务行写入 jobs 表，接口立即返回任务ID，客户端轮询状态与进度。
+#
+# 每个服务进程启动 JOB_WORKERS 个工作线程，以单条 UPDATE ... RETURNING 原子地认领最早到期的待执行任务，
+# 多个进程共用同一个 SQLite 队列也不会重复执行；相同的待执行任务由部分唯一索引去重。
+# 维护线程按 JOB_SCHEDULE 为定时任务入队下一次执行，并处理失联的运行中任务与过期的任务记录。
+#
+# 命令行用法（在 backend 目录下），单独运行工作进程，此时服务进程可设置 JOB_WORKERS=0 只入队：
+#     python -m app.services.jobs [--workers 2] [--once]
+# 单独的工作进程中处理函数的缓存失效与变更事件须经跨进程失效通道才能到达服务进程：
+# 使用进程内缓存时工作进程自动启用 CACHE_INVALIDATION_BUS，服务进程也必须启用（app.server 多进程时自动启用），
+# 否则服务进程会一直返回任务执行前缓存的响应，SSE 客户端也收不到事件。
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime, time as dtime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.cache import bump_versions
+from app.core.config import settings
+from app.core.constants import CacheEntity, JobKind, JobStatus
+from app.core.events import publish_event
+from app.models.job import Job as JobModel
+from app.models.project import Project as ProjectModel
+from app.models.user import User as UserModel
+from app.schemas.job import JOB_PARAMS
+from app.services.export import stream_export
+from app.services.project import publish_progress_changed, update_project_progress
+from app.services.simulation import build_simulation
+from app.services.user import calculate_all_users_performance
+from app.services.tokens import purge_refresh_tokens
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 0.5  # 进度写入的最小间隔（秒），避免频繁占用 SQLite 写锁
+HEARTBEAT_INTERVAL = 30.0  # 处理函数执行期间写入心跳的间隔（秒），须远小于 JOB_STALE_MINUTES
+MAINTENANCE_INTERVAL = 60.0  # 维护线程的执行间隔（秒）
+
+ProgressCallback = Callable[[float], None]
+JobHandler = Callable[[Session, BaseModel, ProgressCallback, JobModel], Any]
+
+HANDLERS: Dict[JobKind, JobHandler] = {}
+
+# 本进程入队后唤醒空闲的工作线程，不必等到下一次轮询
+_wakeup = threading.Event()
+
+
+def job_handler(kind: JobKind) -> Callable[[JobHandler], JobHandler]:
+    """注册任务类型的处理函数：handler(db, 参数模型, 进度回调, 任务行) -> 可序列化为 JSON 的结果"""
+    def register(handler: JobHandler) -> JobHandler:
+        HANDLERS[kind] = handler
+        return handler
+    return register
+
+
+def encode_params(kind: JobKind, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    按任务类型校验参数（失败时抛出 pydantic.ValidationError），补全默认值后编码为键排序的 JSON，
+    含义相同的参数得到相同的编码，可直接用作去重键
+    """
+    model = JOB_PARAMS[kind].model_validate(params or {})
+    return orjson.dumps(model.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS).decode()
+
+
+def _pending_job(db: Session, dedup_key: str) -> Optional[JobModel]:
+    return db.query(JobModel).filter(
+        JobModel.dedup_key == dedup_key, JobModel.status == JobStatus.pending
+    ).first()
+
+
+def enqueue(
+    db: Session,
+    kind: JobKind,
+    params: Optional[Dict[str, Any]] = None,
+    created_by: Optional[int] = None,
+    run_after: Optional[datetime] = None,
+    dedup_suffix: str = "",
+) -> Tuple[JobModel, bool]:
+    """
+    提交任务并返回 (任务, 是否新建)。已有相同类型与参数的待执行任务时直接返回该任务；
+    并发入队由部分唯一索引兜底。run_after 为 UTC 时间，缺省立即执行
+    """
+    encoded = encode_params(kind, params)
+    dedup_key = f"{kind.value}:{encoded}{dedup_suffix}"
+    existing = _pending_job(db, dedup_key)
+    if existing is not None:
+        return existing, False
+    now = datetime.utcnow()
+    job = JobModel(kind=kind, params=encoded, dedup_key=dedup_key, status=JobStatus.pending,
+                   created_by=created_by, created_at=now, run_after=run_after or now)
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        existing = _pending_job(db, dedup_key)
+        if existing is None:
+            raise
+        return existing, False
+    db.refresh(job)
+    _wakeup.set()
+    return job, True
+
+
+def job_dict(job: JobModel) -> dict:
+    """与 Job 输出模型一致的字典"""
+    return {
+        "id": job.id, "kind": job.kind, "status": job.status, "progress": job.progress,
+        "params": orjson.loads(job.params),
+        "result": orjson.loads(job.result) if job.result is not None else None,
+        "error": job.error, "created_at": job.created_at, "run_after": job.run_after,
+        "started_at": job.started_at, "finished_at": job.finished_at,
+    }
+
+
+def claim_next(db: Session) -> Optional[int]:
+    """原子地把最早到期的待执行任务标记为运行中并返回其ID，没有可执行的任务时返回 None"""
+    now = datetime.utcnow()
+    next_id = (
+        select(JobModel.id)
+        .where(JobModel.status == JobStatus.pending, JobModel.run_after <= now)
+        .order_by(JobModel.run_after, JobModel.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    job_id = db.execute(
+        update(JobModel)
+        .where(JobModel.id == next_id, JobModel.status == JobStatus.pending)
+        .values(status=JobStatus.running, started_at=now, heartbeat_at=now)
+        .returning(JobModel.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.commit()
+    return job_id
+
+
+class ProgressReporter:
+    """
+    进度回调：在独立会话的短事务中写入进度与心跳，间隔不足 PROGRESS_INTERVAL 的上报只保留最新值。
+    SQLite 同时只有一个写事务，处理函数需在提交自己的事务之后再上报进度！
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], job_id: int):
+        self.session_factory = session_factory
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    def __call__(self, fraction: float) -> None:
+        now = time.monotonic()
+        if fraction < 1 and now - self._last_write < PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        db = self.session_factory()
+        try:
+            db.execute(update(JobModel).where(JobModel.id == self.job_id)
+                       .values(progress=min(max(fraction, 0.0), 1.0), heartbeat_at=datetime.utcnow()))
+            db.commit()
+        finally:
+            db.close()
+
+
+class Heartbeat:
+    """
+    处理函数执行期间由独立线程每 HEARTBEAT_INTERVAL 秒写入一次心跳，
+    不上报进度的处理函数（绩效计算、模拟、导出）也不会被维护线程误判为失联
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], job_id: int):
+        self.session_factory = session_factory
+        self.job_id = job_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"job-heartbeat-{job_id}", daemon=True)
+
+    def _beat(self) -> None:
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            db = self.session_factory()
+            try:
+                db.execute(update(JobModel)
+                           .where(JobModel.id == self.job_id, JobModel.status == JobStatus.running)
+                           .values(heartbeat_at=datetime.utcnow()))
+                db.commit()
+            except Exception:
+                logger.exception("后台任务 %s 写入心跳失败", self.job_id)
+            finally:
+                db.close()
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def run_job(session_factory: Callable[[], Session], job_id: int) -> JobStatus:
+    """
+    执行一个已认领的任务，结果或失败原因写回任务行。
+    任务在执行期间已被维护线程标记为失败时保留失败状态，不以执行结果覆盖
+    """
+    db = session_factory()
+    try:
+        job = db.get(JobModel, job_id)
+        values: Dict[str, Any]
+        try:
+            params = JOB_PARAMS[job.kind].model_validate_json(job.params)
+            with Heartbeat(session_factory, job_id):
+                result = HANDLERS[job.kind](db, params, ProgressReporter(session_factory, job_id), job)
+            values = {"status": JobStatus.succeeded, "progress": 1.0,
+                      "result": orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY).decode()}
+        except Exception as exc:
+            db.rollback()
+            logger.exception("后台任务 %s（%s）执行失败", job_id, job.kind.value)
+            values = {"status": JobStatus.failed, "error": str(exc) or type(exc).__name__}
+        updated = db.execute(update(JobModel).where(JobModel.id == job_id, JobModel.status == JobStatus.running)
+                             .values(finished_at=datetime.utcnow(), **values)).rowcount
+        db.commit()
+        if not updated:
+            logger.warning("后台任务 %s（%s）执行期间已被标记为失败，丢弃执行结果", job_id, job.kind.value)
+            return JobStatus.failed
+        publish_event("job.finished", id=job_id, status=values["status"].value)
+        return values["status"]
+    finally:
+        db.close()
+
+
+# ---------- 定时任务与维护 ----------
+
+def parse_schedule(spec: str) -> List[Tuple[JobKind, dtime]]:
+    """解析 JOB_SCHEDULE："users.performance@02:00,projects.progress@03:30"，格式错误时抛出 ValueError"""
+    entries = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        kind, _, at = item.partition("@")
+        entries.append((JobKind(kind.strip()), dtime.fromisoformat(at.strip())))
+    return entries
+
+
+def next_run(at: dtime, now: datetime) -> datetime:
+    """本地时间 now 之后（不含）下一次到达 at 的本地时间"""
+    run = datetime.combine(now.date(), at)
+    return run if run > now else run + timedelta(days=1)
+
+
+def schedule_jobs(db: Session, schedule: Sequence[Tuple[JobKind, dtime]], now: Optional[datetime] = None) -> None:
+    """
+    为每个定时任务入队下一次执行。去重键包含计划时间：
+    各进程计算出相同的键，同一次执行只入队一次；手动提交的同类任务不受影响
+    """
+    now = now or datetime.now()
+    for kind, at in schedule:
+        run = next_run(at, now)
+        run_after = run.astimezone(timezone.utc).replace(tzinfo=None)
+        enqueue(db, kind, run_after=run_after, dedup_suffix=f"@{run.isoformat()}")
+
+
+def fail_stale_jobs(db: Session, stale_before: datetime) -> int:
+    """心跳早于 stale_before 的运行中任务视为执行它的进程已退出，标记为失败"""
+    result = db.execute(
+        update(JobModel)
+        .where(JobModel.status == JobStatus.running, JobModel.heartbeat_at < stale_before)
+        .values(status=JobStatus.failed, error="worker lost", finished_at=datetime.utcnow())
+    )
+    db.commit()
+    return result.rowcount
+
+
+def purge_jobs(db: Session, finished_before: datetime) -> int:
+    """删除早于 finished_before 结束的任务及其导出文件"""
+    finished = (JobModel.status.in_([JobStatus.succeeded, JobStatus.failed]),
+                JobModel.finished_at < finished_before)
+    for job_id, kind, result in db.execute(select(JobModel.id, JobModel.kind, JobModel.result).where(*finished)):
+        if kind == JobKind.export and result:
+            Path(orjson.loads(result)["path"]).unlink(missing_ok=True)
+    deleted = db.execute(delete(JobModel).where(*finished)).rowcount
+    db.commit()
+    return deleted
+
+
+class JobRunner:
+    """
+    进程内的任务执行器：workers 个线程循环认领并执行任务，队列为空时等待 poll_interval 秒或被入队唤醒；
+    另有一个维护线程负责定时任务入队、失联任务与过期记录（含过期的刷新令牌）
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], workers: int = 1, poll_interval: float = 1.0,
+                 schedule: Sequence[Tuple[JobKind, dtime]] = ()):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.schedule = list(schedule)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def claim(self) -> Optional[int]:
+        db = self.session_factory()
+        try:
+            return claim_next(db)
+        finally:
+            db.close()
+
+    def run_pending(self) -> int:
+        """在当前线程依次执行全部已到期的任务，返回执行的任务数（测试与 --once 使用）"""
+        count = 0
+        while (job_id := self.claim()) is not None:
+            run_job(self.session_factory, job_id)
+            count += 1
+        return count
+
+    def maintain(self) -> None:
+        db = self.session_factory()
+        try:
+            schedule_jobs(db, self.schedule)
+            now = datetime.utcnow()
+            fail_stale_jobs(db, now - timedelta(minutes=settings.JOB_STALE_MINUTES))
+            purge_jobs(db, now - timedelta(days=settings.JOB_RETENTION_DAYS))
+            purge_refresh_tokens(db, now)
+        finally:
+            db.close()
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job_id = self.claim()
+            except Exception:
+                logger.exception("认领后台任务失败")
+                job_id = None
+            if job_id is None:
+                _wakeup.wait(self.poll_interval)
+                _wakeup.clear()
+                continue
+            run_job(self.session_factory, job_id)
+
+    def _maintain_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.maintain()
+            except Exception:
+                logger.exception("后台任务维护失败")
+            self._stop.wait(MAINTENANCE_INTERVAL)
+
+    def start(self) -> None:
+        targets = [self._work] * self.workers + [self._maintain_loop]
+        for index, target in enumerate(targets):
+            name = f"job-worker-{index}" if index < self.workers else "job-maintenance"
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """停止认领新任务并等待线程退出；正在执行的任务超时后由守护线程随进程结束"""
+        self._stop.set()
+        _wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+
+_runner: Optional[JobRunner] = None
+
+
+def start_job_runner(session_factory: Callable[[], Session]) -> Optional[JobRunner]:
+    """按配置启动本进程的任务执行器（JOB_WORKERS 为 0 时不启动），在应用启动时调用"""
+    global _runner
+    if settings.JOB_WORKERS <= 0 and settings.CACHE_BACKEND == "memory" and not settings.CACHE_INVALIDATION_BUS:
+        logger.warning("JOB_WORKERS=0 且未启用 CACHE_INVALIDATION_BUS：单独的工作进程执行的任务不会使本进程的缓存失效")
+    if _runner is None and settings.JOB_WORKERS > 0:
+        _runner = JobRunner(session_factory, settings.JOB_WORKERS, settings.JOB_POLL_MS / 1000,
+                            parse_schedule(settings.JOB_SCHEDULE))
+        _runner.start()
+    return _runner
+
+
+def stop_job_runner() -> None:
+    global _runner
+    if _runner is not None:
+        _runner.stop()
+        _runner = None
+
+
+# ---------- 任务处理函数 ----------
+
+@job_handler(JobKind.users_performance)
+def run_users_performance(db: Session, params, progress: ProgressCallback, job: JobModel) -> dict:
+    """计算全员绩效并评定优秀员工"""
+    calculate_all_users_performance(db)
+    db.commit()
+    bump_versions(CacheEntity.users)
+    publish_event("users.performance_calculated")
+    outstanding = db.scalar(select(func.count()).select_from(UserModel).where(UserModel.outstanding.is_(True)))
+    return {"outstanding": outstanding}
+
+
+@job_handler(JobKind.projects_progress)
+def run_projects_progress(db: Session, params, progress: ProgressCallback, job: JobModel) -> dict:
+    """逐个项目重新计算当天进度，每个项目单独提交，进度按已处理的项目数上报"""
+    query = select(ProjectModel.id).order_by(ProjectModel.id)
+    if params.project_ids is not None:
+        query = query.where(ProjectModel.id.in_(params.project_ids))
+    project_ids = list(db.scalars(query))
+    changes = []
+    for done, project_id in enumerate(project_ids, 1):
+        changes.append(update_project_progress(project_id, db))
+        db.commit()
+        progress(done / len(project_ids))
+    bump_versions(CacheEntity.projects)
+    publish_progress_changed(*changes)
+    return {"projects": len(project_ids)}
+
+
+@job_handler(JobKind.gantt_simulation)
+def run_gantt_simulation(db: Session, params, progress: ProgressCallback, job: JobModel) -> dict:
+    """排程风险模拟快照，结果与 /gantt/simulation 一致"""
+    return build_simulation(db, params.trials, params.seed, params.distribution, params.optimistic,
+                            params.pessimistic, workers=settings.SIMULATION_WORKERS or os.cpu_count() or 1)
+
+
+@job_handler(JobKind.export)
+def run_export(db: Session, params, progress: ProgressCallback, job: JobModel) -> dict:
+    """导出到 JOB_OUTPUT_DIR 下的文件，写完后再改名，下载接口不会读到未写完的文件"""
+    directory = Path(settings.JOB_OUTPUT_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"job-{job.id}.{params.format.value}"
+    partial = path.with_suffix(path.suffix + ".part")
+    with partial.open("wb") as output:
+        for chunk in stream_export(db.get_bind(), params.entity, params.format, params.project_id):
+            output.write(chunk)
+    partial.replace(path)
+    return {"path": str(path), "filename": f"{params.entity.value}.{params.format.value}",
+            "bytes": path.stat().st_size}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="运行后台任务工作进程")
+    parser.add_argument("--workers", type=int, default=None, help="工作线程数，缺省为 JOB_WORKERS（至少 1）")
+    parser.add_argument("--once", action="store_true", help="执行完当前已到期的任务后退出")
+    args = parser.parse_args(argv)
+
+    from app.db.session import SessionLocal, get_engine
+
+    if settings.CACHE_BACKEND == "memory" and not settings.CACHE_INVALIDATION_BUS:
+        # 进程内缓存的版本号与事件只在本进程有效，经失效通道才能通知服务进程
+        settings.CACHE_INVALIDATION_BUS = True
+        print("已启用 CACHE_INVALIDATION_BUS，服务进程也需启用才能看到任务结果引起的缓存失效与事件")
+    get_engine()
+    if args.once:
+        print(f"已执行 {JobRunner(SessionLocal).run_pending()} 个任务")
+        return 0
+    runner = JobRunner(SessionLocal, args.workers or settings.JOB_WORKERS or 1, settings.JOB_POLL_MS / 1000,
+                       parse_schedule(settings.JOB_SCHEDULE))
+    runner.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        runner.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,9 +4,12 @@ from app.models.task import Task as TaskModel
 from app.schemas.project import ProjectProgress
 from app.schemas.burndown import RiskLevel
 from datetime import date
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta
 from fastapi import HTTPException
+from app.core.events import publish_event
+from app.core.constants import CacheEntity
+from app.services.sync import record_change
 
 PROGRESS_DEVIATION_THRESHOLDS = {
     RiskLevel.LOW: 0.05,      # 5%
@@ -23,9 +26,11 @@ EFFICIENCY_THRESHOLDS = {
 }
 
 
-def update_project_progress(project_id: int, db: Session) -> float:
+def update_project_progress(project_id: int, db: Session) -> Optional[Dict[str, Any]]:
     """
-    计算、更新并返回当天项目的进度。需要在每次项目状态变更时调用！
+    计算并更新当天项目的进度。需要在每次项目状态变更时调用！
+    进度有变化时返回 project.progress_changed 事件的数据，调用方在 bump_versions 之后交给
+    publish_progress_changed 发布，客户端收到事件再拉取时不会命中旧版本的缓存
     """
     project = db.query(ProjectModel).filter(ProjectModel.id == project_id).first()
     if not project:
@@ -34,7 +39,7 @@ def update_project_progress(project_id: int, db: Session) -> float:
     # 计算项目进度
     tasks = db.query(TaskModel).filter(TaskModel.project_id == project_id).all()
     if not tasks:
-        return 0.0
+        return None
     total_weight = sum(task.workload.weight for task in tasks)
     completed_weight = sum(task.workload.weight for task in tasks if task.finished)
     progress = completed_weight / total_weight if total_weight > 0 else 0.0
@@ -44,6 +49,7 @@ def update_project_progress(project_id: int, db: Session) -> float:
         project.status = "in_progress"
     else:
         project.status = "completed"
+    record_change(db, CacheEntity.projects, [project_id])  # 状态与进度随之变化
     today = date.today()
     
     # 检查今天是否已有进度记录
@@ -54,10 +60,11 @@ def update_project_progress(project_id: int, db: Session) -> float:
     
     if existing_progress:
         # 更新现有记录
+        changed = existing_progress.progress != progress
         existing_progress.progress = progress
         db.commit()
-        db.refresh(existing_progress)
-        return existing_progress
+        if not changed:
+            return None
     else:
         # 创建新记录
         progress_record = ProjectProgressModel(
@@ -67,10 +74,15 @@ def update_project_progress(project_id: int, db: Session) -> float:
         )
         db.add(progress_record)
         db.commit()
-        db.refresh(progress_record)
-        return progress_record
+    return {"id": project_id, "progress": progress, "status": project.status.value}
 
 
+def publish_progress_changed(*changes: Optional[Dict[str, Any]]) -> None:
+    """发布 update_project_progress 返回的进度变化事件，需在 bump_versions 之后调用"""
+    for change in changes:
+        if change is not None:
+            publish_event("project.progress_changed", **change)
+
 
 def get_filled_project_progress(project_id: int, db: Session) -> List[ProjectProgress]:
     """
@@ -0,0 +1,117 @@
+# 项目依赖的可达性索引：闭包表 project_reachability 为每一对 (上游项目, 下游项目) 保存一行，
+# "A 是否在 B 的上游"与"新增依赖是否成环"都只需一次主键查找，不再遍历依赖图。
+# 新增依赖边时增量补充；删除依赖边或项目时只重建受影响项目（该项目及其全部下游）的行。
+# 闭包行数等于各项目上游数量之和，适合项目群内依赖、群间稀疏的组合；稠密的全局依赖图会让闭包表接近平方规模。
+from typing import Iterable, List, Sequence, Tuple
+
+from sqlalchemy import delete, exists, insert, literal, or_, select, union
+
+from app.models.project import project_dependencies, project_reachability
+
+CHUNK_SIZE = 500  # 单条语句中的项目ID数量上限，避免超出 SQLite 参数个数限制
+
+ancestor = project_reachability.c.ancestor_id
+descendant = project_reachability.c.descendant_id
+
+
+def is_upstream(db, ancestor_id: int, descendant_id: int) -> bool:
+    """ancestor_id 是否直接或间接被 descendant_id 依赖"""
+    return db.execute(
+        select(literal(True)).where(ancestor == ancestor_id, descendant == descendant_id)
+    ).first() is not None
+
+
+def cycle_dependencies(db, project_id: int, depends_on_ids: Iterable[int]) -> List[int]:
+    """
+    返回会与 project_id 形成循环的依赖项目：项目自身，或已经（直接或间接）依赖 project_id 的项目
+    """
+    depends_on_ids = set(depends_on_ids)
+    cycles = {project_id} & depends_on_ids
+    if depends_on_ids - cycles:
+        cycles.update(db.scalars(
+            select(descendant).where(ancestor == project_id, descendant.in_(depends_on_ids - cycles))
+        ))
+    return sorted(cycles)
+
+
+def add_edges(db, edges: Iterable[Tuple[int, int]]) -> None:
+    """
+    新增依赖边 (项目ID, 所依赖的项目ID) 后补充可达关系：
+    被依赖项目及其上游 × 项目及其下游，已存在的跳过。调用方需先用 cycle_dependencies 排除成环的边！
+    """
+    for project_id, depends_on_id in edges:
+        upstream = union(
+            select(literal(depends_on_id).label("id")),
+            select(ancestor.label("id")).where(descendant == depends_on_id),
+        ).subquery()
+        downstream = union(
+            select(literal(project_id).label("id")),
+            select(descendant.label("id")).where(ancestor == project_id),
+        ).subquery()
+        pairs = select(upstream.c.id, downstream.c.id).where(
+            ~exists().where(ancestor == upstream.c.id, descendant == downstream.c.id)
+        )
+        db.execute(insert(project_reachability).from_select(["ancestor_id", "descendant_id"], pairs))
+
+
+def insert_ancestor_rows(db, project_ids: Sequence[int]) -> None:
+    """
+    按依赖边为指定项目写入全部上游行（调用方需保证这些项目当前没有上游行）。
+    递归 CTE 以 UNION 去重，即使存在循环依赖也能终止；项目自身不作为自己的上游
+    """
+    for start in range(0, len(project_ids), CHUNK_SIZE):
+        chunk = list(project_ids[start:start + CHUNK_SIZE])
+        pairs = select(
+            project_dependencies.c.project_id.label("descendant_id"),
+            project_dependencies.c.depends_on_id.label("ancestor_id"),
+        ).where(project_dependencies.c.project_id.in_(chunk)).cte("reachable_pairs", recursive=True)
+        pairs = pairs.union(
+            select(pairs.c.descendant_id, project_dependencies.c.depends_on_id)
+            .where(project_dependencies.c.project_id == pairs.c.ancestor_id)
+        )
+        db.execute(insert(project_reachability).from_select(
+            ["descendant_id", "ancestor_id"],
+            select(pairs.c.descendant_id, pairs.c.ancestor_id).where(pairs.c.descendant_id != pairs.c.ancestor_id),
+        ))
+
+
+def refresh(db, project_ids: Iterable[int]) -> None:
+    """
+    删除依赖边后重建受影响项目的可达关系：只有这些项目及其下游的上游集合会变化。
+    下游集合取自修改前的闭包表（只会多不会少），需要在依赖边写入（flush）之后、闭包表被改动之前调用
+    """
+    project_ids = list(project_ids)
+    affected = set(project_ids)
+    for start in range(0, len(project_ids), CHUNK_SIZE):
+        affected.update(db.scalars(
+            select(descendant).where(ancestor.in_(project_ids[start:start + CHUNK_SIZE]))
+        ))
+    affected = sorted(affected)
+    for start in range(0, len(affected), CHUNK_SIZE):
+        db.execute(delete(project_reachability).where(descendant.in_(affected[start:start + CHUNK_SIZE])))
+    insert_ancestor_rows(db, affected)
+
+
+def replace_dependencies(db, project_id: int, old_ids: Iterable[int], new_ids: Iterable[int]) -> None:
+    """项目的依赖集合由 old_ids 改为 new_ids 后维护闭包表：只新增时增量补充，有删除时重建受影响项目"""
+    old_ids, new_ids = set(old_ids), set(new_ids)
+    if old_ids - new_ids:
+        refresh(db, [project_id])
+    else:
+        add_edges(db, [(project_id, depends_on_id) for depends_on_id in sorted(new_ids - old_ids)])
+
+
+def remove_project(db, project_id: int) -> None:
+    """项目及其依赖边删除（flush）后，移除它的可达关系并重建其下游项目"""
+    downstream = list(db.scalars(select(descendant).where(ancestor == project_id)))
+    db.execute(delete(project_reachability).where(or_(ancestor == project_id, descendant == project_id)))
+    for start in range(0, len(downstream), CHUNK_SIZE):
+        db.execute(delete(project_reachability).where(descendant.in_(downstream[start:start + CHUNK_SIZE])))
+    insert_ancestor_rows(db, downstream)
+
+
+def rebuild(db) -> None:
+    """按依赖边全量重建闭包表"""
+    db.execute(delete(project_reachability))
+    project_ids = sorted(set(db.scalars(select(project_dependencies.c.project_id).distinct())))
+    insert_ancestor_rows(db, project_ids)
@@ -0,0 +1,102 @@
+# 列表接口的快速序列化：直接从行元组构建响应字典，跳过 ORM 实例化与二次校验
+from collections import defaultdict
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+from typing import Dict, List
+from app.models.project import Project as ProjectModel, ProjectProgress as ProjectProgressModel
+from app.models.task import Task as TaskModel
+
+# 字段顺序与 app.schemas.task.Task 保持一致
+TASK_COLUMNS = (
+    TaskModel.name, TaskModel.description, TaskModel.workload, TaskModel.finished,
+    TaskModel.project_id, TaskModel.head_id, TaskModel.participant_count, TaskModel.id,
+)
+TASK_FIELDS = ("name", "description", "workload", "finished", "project_id", "head_id", "participant_count", "id")
+
+# 字段顺序与 app.schemas.project.Project 保持一致（progress 与 tasks 单独补充）
+PROJECT_COLUMNS = (
+    ProjectModel.name, ProjectModel.description, ProjectModel.status, ProjectModel.estimated_duration,
+    ProjectModel.start_time, ProjectModel.end_time, ProjectModel.id,
+)
+PROJECT_FIELDS = ("name", "description", "status", "estimated_duration", "start_time", "end_time", "id")
+
+
+def scope_to_projects(query, column, project_ids):
+    """
+    按 project_ids 限定查询的项目范围：ID 集合用 IN 过滤；单列子查询（如依赖闭包）以连接驱动，
+    按索引逐个查找，避免 IN 子查询被规划为全表扫描
+    """
+    if project_ids is None:
+        return query
+    if isinstance(project_ids, Select):
+        scope = project_ids.subquery()
+        return query.join(scope, scope.c[0] == column)
+    return query.filter(column.in_(project_ids))
+
+
+def fetch_task_dicts(db: Session, *criteria) -> List[dict]:
+    """
+    查询任务并返回与 Task 输出模型一致的字典列表，按ID排序（命中复合索引时返回顺序不再是插入顺序）
+    """
+    rows = db.query(*TASK_COLUMNS).filter(*criteria).order_by(TaskModel.id).all()
+    return [dict(zip(TASK_FIELDS, row)) for row in rows]
+
+
+def fetch_latest_progress(db: Session, project_ids=None) -> Dict[int, float]:
+    """
+    一次查询获取每个项目最新日期的进度，与 Project.progress 属性语义一致。
+    project_ids（ID 集合或子查询）限定项目范围
+    """
+    if isinstance(project_ids, Select):
+        # 子查询限定范围时逐个项目沿 (project_id, date) 索引倒序取一条，代价与范围内的项目数成正比，
+        # 不必对这些项目的全部进度记录分组求最大日期
+        scope = project_ids.subquery()
+        latest = (
+            select(ProjectProgressModel.progress)
+            .where(ProjectProgressModel.project_id == scope.c[0])
+            .order_by(ProjectProgressModel.date.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        return {project_id: progress for project_id, progress in db.execute(select(scope.c[0], latest))
+                if progress is not None}
+    latest_dates = db.query(
+        ProjectProgressModel.project_id.label("project_id"),
+        func.max(ProjectProgressModel.date).label("date"),
+    )
+    latest_dates = scope_to_projects(latest_dates, ProjectProgressModel.project_id, project_ids)
+    latest_dates = latest_dates.group_by(ProjectProgressModel.project_id).subquery()
+    rows = (
+        db.query(ProjectProgressModel.project_id, ProjectProgressModel.progress)
+        .join(
+            latest_dates,
+            (ProjectProgressModel.project_id == latest_dates.c.project_id)
+            & (ProjectProgressModel.date == latest_dates.c.date),
+        )
+        .all()
+    )
+    return dict(rows)
+
+
+def fetch_project_dicts(db: Session, project_ids=None) -> List[dict]:
+    """
+    查询项目及其任务、最新进度，返回与 Project 输出模型一致的字典列表。
+    固定三次查询，不随项目数量增长。project_ids（ID 集合或子查询）限定项目范围
+    """
+    progress_by_project = fetch_latest_progress(db, project_ids)
+    tasks_by_project: Dict[int, List[dict]] = defaultdict(list)
+    tasks = scope_to_projects(db.query(*TASK_COLUMNS), TaskModel.project_id, project_ids)
+    # 按项目分组后组内仍按ID排序；先按 project_id 排序让限定范围时沿 (project_id, finished) 索引查找
+    for row in tasks.order_by(TaskModel.project_id, TaskModel.id):
+        tasks_by_project[row.project_id].append(dict(zip(TASK_FIELDS, row)))
+
+    query = db.query(*PROJECT_COLUMNS)
+    if project_ids is not None:
+        query = scope_to_projects(query, ProjectModel.id, project_ids).order_by(ProjectModel.id)
+    projects = []
+    for row in query.all():
+        project = dict(zip(PROJECT_FIELDS, row))
+        project["progress"] = progress_by_project.get(project["id"], 0.0)
+        project["tasks"] = tasks_by_project.get(project["id"], [])
+        projects.append(project)
+    return projects
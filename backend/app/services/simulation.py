@@ -0,0 +1,183 @@
+# 蒙特卡洛排程风险模拟：按分布抽样每个项目的剩余工期，沿依赖图推算整体完工时间的分位数与各项目的关键度。
+# 以 (项目数, 试验数) 矩阵按拓扑序逐行计算，每个项目一次向量运算覆盖一批试验；
+# 试验分批计算以限制内存，各批使用独立的随机种子，结果与批的执行位置（单进程或进程池）无关。
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import List, NamedTuple, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.constants import SimulationDistribution
+from app.services.cpm import build_csr, compute_cpm, index_edges, load_cpm_inputs, topological_order
+
+PERCENTILES = (50, 80, 95)
+MAX_TRIALS = 100_000
+# 每批试验的矩阵元素数上限（项目数 × 试验数），float64 下单个矩阵约 32MB
+CHUNK_CELLS = 4_000_000
+# 分位数表的分段数，抽样的概率分辨率为其倒数
+QUANTILE_STEPS = 65536
+# 判断零时差的容差（天）
+CRITICAL_TOLERANCE = 1e-6
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_simulation_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    懒加载模拟进程池，在请求与后台任务之间共享（spawn 方式启动，避免在多线程服务进程中 fork）。
+    需要的进程数变多时替换为更大的进程池
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or workers > _pool_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+class SimulationGraph(NamedTuple):
+    """按下标表示的依赖图：拓扑序、每个项目的前置与后续项目下标（无则为 None）"""
+    order: List[int]
+    predecessors: List[Optional[list]]
+    successors: List[Optional[list]]
+
+
+def build_simulation_graph(count: int, sources: Sequence[int], targets: Sequence[int]) -> SimulationGraph:
+    """由边列表构造模拟用的依赖图，存在循环依赖时抛出 CircularDependencyError"""
+    succ_offsets, succ = build_csr(count, sources, targets)
+    pred_offsets, pred = build_csr(count, targets, sources)
+    order = topological_order(count, succ_offsets, succ)
+
+    def neighbour_lists(offsets, neighbours):
+        return [neighbours[offsets[i]:offsets[i + 1]] or None for i in range(count)]
+
+    return SimulationGraph(order, neighbour_lists(pred_offsets, pred), neighbour_lists(succ_offsets, succ))
+
+
+def quantile_table(distribution: SimulationDistribution, optimistic: float, pessimistic: float):
+    """
+    工期倍数分布的分位数表：最可能值为 1，取值范围 [optimistic, pessimistic]。
+    pert 为 PERT（Beta）分布，triangular 为三角分布。
+    由密度函数数值积分得到，抽样时用均匀随机下标查表，比逐个生成 Beta 随机数快数倍
+    """
+    import numpy as np
+
+    width = pessimistic - optimistic
+    if width <= 0:
+        return np.ones(QUANTILE_STEPS + 1)
+    mode = (1 - optimistic) / width  # 标准化到 [0, 1] 后的最可能值
+    t = np.linspace(0, 1, QUANTILE_STEPS + 1)
+    if distribution == SimulationDistribution.pert:
+        density = t ** (4 * mode) * (1 - t) ** (4 * (1 - mode))
+    else:
+        density = np.where(t < mode, t / max(mode, 1e-12), (1 - t) / max(1 - mode, 1e-12))
+    cdf = np.concatenate([[0.0], np.cumsum((density[1:] + density[:-1]) / 2)])
+    cdf /= cdf[-1]
+    return optimistic + width * np.interp(np.linspace(0, 1, QUANTILE_STEPS + 1), cdf, t)
+
+
+def simulate_chunk(base, graph: SimulationGraph, trials: int, seed, quantiles):
+    """
+    模拟一批试验，返回 (每次试验的完工天数, 每个项目处于关键路径上的次数)。
+    正推得到最早完成时间，逆推得到最晚开始时间，两者之差为零的项目即该次试验中的关键项目
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    duration = base[:, None] * quantiles[rng.integers(0, len(quantiles), size=(len(base), trials))]
+
+    finish = np.empty_like(duration)
+    for node in graph.order:
+        preds = graph.predecessors[node]
+        if preds is None:
+            finish[node] = duration[node]
+        elif len(preds) == 1:
+            np.add(finish[preds[0]], duration[node], out=finish[node])
+        else:
+            np.add(finish[preds].max(axis=0), duration[node], out=finish[node])
+    makespan = finish.max(axis=0) if len(base) else np.zeros(trials)
+
+    latest_start = np.empty_like(duration)
+    for node in reversed(graph.order):
+        succs = graph.successors[node]
+        if succs is None:
+            np.subtract(makespan, duration[node], out=latest_start[node])
+        elif len(succs) == 1:
+            np.subtract(latest_start[succs[0]], duration[node], out=latest_start[node])
+        else:
+            np.subtract(latest_start[succs].min(axis=0), duration[node], out=latest_start[node])
+
+    # 总时差 = 最晚开始 - 最早开始 = 最晚开始 + 工期 - 最早完成
+    latest_start += duration
+    latest_start -= finish
+    critical_counts = (latest_start <= CRITICAL_TOLERANCE).sum(axis=1)
+    return makespan, critical_counts
+
+
+def chunk_sizes(trials: int, projects: int) -> List[int]:
+    """按 CHUNK_CELLS 把试验拆分为若干批"""
+    size = max(1, min(trials, CHUNK_CELLS // max(projects, 1)))
+    return [min(size, trials - start) for start in range(0, trials, size)]
+
+
+def simulate(ids: Sequence[int], durations: Sequence[float], edges, trials: int = 1000, seed: int = 0,
+             distribution: SimulationDistribution = SimulationDistribution.pert,
+             optimistic: float = 0.8, pessimistic: float = 1.5, workers: int = 1) -> dict:
+    """
+    蒙特卡洛模拟整体完工时间。durations 为各项目的最可能剩余工期（天），edges 与 compute_cpm 相同。
+    返回完工天数的分位数（finish_days）与各项目的关键度（criticality，处于关键路径上的试验比例，按 ids 顺序）。
+    workers 大于 1 时各批试验分到进程池中计算，相同 seed 的结果不变
+    """
+    import numpy as np
+
+    distribution = SimulationDistribution(distribution)
+    if not optimistic <= 1 <= pessimistic:
+        raise ValueError("optimistic must be <= 1 <= pessimistic")
+    ids = list(ids)
+    graph = build_simulation_graph(len(ids), *index_edges(ids, edges))
+    base = np.asarray(durations, dtype=np.float64)
+    sizes = chunk_sizes(trials, len(ids))
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    quantiles = quantile_table(distribution, optimistic, pessimistic)
+    args = [(base, graph, size, chunk_seed, quantiles) for size, chunk_seed in zip(sizes, seeds)]
+
+    if workers > 1 and len(args) > 1:
+        results = list(get_simulation_pool(workers).map(simulate_chunk, *zip(*args)))
+    else:
+        results = [simulate_chunk(*chunk) for chunk in args]
+
+    makespans = np.concatenate([makespan for makespan, _ in results])
+    critical_counts = sum(counts for _, counts in results)
+    return {
+        "trials": trials,
+        "finish_days": {f"p{q}": float(value) for q, value in zip(PERCENTILES, np.percentile(makespans, PERCENTILES))},
+        "mean_days": float(makespans.mean()),
+        "ids": ids,
+        "criticality": (np.asarray(critical_counts) / trials).round(4).tolist() if ids else [],
+    }
+
+
+def build_simulation(db: Session, trials: int, seed: int, distribution: SimulationDistribution,
+                     optimistic: float, pessimistic: float, workers: int = 1,
+                     today: Optional[date] = None) -> dict:
+    """
+    以今天为起点模拟全部项目的剩余工期，返回与 SimulationResponse 一致的字典（完工日期按整天向上取整），
+    同时给出不考虑不确定性时的完工天数（deterministic_days）作对照
+    """
+    ids, durations, edges = load_cpm_inputs(db)
+    result = simulate(ids, durations, edges, trials, seed, distribution, optimistic, pessimistic, workers)
+    today = today or date.today()
+    result["start_date"] = today.isoformat()
+    result["deterministic_days"] = compute_cpm(ids, durations, edges).project_duration
+    result["finish_dates"] = {
+        key: (today + timedelta(days=math.ceil(days))).isoformat() for key, days in result["finish_days"].items()
+    }
+    return result
@@ -0,0 +1,89 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, Optional
+from app.models.change_log import ChangeLog
+from app.models.project import Project as ProjectModel
+from app.models.task import Task as TaskModel
+from app.models.user import User as UserModel
+from app.core.constants import CacheEntity, ChangeOperation
+from app.schemas.sync import SyncResponse, SyncDeleted
+
+ENTITY_MODELS = {
+    CacheEntity.projects: ProjectModel,
+    CacheEntity.tasks: TaskModel,
+    CacheEntity.users: UserModel,
+}
+
+
+def record_change(db: Session, entity: CacheEntity, entity_ids: Iterable[int], deleted: bool = False) -> None:
+    """
+    记录实体变更到变更日志。需要在提交事务之前调用，与业务写入同一事务提交！
+    """
+    operation = ChangeOperation.delete if deleted else ChangeOperation.upsert
+    for entity_id in entity_ids:
+        db.add(ChangeLog(entity=entity.value, entity_id=entity_id, operation=operation))
+
+
+def get_current_cursor(db: Session) -> int:
+    """获取当前最新的同步游标"""
+    return db.query(func.max(ChangeLog.id)).scalar() or 0
+
+
+def get_full_snapshot(db: Session) -> SyncResponse:
+    """
+    返回全量快照与当前游标。先读取游标再读取数据，之后的变更会在下次增量同步中重复下发（幂等覆盖）。
+    """
+    cursor = get_current_cursor(db)
+    return SyncResponse(
+        cursor=cursor,
+        full=True,
+        projects=db.query(ProjectModel).all(),
+        tasks=db.query(TaskModel).all(),
+        users=db.query(UserModel).all(),
+    )
+
+
+def get_changes_since(db: Session, since: int, limit: int = 1000) -> SyncResponse:
+    """
+    返回游标之后新增、更新或删除的实体。同一实体的多次变更合并为最后一次操作。
+    """
+    changes = (
+        db.query(ChangeLog.id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.operation)
+        .filter(ChangeLog.id > since)
+        .order_by(ChangeLog.id.asc())
+        .limit(limit)
+        .all()
+    )
+    if not changes:
+        return SyncResponse(cursor=since)
+
+    latest: Dict[CacheEntity, Dict[int, ChangeOperation]] = {entity: {} for entity in ENTITY_MODELS}
+    for _, entity, entity_id, operation in changes:
+        latest[CacheEntity(entity)][entity_id] = operation
+
+    upserted = {}
+    deleted = {}
+    for entity, model in ENTITY_MODELS.items():
+        upsert_ids = [i for i, op in latest[entity].items() if op == ChangeOperation.upsert]
+        rows = db.query(model).filter(model.id.in_(upsert_ids)).all() if upsert_ids else []
+        found_ids = {row.id for row in rows}
+        upserted[entity.value] = rows
+        # 记录为更新但已不存在的实体同样按删除处理
+        deleted[entity.value] = sorted(
+            i for i, op in latest[entity].items()
+            if op == ChangeOperation.delete or i not in found_ids
+        )
+
+    return SyncResponse(
+        cursor=changes[-1].id,
+        has_more=len(changes) == limit,
+        deleted=SyncDeleted(**deleted),
+        **upserted,
+    )
+
+
+def sync(db: Session, since: Optional[int], limit: int = 1000) -> SyncResponse:
+    """未提供游标时返回全量快照，否则返回增量变更"""
+    if since is None:
+        return get_full_snapshot(db)
+    return get_changes_since(db, since, limit)
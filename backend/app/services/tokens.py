@@ -0,0 +1,173 @@
+# 刷新令牌：登录时签发，之后用它换取新的访问令牌，不再需要密码与 bcrypt 校验。
+# 令牌是 32 字节随机串，库中只存 SHA-256 摘要（高熵随机值无需慢哈希），按唯一索引一次查找；
+# 每次刷新换发新令牌（轮换），旧令牌再次出现视为被盗用，吊销同一次登录换发出的全部令牌。
+# 访问令牌携带角色与令牌版本号，由进程内的令牌版本表判断是否已吊销，鉴权时不必查询用户表；
+# 多进程部署时需共享缓存版本号（Redis 或跨进程失效通道），否则每次鉴权按主键查询用户。
+import hashlib
+import multiprocessing
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.cache import entity_versions
+from app.core.constants import CacheEntity, ErrorMessage, UserRole
+from app.models.refresh_token import RefreshToken
+from app.models.user import User as UserModel
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+    """签发刷新令牌，family_id 为空时开始新的登录会话；由调用方提交事务"""
+    token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    db.add(RefreshToken(
+        token_hash=hash_token(token),
+        user_id=user_id,
+        family_id=family_id or secrets.token_hex(16),
+        created_at=now,
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[int, str]:
+    """
+    用刷新令牌换发新令牌，返回 (用户ID, 新刷新令牌)。
+    标记已使用与条件判断在同一条 UPDATE 中完成，并发的两次刷新只有一次成功。
+    令牌已使用或已吊销时吊销整个 family 并返回 401
+    """
+    now = datetime.utcnow()
+    token_hash = hash_token(token)
+    claimed = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == token_hash, RefreshToken.used_at.is_(None),
+               RefreshToken.revoked_at.is_(None), RefreshToken.expires_at > now)
+        .values(used_at=now)
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
+    ).first()
+    if claimed is None:
+        family_id = db.scalar(select(RefreshToken.family_id).where(
+            RefreshToken.token_hash == token_hash,
+            or_(RefreshToken.used_at.isnot(None), RefreshToken.revoked_at.isnot(None)),
+        ))
+        if family_id is not None:
+            revoke_tokens(db, RefreshToken.family_id == family_id)
+            db.commit()
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=ErrorMessage.REFRESH_TOKEN_REUSED)
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=ErrorMessage.INVALID_REFRESH_TOKEN)
+    user_id, family_id = claimed
+    new_token = issue_refresh_token(db, user_id, family_id)
+    db.commit()
+    return user_id, new_token
+
+
+def revoke_tokens(db: Session, *criteria) -> int:
+    """吊销满足条件且尚未吊销的令牌，由调用方提交事务"""
+    return db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.revoked_at.is_(None), *criteria)
+        .values(revoked_at=datetime.utcnow())
+    ).rowcount
+
+
+def revoke_refresh_token(db: Session, token: str) -> int:
+    """注销：吊销该令牌所在登录会话的全部令牌"""
+    family_id = db.scalar(select(RefreshToken.family_id).where(RefreshToken.token_hash == hash_token(token)))
+    if family_id is None:
+        return 0
+    revoked = revoke_tokens(db, RefreshToken.family_id == family_id)
+    db.commit()
+    return revoked
+
+
+def purge_refresh_tokens(db: Session, now: Optional[datetime] = None) -> int:
+    """删除已过期的令牌；过期前保留已使用、已吊销的行，用于识别重复使用"""
+    deleted = db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= (now or datetime.utcnow()))).rowcount
+    db.commit()
+    return deleted
+
+
+def revoke_access_tokens(user: UserModel) -> None:
+    """使用户已签发的访问令牌全部失效（修改密码、角色变更时调用），由调用方记录变更并提交事务"""
+    user.token_version = (user.token_version or 0) + 1
+
+
+def token_versions_shared() -> bool:
+    """
+    其他进程写入用户表后本进程能否及时得知：单进程，或缓存版本号由 Redis / 跨进程失效通道共享。
+    多进程按 WEB_CONCURRENCY 或本进程由 multiprocessing 启动（uvicorn --workers）判断
+    """
+    if settings.CACHE_BACKEND != "memory" or settings.CACHE_INVALIDATION_BUS:
+        return True
+    return settings.WEB_CONCURRENCY <= 1 and multiprocessing.parent_process() is None
+
+
+class TokenVersions:
+    """
+    用户ID → (令牌版本号, 角色) 的进程内表，判断访问令牌是否仍然有效。
+    按需逐个用户按主键加载；users 的缓存版本号变化（本进程或经失效通知同步的其他进程写入用户表）后清空，
+    条目超过 TOKEN_VERSION_MAX_AGE_SECONDS 也重新加载，直接修改数据库等未经缓存版本号通知的变更最多延迟这么久。
+    令牌版本号比表中新（表尚未追平）时同样按主键补齐
+    """
+
+    def __init__(self):
+        self._entries: Dict[int, Tuple[int, UserRole, float]] = {}  # 用户ID → (令牌版本号, 角色, 加载时刻)
+        self._loaded_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, db: Session, user_id: int) -> Optional[Tuple[int, UserRole]]:
+        version = entity_versions([CacheEntity.users])[0]
+        if version != self._loaded_version:
+            with self._lock:
+                if version != self._loaded_version:
+                    self._entries = {}
+                    self._loaded_version = version
+        entry = self._entries.get(user_id)
+        if entry is None or time.monotonic() - entry[2] > settings.TOKEN_VERSION_MAX_AGE_SECONDS:
+            return self.reload_user(db, user_id)
+        return entry[0], entry[1]
+
+    def reload_user(self, db: Session, user_id: int) -> Optional[Tuple[int, UserRole]]:
+        version = self._loaded_version
+        row = db.execute(select(UserModel.token_version, UserModel.role).where(UserModel.id == user_id)).first()
+        with self._lock:
+            if row is None:
+                self._entries.pop(user_id, None)
+                return None
+            if version == self._loaded_version:  # 查询期间表已清空时不写回可能过时的行
+                self._entries[user_id] = (row.token_version, row.role, time.monotonic())
+        return row.token_version, row.role
+
+    def check(self, db: Session, user_id: int, token_version: int) -> Optional[Tuple[int, UserRole]]:
+        """
+        返回用户当前的 (令牌版本号, 角色)，用户不存在时返回 None。
+        多进程部署且没有共享的缓存版本号时无法得知其他进程的吊销，每次按主键查询
+        """
+        if not token_versions_shared():
+            return self.reload_user(db, user_id)
+        entry = self.get(db, user_id)
+        if entry is None or entry[0] < token_version:
+            entry = self.reload_user(db, user_id)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+            self._loaded_version = None
+
+
+token_versions = TokenVersions()
@@ -1,12 +1,15 @@
+from collections import defaultdict
+from typing import Dict
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.models.user import User as UserModel
-from app.models.task import Task as TaskModel
+from app.models.task import Task as TaskModel, task_assignments
 from app.models.project import Project as ProjectModel
 from app.schemas.user import UserCreate, User as UserSchema
 from app.core.security import get_password_hash
-from app.core.constants import StatusCode, ErrorMessage
+from app.core.constants import StatusCode, ErrorMessage, CacheEntity
 from app.core.utils import create_error_response, safe_commit
+from app.services.sync import record_change
 
 def create_user(user: UserCreate, db: Session, role=None) -> UserSchema:
     """
@@ -31,6 +34,8 @@ def create_user(user: UserCreate, db: Session, role=None) -> UserSchema:
             task_id=None  # 新用户默认没有任务
         )
         db.add(new_user)
+        db.flush()
+        record_change(db, CacheEntity.users, [new_user.id])
         safe_commit(db, "create user")
         db.refresh(new_user)
         return new_user
@@ -43,48 +48,35 @@ def create_user(user: UserCreate, db: Session, role=None) -> UserSchema:
             f"Failed to create user: {str(e)}"
         )
 
-def calculate_user_performance(user_id: int, db: Session) -> float:
+def _assignment_scores(db: Session, *criteria) -> Dict[int, float]:
     """
-    计算用户绩效
+    一次查询取出分配关系及任务、项目的计分字段，按用户汇总绩效。
+    参与人数读取任务上的冗余计数，不再逐任务统计。
     """
-    # 获取用户参与的所有任务
-    user_tasks = db.query(TaskModel).join(UserModel, TaskModel.id == UserModel.task_id)\
-                   .filter(UserModel.id == user_id).all()
-    
-    if not user_tasks:
-        return 0.0
-    
-    total_performance = 0.0
-    
-    for task in user_tasks:
-        # 获取项目信息
-        project = db.query(ProjectModel).filter(ProjectModel.id == task.project_id).first()
-        if not project:
-            continue
-        
-        # 第一次加权：根据任务工作量
-        workload_score = task.workload.weight
-        
-        # 计算参与该任务的人数
-        task_participants = db.query(UserModel).filter(UserModel.task_id == task.id).count()
-        
-        # 按人数平分
-        user_task_score = workload_score / task_participants
+    rows = db.query(
+        task_assignments.c.user_id, TaskModel.workload, TaskModel.head_id,
+        TaskModel.participant_count, ProjectModel.estimated_duration,
+    ).join(TaskModel, TaskModel.id == task_assignments.c.task_id)\
+     .filter(ProjectModel.id == TaskModel.project_id, *criteria).all()
+
+    scores: Dict[int, float] = defaultdict(float)
+    for user_id, workload, head_id, participant_count, estimated_duration in rows:
+        # 第一次加权：根据任务工作量，按人数平分
+        user_task_score = workload.weight / max(participant_count, 1)
         
         # 如果是任务负责人，乘以120%
-        if task.head_id == user_id:
+        if head_id == user_id:
             user_task_score *= 1.2
         
-        # 第二次加权：根据所属项目预期工期
-        if project.estimated_duration:
-            duration_weight = project.estimated_duration
-        else:
-            duration_weight = 1  # 默认权重
-        
-        final_task_score = user_task_score * duration_weight
-        total_performance += final_task_score
-    
-    return total_performance
+        # 第二次加权：根据所属项目预期工期，未设置时默认权重为 1
+        scores[user_id] += user_task_score * (estimated_duration or 1)
+    return scores
+
+def calculate_user_performance(user_id: int, db: Session) -> float:
+    """
+    计算用户绩效
+    """
+    return _assignment_scores(db, task_assignments.c.user_id == user_id).get(user_id, 0.0)
 
 def calculate_all_users_performance(db: Session) -> None:
     """
@@ -95,9 +87,10 @@ def calculate_all_users_performance(db: Session) -> None:
     user_performances = []
     
     # 计算每个用户的performance
+    scores = _assignment_scores(db)
     for user in all_users:
         if user.role == "user":
-            performance = calculate_user_performance(user.id, db)
+            performance = scores.get(user.id, 0.0)
             user.performance = performance
             user_performances.append((user.id, performance))
     
@@ -110,6 +103,7 @@ def calculate_all_users_performance(db: Session) -> None:
     
     # 重置所有用户的outstanding状态
     db.query(UserModel).update({"outstanding": False})
+    record_change(db, CacheEntity.users, [user.id for user in all_users])
     
     # 设置前20%用户为优秀员工
     if user_performances:
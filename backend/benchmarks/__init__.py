@@ -0,0 +1 @@
+# 性能基准测试包，独立于功能测试运行
@@ -0,0 +1,212 @@
+# app/services 中各业务函数的基准套件（pytest-benchmark），数据来自 benchmarks.synthetic 生成的合成组织
+import itertools
+import json
+import os
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from app.core.constants import CacheEntity, DataFormat, ExportEntity, ImportEntity
+from app.models.project import Project as ProjectModel, ProjectProgress as ProjectProgressModel
+from app.models.user import User as UserModel
+from app.schemas.imports import ImportReport, ProjectImport
+from app.schemas.user import UserCreate
+from app.services import cpm, export, gantt, importer, project, serializers, simulation, sync, user
+from benchmarks.synthetic import BENCH_PASSWORD, dependency_edges
+
+# 关键路径法的大规模基准直接在内存中生成依赖图，不经过数据库
+CPM_PROJECTS = int(os.environ.get("BENCH_CPM_PROJECTS", 50000))
+CPM_EDGES = int(os.environ.get("BENCH_CPM_EDGES", 500000))
+# 蒙特卡洛模拟基准的规模：项目数与试验数，SIMULATION_WORKERS 大于 1 时使用进程池
+SIMULATION_PROJECTS = int(os.environ.get("BENCH_SIMULATION_PROJECTS", 5000))
+SIMULATION_TRIALS = int(os.environ.get("BENCH_SIMULATION_TRIALS", 10000))
+SIMULATION_WORKERS = int(os.environ.get("BENCH_SIMULATION_WORKERS", 1))
+
+_unique = itertools.count(1)
+
+
+@pytest.fixture
+def busiest_project_id(bench_db):
+    """进度记录最多的项目，用于单项目相关的基准"""
+    return bench_db.query(ProjectProgressModel.project_id).group_by(ProjectProgressModel.project_id)\
+        .order_by(func.count().desc()).limit(1).scalar()
+
+
+@pytest.fixture
+def bench_user_id(bench_db):
+    """参与了任务的第一个员工"""
+    return bench_db.query(UserModel.id).filter(UserModel.task_id.isnot(None)).order_by(UserModel.id).limit(1).scalar()
+
+
+def project_lines(count):
+    prefix = f"Imported {next(_unique)}"
+    return [json.dumps({"name": f"{prefix}-{i}", "estimated_duration": 10}) + "\n" for i in range(count)]
+
+
+# ---------- cpm ----------
+
+@pytest.fixture(scope="module")
+def cpm_graph():
+    """CPM_PROJECTS 个项目的随机无环依赖图，平均每个项目依赖 CPM_EDGES / CPM_PROJECTS 个项目"""
+    rng = random.Random(42)
+    fan = max(1, round(2 * CPM_EDGES / CPM_PROJECTS))
+    edges = dependency_edges(CPM_PROJECTS, "random", rng, fan=fan)
+    durations = [rng.uniform(0, 30) for _ in range(CPM_PROJECTS)]
+    return list(range(1, CPM_PROJECTS + 1)), durations, [(i + 1, dep + 1) for i, dep in edges]
+
+
+def bench_compute_cpm(benchmark, cpm_graph):
+    ids, _, edges = cpm_graph
+    benchmark.extra_info.update(projects=len(ids), edges=len(edges))
+    benchmark.pedantic(cpm.compute_cpm, args=cpm_graph, rounds=3)
+
+
+def bench_build_schedule(benchmark, bench_db):
+    benchmark(cpm.build_schedule, bench_db)
+
+
+# ---------- export ----------
+
+@pytest.mark.parametrize("entity", list(ExportEntity))
+@pytest.mark.parametrize("data_format", list(DataFormat))
+def bench_stream_export(benchmark, bench_engine, entity, data_format):
+    benchmark(lambda: sum(len(chunk) for chunk in export.stream_export(bench_engine, entity, data_format)))
+
+
+# ---------- gantt ----------
+
+def bench_get_dependency_end_time(benchmark, bench_db):
+    projects = bench_db.query(ProjectModel).filter(ProjectModel.start_time.is_(None)).all()
+    benchmark(lambda: [gantt.get_dependency_end_time(p, bench_db) for p in projects])
+
+
+def bench_get_dependency_end_times(benchmark, bench_db):
+    rows = bench_db.query(ProjectModel.id, ProjectModel.start_time, ProjectModel.end_time,
+                          ProjectModel.estimated_duration).all()
+    projects = {row.id: row for row in rows}
+    dependencies = gantt.load_dependency_map(bench_db)
+    today = datetime(2026, 1, 1)
+    benchmark(gantt.get_dependency_end_times, list(projects), projects, dependencies, today)
+
+
+def bench_load_dependency_map(benchmark, bench_db):
+    benchmark(gantt.load_dependency_map, bench_db)
+
+
+def bench_build_gantt_data(benchmark, bench_db):
+    benchmark(gantt.build_gantt_data, bench_db)
+
+
+def bench_build_gantt_window(benchmark, bench_db):
+    # 前端常见的可视范围：前后各三个月
+    today = date.today()
+    benchmark(gantt.build_gantt_data, bench_db, window=(today - timedelta(days=90), today + timedelta(days=90)))
+
+
+# ---------- importer ----------
+
+def bench_parse_records(benchmark):
+    lines = project_lines(1000)
+    benchmark(lambda: list(importer.parse_records(lines, DataFormat.ndjson)))
+
+
+def bench_validate_batch(benchmark):
+    records = list(enumerate(importer.parse_records(project_lines(1000), DataFormat.ndjson), start=1))
+    benchmark(lambda: importer.validate_batch(records, ProjectImport, ImportReport(entity="projects")))
+
+
+def bench_hash_passwords(benchmark):
+    # 少于并行阈值时在当前进程中计算，衡量单次 bcrypt 的成本
+    benchmark.pedantic(importer.hash_passwords, args=([BENCH_PASSWORD] * 2,), rounds=3)
+
+
+def bench_run_import_projects(benchmark, bench_db):
+    benchmark.pedantic(
+        lambda: importer.run_import(bench_db, ImportEntity.projects, project_lines(500)),
+        rounds=5,
+    )
+
+
+# ---------- project ----------
+
+def bench_update_project_progress(benchmark, bench_db, busiest_project_id):
+    benchmark(project.update_project_progress, busiest_project_id, bench_db)
+
+
+def bench_get_filled_project_progress(benchmark, bench_db, busiest_project_id):
+    benchmark(project.get_filled_project_progress, busiest_project_id, bench_db)
+
+
+def bench_get_ideal_project_progress(benchmark, bench_db, busiest_project_id):
+    benchmark(project.get_ideal_project_progress, busiest_project_id, bench_db)
+
+
+def bench_analyse_warning_level(benchmark, bench_db, busiest_project_id):
+    actual = project.get_filled_project_progress(busiest_project_id, bench_db)
+    ideal = project.get_ideal_project_progress(busiest_project_id, bench_db)
+    benchmark(project.analyse_warning_level, actual, ideal)
+
+
+# ---------- serializers ----------
+
+def bench_fetch_task_dicts(benchmark, bench_db):
+    benchmark(serializers.fetch_task_dicts, bench_db)
+
+
+def bench_fetch_latest_progress(benchmark, bench_db):
+    benchmark(serializers.fetch_latest_progress, bench_db)
+
+
+def bench_fetch_project_dicts(benchmark, bench_db):
+    benchmark(serializers.fetch_project_dicts, bench_db)
+
+
+# ---------- simulation ----------
+
+def bench_simulate(benchmark):
+    rng = random.Random(42)
+    edges = [(i + 1, dep + 1) for i, dep in dependency_edges(SIMULATION_PROJECTS, "random", rng, fan=6)]
+    ids = list(range(1, SIMULATION_PROJECTS + 1))
+    durations = [rng.uniform(0, 30) for _ in ids]
+    benchmark.extra_info.update(projects=len(ids), edges=len(edges), trials=SIMULATION_TRIALS)
+    benchmark.pedantic(simulation.simulate, args=(ids, durations, edges, SIMULATION_TRIALS),
+                       kwargs={"workers": SIMULATION_WORKERS}, rounds=3)
+
+
+def bench_build_simulation(benchmark, bench_db):
+    benchmark(simulation.build_simulation, bench_db, 1000, 0, "pert", 0.8, 1.5)
+
+
+# ---------- sync ----------
+
+def bench_get_full_snapshot(benchmark, bench_db):
+    benchmark(sync.get_full_snapshot, bench_db)
+
+
+def bench_get_changes_since(benchmark, bench_db):
+    since = sync.get_current_cursor(bench_db)
+    sync.record_change(bench_db, CacheEntity.projects, [id for (id,) in bench_db.query(ProjectModel.id)])
+    bench_db.commit()
+    benchmark(sync.get_changes_since, bench_db, since)
+
+
+# ---------- user ----------
+
+def bench_create_user(benchmark, bench_db):
+    def create():
+        n = next(_unique)
+        user.create_user(UserCreate(
+            username=f"bench{n}", email=f"bench{n}@example.com", password=BENCH_PASSWORD,
+            confirm_password=BENCH_PASSWORD, register_key="",
+        ), bench_db, role="user")
+    benchmark.pedantic(create, rounds=3)
+
+
+def bench_calculate_user_performance(benchmark, bench_db, bench_user_id):
+    benchmark(user.calculate_user_performance, bench_user_id, bench_db)
+
+
+def bench_calculate_all_users_performance(benchmark, bench_db):
+    benchmark.pedantic(user.calculate_all_users_performance, args=(bench_db,), rounds=3)
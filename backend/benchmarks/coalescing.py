@@ -0,0 +1,94 @@
+# 缓存未命中时并发相同请求的合并效果：N 个线程同时请求同一个刚失效的缓存响应，
+# 对比逐个计算与单飞合并两种方式的进程 CPU 时间和实际计算次数。合并后 CPU 时间应基本不随 N 增长。
+#
+# 运行方式（在 backend 目录下）：
+#     python -m benchmarks.coalescing [--callers 1,2,4,8,16,32] [--work 200000] [--json results.json]
+import argparse
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+from app.core.cache import cached_response
+from app.core.constants import CacheEntity
+
+REQUEST = SimpleNamespace(headers={})
+
+
+def expensive(work: int, counter: List[int], lock: threading.Lock) -> Callable[[], Dict[str, int]]:
+    """模拟一次昂贵的聚合计算（纯 Python 循环，占用 CPU 且持有 GIL）"""
+    def compute():
+        with lock:
+            counter[0] += 1
+        return {"total": sum(i * i for i in range(work))}
+    return compute
+
+
+def burst(callers: int, call: Callable[[], Any]) -> None:
+    """callers 个线程在同一时刻发起调用"""
+    barrier = threading.Barrier(callers)
+
+    def worker():
+        barrier.wait()
+        call()
+
+    threads = [threading.Thread(target=worker) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def measure(callers: int, work: int, rounds: int, coalesce: bool) -> Dict[str, Any]:
+    counter, lock = [0], threading.Lock()
+    compute = expensive(work, counter, lock)
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    for round_no in range(rounds):
+        if coalesce:
+            # 每轮使用新的参数：缓存未命中且没有旧响应可返回，只测合并本身
+            params = ("coalescing", time.time_ns(), round_no)
+            burst(callers, lambda: cached_response(REQUEST, "bench:coalescing", [CacheEntity.projects], compute,
+                                                   params=params))
+        else:
+            burst(callers, compute)
+    return {
+        "cpu_ms": round((time.process_time() - cpu) / rounds * 1000, 2),
+        "wall_ms": round((time.perf_counter() - wall) / rounds * 1000, 2),
+        "computations": counter[0] / rounds,
+    }
+
+
+def run(callers: List[int], work: int = 200000, rounds: int = 3) -> Dict[str, Any]:
+    rows = []
+    for count in callers:
+        rows.append({
+            "callers": count,
+            "naive": measure(count, work, rounds, coalesce=False),
+            "coalesced": measure(count, work, rounds, coalesce=True),
+        })
+    return {"work": work, "rounds": rounds, "rows": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发相同请求合并基准")
+    parser.add_argument("--callers", default="1,2,4,8,16,32", help="逗号分隔的并发调用数")
+    parser.add_argument("--work", type=int, default=200000, help="单次计算的循环次数")
+    parser.add_argument("--rounds", type=int, default=3, help="每档并发的重复轮数，取平均")
+    parser.add_argument("--json", dest="json_path", help="结果输出到 JSON 文件")
+    args = parser.parse_args()
+
+    result = run([int(n) for n in args.callers.split(",")], args.work, args.rounds)
+    print(f"{'callers':>8}{'naive cpu ms':>14}{'naive calls':>13}{'coalesced cpu ms':>18}{'coalesced calls':>17}")
+    for row in result["rows"]:
+        naive, coalesced = row["naive"], row["coalesced"]
+        print(f"{row['callers']:>8}{naive['cpu_ms']:>14}{naive['computations']:>13}"
+              f"{coalesced['cpu_ms']:>18}{coalesced['computations']:>17}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
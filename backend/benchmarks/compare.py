@@ -0,0 +1,51 @@
+# 对比两次基准结果，找出退化的用例
+#
+# 运行方式（在 backend 目录下）：
+#     python -m benchmarks.compare old.json new.json [--threshold 0.10]
+#
+# 同时支持 pytest-benchmark 保存的 JSON（按用例比较平均耗时）与 benchmarks.load 的 JSON（按接口比较 p95 延迟）。
+# 存在超过阈值的退化时以非零状态码退出，便于在 CI 中使用。
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+
+def load_metrics(path: str) -> Dict[str, float]:
+    """读取结果文件，返回 用例名 -> 耗时（越小越好）"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if "benchmarks" in data:  # pytest-benchmark
+        return {bench["fullname"]: bench["stats"]["mean"] for bench in data["benchmarks"]}
+    if "endpoints" in data:  # benchmarks.load
+        return {endpoint: stats["p95_ms"] for endpoint, stats in data["endpoints"].items()}
+    raise ValueError(f"Unrecognized benchmark result format: {path}")
+
+
+def compare(old: Dict[str, float], new: Dict[str, float], threshold: float) -> List[dict]:
+    rows = []
+    for name in sorted(old.keys() & new.keys()):
+        change = (new[name] - old[name]) / old[name] if old[name] else 0.0
+        rows.append({"name": name, "old": old[name], "new": new[name], "change": change,
+                     "regressed": change > threshold})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="对比两次基准结果")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="视为退化的相对增幅（默认 10%%）")
+    args = parser.parse_args(argv)
+
+    rows = compare(load_metrics(args.old), load_metrics(args.new), args.threshold)
+    width = max([len(row["name"]) for row in rows] + [4])
+    print(f"{'name':<{width}}{'old':>14}{'new':>14}{'change':>10}")
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(f"{row['name']:<{width}}{row['old']:>14.6g}{row['new']:>14.6g}{row['change']:>+10.1%}{flag}")
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
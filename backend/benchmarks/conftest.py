@@ -0,0 +1,33 @@
+import os
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from benchmarks.synthetic import generate_org
+
+# 数据规模可通过环境变量调整，默认规模适合在开发机上几分钟内跑完
+BENCH_SIZES = {
+    "users": int(os.environ.get("BENCH_USERS", 300)),
+    "projects": int(os.environ.get("BENCH_PROJECTS", 60)),
+    "tasks_per_project": int(os.environ.get("BENCH_TASKS_PER_PROJECT", 8)),
+    "dag": os.environ.get("BENCH_DAG", "layered"),
+    "years": int(os.environ.get("BENCH_YEARS", 2)),
+    "seed": int(os.environ.get("BENCH_SEED", 42)),
+}
+
+@pytest.fixture(scope="session")
+def bench_engine(tmp_path_factory):
+    """生成合成组织数据的基准数据库，整个基准会话共享"""
+    path = tmp_path_factory.mktemp("bench") / "bench.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    generate_org(engine, **BENCH_SIZES)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def bench_db(bench_engine):
+    """每个基准用例独立的数据库会话"""
+    db = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)()
+    try:
+        yield db
+    finally:
+        db.close()
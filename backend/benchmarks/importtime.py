@@ -0,0 +1,56 @@
+# 冷启动导入耗时：用 python -X importtime 在新进程中导入应用，按累计耗时列出最慢的模块
+#
+# 运行方式（在 backend 目录下）：
+#     python -m benchmarks.importtime [--module main] [--top 20] [--runs 3] [--budget-ms 2000]
+#
+# 多次运行取最小值以减少噪声；超过预算时以非零状态码退出，可用于 CI。
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_BUDGET_MS = 2000
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure(module: str = "main") -> Dict[str, int]:
+    """在新进程中导入模块，返回每个模块的累计导入耗时（µs），同名模块取首次导入"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            cumulative.setdefault(match.group(4), int(match.group(2)))
+    return cumulative
+
+
+def best_of(module: str = "main", runs: int = 3) -> Dict[str, int]:
+    """多次测量，每个模块取最小值"""
+    measurements = [measure(module) for _ in range(runs)]
+    return {name: min(m.get(name, value) for m in measurements) for name, value in measurements[0].items()}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="应用冷启动导入耗时")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    cumulative = best_of(args.module, args.runs)
+    for name, value in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{value / 1000:10.1f} ms  {name}")
+    total_ms = cumulative[args.module] / 1000
+    print(f"\n导入 {args.module} 共 {total_ms:.1f} ms，预算 {args.budget_ms:.0f} ms")
+    return 0 if total_ms <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
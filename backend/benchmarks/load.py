@@ -0,0 +1,183 @@
+# 进程内 ASGI 压测驱动：在合成数据库上并发请求热点接口，统计吞吐量与延迟分位数
+#
+# 运行方式（在 backend 目录下）：
+#     python -m benchmarks.load [--requests 200] [--concurrency 16] [--cold] [--json results.json]
+#
+# 请求经 httpx.ASGITransport 直接送入应用，不经过网络栈，结果反映应用自身（含线程池与数据库）的开销。
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.cache import get_cache_backend
+from app.db.session import get_db
+from benchmarks.synthetic import generate_org
+
+# 热点读接口，{project_id} 在请求间轮换
+HOT_ENDPOINTS = [
+    "/api/projects/",
+    "/api/projects/{project_id}",
+    "/api/projects/{project_id}/tasks",
+    "/api/projects/{project_id}/members",
+    "/api/projects/{project_id}/burn-down/",
+    "/api/tasks/",
+    "/api/users/",
+    "/api/users/outstanding",
+    "/api/gantt/project-data",
+    "/api/gantt/critical-path",
+    "/api/sync/",
+]
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """最近秩法计算分位数"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def drive_endpoint(client: httpx.AsyncClient, template: str, requests: int, concurrency: int,
+                         project_ids: List[int], cold: bool) -> Dict[str, Any]:
+    """以固定并发数发送 requests 个请求，返回该接口的统计结果"""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            if cold:
+                get_cache_backend().clear()
+            url = template.format(project_id=project_ids[i % len(project_ids)])
+            start = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+async def run_load_async(app, endpoints: Sequence[str], requests: int, concurrency: int,
+                         project_ids: List[int], cold: bool) -> Dict[str, Dict[str, Any]]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = {}
+        for template in endpoints:
+            await client.get(template.format(project_id=project_ids[0]))  # 预热
+            results[template] = await drive_endpoint(client, template, requests, concurrency, project_ids, cold)
+        return results
+
+
+def run_load(db_path: Optional[str] = None, requests: int = 200, concurrency: int = 16, cold: bool = False,
+             endpoints: Sequence[str] = HOT_ENDPOINTS, **sizes: Any) -> Dict[str, Any]:
+    """
+    生成（或复用）合成数据库，把应用的数据库依赖指向它并依次压测各接口。
+    db_path 为空时在临时目录中生成；sizes 透传给 generate_org。
+    """
+    from main import app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(db_path or Path(tmp) / "load.db")
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        counts = generate_org(engine, **sizes) if not path.exists() or path.stat().st_size == 0 else None
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        previous = app.dependency_overrides.get(get_db)
+        app.dependency_overrides[get_db] = override_get_db
+        get_cache_backend().clear()
+        try:
+            with SessionLocal() as db:
+                from app.models.project import Project
+                project_ids = [id for (id,) in db.query(Project.id).order_by(Project.id)]
+            results = asyncio.run(run_load_async(app, endpoints, requests, concurrency, project_ids, cold))
+        finally:
+            if previous is None:
+                app.dependency_overrides.pop(get_db, None)
+            else:
+                app.dependency_overrides[get_db] = previous
+            get_cache_backend().clear()
+            engine.dispose()
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "requests": requests,
+            "concurrency": concurrency,
+            "cold": cold,
+            "sizes": sizes,
+            "generated": counts,
+        },
+        "endpoints": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="进程内 ASGI 压测驱动")
+    parser.add_argument("--db", help="复用已有的合成数据库；不存在时按参数生成")
+    parser.add_argument("--requests", type=int, default=200, help="每个接口的请求数")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发请求数")
+    parser.add_argument("--cold", action="store_true", help="每个请求前清空响应缓存，测量未命中缓存的路径")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--dag", default="layered")
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="结果输出到 JSON 文件")
+    args = parser.parse_args(argv)
+
+    result = run_load(args.db, args.requests, args.concurrency, args.cold, users=args.users,
+                      projects=args.projects, dag=args.dag, years=args.years, seed=args.seed)
+    columns = ["rps", "p50_ms", "p95_ms", "p99_ms", "errors"]
+    print(f"{'endpoint':<42}" + "".join(f"{column:>12}" for column in columns))
+    for endpoint, stats in result["endpoints"].items():
+        print(f"{endpoint:<42}" + "".join(f"{stats[column]:>12}" for column in columns))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# 登录爆破压测：若干攻击者（各自的客户端 IP）以固定频率用错误密码轮流尝试真实用户名，
+# 同时以正常并发请求热点读接口，对比无攻击、无防护攻击、有防护攻击三种情况下正常接口的延迟。
+# 无防护时每次尝试都做 bcrypt 校验并在哈希槽位上排队；有防护时超出次数或排队超时的尝试直接返回 429。
+# 攻击开始 warmup 秒后才测量正常接口，反映持续攻击的稳态（有防护时各攻击者 IP 此时已被限制）。
+#
+# 运行方式（在 backend 目录下）：
+#     python -m benchmarks.login_attack [--attackers 8] [--interval 0.25] [--warmup 10] [--requests 200] [--concurrency 8] [--json results.json]
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.cache import get_cache_backend
+from app.core.config import settings
+from app.core.ratelimit import get_login_limiter
+from app.db.session import get_db
+from benchmarks.load import drive_endpoint
+from benchmarks.synthetic import generate_org
+
+ENDPOINT = "/api/projects/{project_id}"
+# 关闭防护：不限制失败次数，密码校验一直排队等待
+UNPROTECTED = {"LOGIN_ATTEMPTS_PER_IDENTIFIER": 0, "LOGIN_ATTEMPTS_PER_IP": 0, "LOGIN_HASH_WAIT_MS": -1}
+
+
+async def attack(app, ip: str, users: int, interval: float, stop: asyncio.Event, statuses: Counter) -> None:
+    """单个攻击者：从固定 IP 每 interval 秒（响应更慢时则收到响应后立即）尝试一次错误密码，直到 stop"""
+    transport = httpx.ASGITransport(app=app, client=(ip, 40000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        attempt = 0
+        while not stop.is_set():
+            attempt += 1
+            start = time.perf_counter()
+            response = await client.post("/api/auth/login", json={
+                "identifier": f"user{attempt % users + 1}", "password": f"guess-{attempt}",
+            })
+            statuses[response.status_code] += 1
+            try:
+                await asyncio.wait_for(stop.wait(), max(0.0, interval - (time.perf_counter() - start)))
+            except asyncio.TimeoutError:
+                pass
+
+
+async def run_phase(app, attackers: int, interval: float, warmup: float, users: int, requests: int,
+                    concurrency: int, project_ids: List[int]) -> Dict[str, Any]:
+    stop = asyncio.Event()
+    statuses: Counter = Counter()
+    tasks = [asyncio.create_task(attack(app, f"10.0.0.{i + 1}", users, interval, stop, statuses))
+             for i in range(attackers)]
+    transport = httpx.ASGITransport(app=app)
+    try:
+        if attackers:
+            await asyncio.sleep(warmup)
+        before = Counter(statuses)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.get(ENDPOINT.format(project_id=project_ids[0]))  # 预热
+            stats = await drive_endpoint(client, ENDPOINT, requests, concurrency, project_ids, cold=False)
+        during = statuses - before
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks)
+    # 测量期间攻击请求的状态码分布：400 为实际做了 bcrypt 校验的尝试
+    stats["login_attempts"] = {str(status): count for status, count in sorted(during.items())}
+    return stats
+
+
+def run(attackers: int = 8, interval: float = 0.25, warmup: float = 10.0, requests: int = 200, concurrency: int = 8,
+        users: int = 50, db_path: Optional[str] = None) -> Dict[str, Any]:
+    """在合成数据库上依次运行无攻击、无防护攻击、有防护攻击三个阶段"""
+    from main import app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(db_path or Path(tmp) / "attack.db")
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        if not path.exists() or path.stat().st_size == 0:
+            generate_org(engine, users=users, projects=20, tasks_per_project=4, years=1)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        previous = app.dependency_overrides.get(get_db)
+        app.dependency_overrides[get_db] = override_get_db
+        saved = {name: getattr(settings, name) for name in UNPROTECTED}
+        results = {}
+        try:
+            with SessionLocal() as db:
+                from app.models.project import Project
+                project_ids = [id for (id,) in db.query(Project.id).order_by(Project.id)]
+            for phase, count, overrides in (("baseline", 0, {}), ("unprotected", attackers, UNPROTECTED),
+                                            ("protected", attackers, {})):
+                for name, value in {**saved, **overrides}.items():
+                    setattr(settings, name, value)
+                get_login_limiter().clear()
+                get_cache_backend().clear()
+                results[phase] = asyncio.run(run_phase(app, count, interval, warmup, users, requests,
+                                                         concurrency, project_ids))
+        finally:
+            for name, value in saved.items():
+                setattr(settings, name, value)
+            if previous is None:
+                app.dependency_overrides.pop(get_db, None)
+            else:
+                app.dependency_overrides[get_db] = previous
+            get_login_limiter().clear()
+            get_cache_backend().clear()
+            engine.dispose()
+
+    return {"attackers": attackers, "interval": interval, "warmup": warmup, "requests": requests,
+            "concurrency": concurrency, "phases": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="登录爆破期间正常接口的延迟")
+    parser.add_argument("--attackers", type=int, default=8, help="攻击者数量（各自一个客户端 IP）")
+    parser.add_argument("--interval", type=float, default=0.25, help="每个攻击者两次尝试之间的最短间隔（秒）")
+    parser.add_argument("--warmup", type=float, default=10.0, help="攻击开始后多少秒才开始测量正常接口")
+    parser.add_argument("--requests", type=int, default=200, help="每个阶段正常接口的请求数")
+    parser.add_argument("--concurrency", type=int, default=8, help="正常接口的并发请求数")
+    parser.add_argument("--users", type=int, default=50, help="合成数据的用户数，即攻击者轮流尝试的用户名数")
+    parser.add_argument("--db", help="复用已有的合成数据库；不存在时生成")
+    parser.add_argument("--json", dest="json_path", help="结果输出到 JSON 文件")
+    args = parser.parse_args()
+
+    result = run(args.attackers, args.interval, args.warmup, args.requests, args.concurrency, args.users, args.db)
+    columns = ["rps", "p50_ms", "p95_ms", "p99_ms", "errors"]
+    print(f"{'phase':<14}" + "".join(f"{column:>10}" for column in columns) + "  login attempts")
+    for phase, stats in result["phases"].items():
+        print(f"{phase:<14}" + "".join(f"{stats[column]:>10}" for column in columns) + f"  {stats['login_attempts']}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# 指标记录热路径微基准：测量 MetricsMiddleware 与 Histogram.observe 每次调用的额外开销（µs）
+#
+# 运行方式（在 backend 目录下）：
+#     python -m benchmarks.metrics_overhead [--count 100000] [--json results.json]
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, Dict
+
+from app.core.metrics import Histogram, MetricsMiddleware
+
+ROUTE = SimpleNamespace(path_format="/api/projects/{project_id}")
+APP = SimpleNamespace(routes=[ROUTE])
+START_MESSAGE = {"type": "http.response.start", "status": 200, "headers": []}
+BODY_MESSAGE = {"type": "http.response.body", "body": b""}
+
+
+async def noop_app(scope, receive, send):
+    """模拟路由匹配后立即返回的应用"""
+    scope["route"] = ROUTE
+    await send(START_MESSAGE)
+    await send(BODY_MESSAGE)
+
+
+async def noop_send(message):
+    pass
+
+
+async def noop_receive():
+    return {"type": "http.request"}
+
+
+async def drive(app, count: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/api/projects/1", "app": APP}
+    start = time.perf_counter()
+    for _ in range(count):
+        await app(scope, noop_receive, noop_send)
+    return time.perf_counter() - start
+
+
+def run(count: int = 100000, repeat: int = 5) -> Dict[str, Any]:
+    loop = asyncio.new_event_loop()
+    try:
+        middleware = MetricsMiddleware(noop_app)
+        bare = min(loop.run_until_complete(drive(noop_app, count)) for _ in range(repeat))
+        wrapped = min(loop.run_until_complete(drive(middleware, count)) for _ in range(repeat))
+    finally:
+        loop.close()
+
+    histogram = Histogram("bench_seconds", "benchmark", ("method", "route", "status"))
+    start = time.perf_counter()
+    for i in range(count):
+        histogram.observe(i % 100 / 1000, "GET", "/api/projects/{project_id}", "200")
+    observe = time.perf_counter() - start
+
+    return {
+        "requests": count,
+        "middleware_overhead_us": round((wrapped - bare) / count * 1e6, 3),
+        "histogram_observe_us": round(observe / count * 1e6, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="指标记录热路径微基准")
+    parser.add_argument("--count", type=int, default=100000, help="模拟请求次数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一次")
+    parser.add_argument("--json", dest="json_path", help="结果输出到 JSON 文件")
+    args = parser.parse_args()
+
+    result = run(args.count, args.repeat)
+    for key, value in result.items():
+        print(f"{key:<28}{value:>12}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# 响应序列化微基准：对每个输出模型测量每个对象的序列化耗时（µs）
+#
+# 运行方式（在 backend 目录下）：
+#     python -m benchmarks.serialization [--count 2000] [--json results.json]
+import argparse
+import json
+import timeit
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.constants import ProjectStatus, RiskLevel, TaskWorkload, UserRole
+from app.schemas.burndown import BurnDownProject
+from app.schemas.gantt import CriticalPathResponse, GanttProject
+from app.schemas.project import Project, ProjectProgress
+from app.schemas.task import Task
+from app.schemas.user import User
+
+
+def task_row(i: int) -> Dict[str, Any]:
+    return {
+        "name": f"Task {i}", "description": "synthetic task", "workload": TaskWorkload.medium,
+        "finished": i % 2 == 0, "project_id": i // 5 + 1, "head_id": None, "participant_count": 0, "id": i,
+    }
+
+
+def project_row(i: int) -> Dict[str, Any]:
+    start = datetime(2026, 1, 1) + timedelta(days=i % 365)
+    return {
+        "name": f"Project {i}", "description": "synthetic project", "status": ProjectStatus.in_progress,
+        "estimated_duration": 30, "start_time": start, "end_time": start + timedelta(days=30),
+        "id": i, "progress": 0.5, "tasks": [task_row(i * 5 + k) for k in range(5)],
+    }
+
+
+def user_row(i: int) -> Dict[str, Any]:
+    return {
+        "username": f"user{i}", "email": f"user{i}@example.com", "role": UserRole.user,
+        "profile": "", "outstanding": False, "task_id": i, "id": i,
+        "hashed_password": "$2b$12$" + "x" * 53, "performance": 1.5,
+    }
+
+
+def gantt_row(i: int) -> Dict[str, Any]:
+    return {
+        "id": i, "name": f"Project {i}", "status": "in_progress", "start_time": "2026-01-01",
+        "end_time": "2026-01-31", "progress": 50.0, "dependencies": [i - 1] if i else [],
+    }
+
+
+def progress_row(i: int) -> Dict[str, Any]:
+    return {"id": i, "project_id": 1, "date": date(2026, 1, 1) + timedelta(days=i), "progress": i / 1000}
+
+
+def critical_path_row(count: int) -> Dict[str, Any]:
+    return {
+        "critical_path": list(range(0, count, 3)),
+        "total_duration_days": float(count),
+        "weights": {i: 1.5 for i in range(count)},
+    }
+
+
+def burn_down_row(count: int) -> Dict[str, Any]:
+    rows = [progress_row(i) for i in range(count)]
+    return {"actual_progresses": rows, "ideal_progresses": rows, "risk_level": RiskLevel.LOW}
+
+
+def to_objects(value: Any) -> Any:
+    """把字典转换为属性访问对象，模拟 ORM 实例"""
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        return SimpleNamespace(**{key: to_objects(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [to_objects(item) for item in value]
+    return value
+
+
+def build_cases(count: int) -> List[Dict[str, Any]]:
+    """每个用例：模型、对象数量、字典数据（快速路径）与对象数据（ORM 路径）"""
+    cases = []
+    for name, model, factory in [
+        ("Task", Task, task_row),
+        ("Project", Project, project_row),
+        ("User", User, user_row),
+        ("GanttProject", GanttProject, gantt_row),
+        ("ProjectProgress", ProjectProgress, progress_row),
+    ]:
+        rows = [factory(i) for i in range(count)]
+        cases.append({"name": name, "model": List[model], "objects": count, "rows": rows})
+    cases.append({"name": "CriticalPathResponse", "model": CriticalPathResponse, "objects": count,
+                  "rows": critical_path_row(count)})
+    cases.append({"name": "BurnDownProject", "model": BurnDownProject, "objects": 2 * count,
+                  "rows": burn_down_row(count)})
+    return cases
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    """返回多次运行中最快一次的耗时（秒）"""
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def run(count: int = 2000, repeat: int = 5) -> List[Dict[str, Any]]:
+    results = []
+    for case in build_cases(count):
+        adapter = TypeAdapter(case["model"])
+        rows = case["rows"]
+        objects = to_objects(rows)
+        strategies = {
+            # FastAPI 传统路径：校验 ORM 对象 -> jsonable_encoder -> 标准库 json
+            "stdlib_json": lambda: json.dumps(jsonable_encoder(
+                adapter.dump_python(adapter.validate_python(objects, from_attributes=True))
+            )).encode(),
+            # Pydantic 校验后直接序列化为 JSON
+            "pydantic_dump_json": lambda: adapter.dump_json(adapter.validate_python(objects, from_attributes=True)),
+            # 快速路径：行字典直接由 orjson 序列化，不做二次校验
+            "orjson_rows": lambda: orjson.dumps(rows, option=orjson.OPT_NON_STR_KEYS),
+        }
+        result = {"schema": case["name"], "objects": case["objects"]}
+        for strategy, func in strategies.items():
+            result[strategy + "_us_per_object"] = round(measure(func, repeat) / case["objects"] * 1e6, 3)
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应序列化微基准")
+    parser.add_argument("--count", type=int, default=2000, help="每个模型序列化的对象数量")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一次")
+    parser.add_argument("--json", dest="json_path", help="结果输出到 JSON 文件")
+    args = parser.parse_args()
+
+    results = run(args.count, args.repeat)
+    columns = ["stdlib_json", "pydantic_dump_json", "orjson_rows"]
+    print(f"{'schema':<22}" + "".join(f"{column + ' µs/obj':>26}" for column in columns))
+    for result in results:
+        print(f"{result['schema']:<22}" + "".join(f"{result[column + '_us_per_object']:>26}" for column in columns))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# 确定性合成组织数据生成器：按角色分布的用户、指定依赖图形状的项目、带工作量与成员的任务以及多年的每日进度
+#
+# 运行方式（在 backend 目录下）：
+#     python -m benchmarks.synthetic --db bench.db [--users 500] [--projects 100] [--dag layered] [--years 2]
+#
+# 相同的参数与随机种子总是生成完全相同的数据，基准结果可以在不同提交之间对比。
+import argparse
+import json
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, create_engine
+from sqlalchemy.engine import Engine
+
+from app.core.constants import ProjectStatus, TaskWorkload, UserRole
+from app.db.base import Base
+from app.models.project import Project, ProjectProgress, project_dependencies
+from app.models.task import Task, task_assignments
+from app.models.user import User
+from app.services import reachability
+from app.services.gantt import planned_end
+
+DAG_SHAPES = ("none", "chain", "layered", "random", "fan_in")
+DEFAULT_ANCHOR = date(2026, 1, 1)
+BENCH_PASSWORD = "benchmark-password"
+# 预先计算的 BENCH_PASSWORD 的 bcrypt 哈希，避免生成大量用户时重复计算
+BENCH_PASSWORD_HASH = "$2b$12$6jFrebmPmH3bbg4opWSVruMo.jk7WM1QXakvSmXJmqgHxLNvVkQpO"
+WORKLOADS = [TaskWorkload.light, TaskWorkload.medium, TaskWorkload.heavy]
+
+
+def dependency_edges(count: int, shape: str, rng: random.Random, fan: int = 3) -> List[tuple]:
+    """
+    生成项目依赖边（项目序号, 依赖的项目序号），依赖总是指向序号更小的项目，保证无环：
+    - none：无依赖
+    - chain：每个项目依赖前一个项目
+    - layered：按层划分，每个项目依赖上一层中至多 fan 个项目
+    - random：每个项目随机依赖之前的至多 fan 个项目
+    - fan_in：除首个项目外全部依赖首个项目
+    """
+    if shape not in DAG_SHAPES:
+        raise ValueError(f"Unknown DAG shape: {shape}")
+    edges = []
+    if shape == "chain":
+        edges = [(i, i - 1) for i in range(1, count)]
+    elif shape == "fan_in":
+        edges = [(i, 0) for i in range(1, count)]
+    elif shape == "layered":
+        width = max(1, int(count ** 0.5))
+        for i in range(width, count):
+            layer_start = (i // width - 1) * width
+            previous = list(range(layer_start, layer_start + width))
+            edges.extend((i, dep) for dep in rng.sample(previous, rng.randint(1, min(fan, len(previous)))))
+    elif shape == "random":
+        for i in range(1, count):
+            edges.extend((i, dep) for dep in rng.sample(range(i), rng.randint(0, min(fan, i))))
+    return edges
+
+
+def _progress_history(project_id: int, start: date, duration: int, anchor: date,
+                      rng: random.Random) -> List[dict]:
+    """
+    从开始日期到锚定日期的每日进度，单调递增，约三成日期缺失以模拟未记录的日子。
+    每个项目的推进速度不同，进展缓慢的项目会积累跨越数年的进度记录。
+    """
+    rows = []
+    progress = 0.0
+    daily = rng.uniform(0.05, 1.0) / max(duration, 1)
+    day = start
+    while day <= anchor and progress < 1.0:
+        progress = min(1.0, progress + daily * rng.uniform(0.3, 1.5))
+        if rng.random() < 0.7 or progress >= 1.0:
+            rows.append({"project_id": project_id, "date": day, "progress": round(progress, 4)})
+        day += timedelta(days=1)
+    return rows
+
+
+def generate_org(
+    engine: Engine,
+    users: int = 200,
+    projects: int = 50,
+    tasks_per_project: int = 8,
+    dag: str = "layered",
+    years: int = 2,
+    seed: int = 42,
+    anchor: date = DEFAULT_ANCHOR,
+) -> Dict[str, int]:
+    """
+    在空数据库中生成一套合成组织数据，返回各表写入的行数。
+
+    角色分布约为 2% 总监、10% 经理、其余为员工；每个员工以 90% 的概率参与一个任务，
+    任务负责人优先从参与成员中选取。项目开始日期分布在锚定日期之前的 years 年内。
+    """
+    rng = random.Random(seed)
+    Base.metadata.create_all(bind=engine)
+
+    directors = max(1, users // 50)
+    managers = max(1, users // 10)
+    user_rows = []
+    for i in range(users):
+        role = UserRole.director if i < directors else UserRole.manager if i < directors + managers else UserRole.user
+        user_rows.append({
+            "id": i + 1, "username": f"user{i + 1}", "email": f"user{i + 1}@example.com",
+            "hashed_password": BENCH_PASSWORD_HASH, "role": role, "profile": None,
+            "performance": None, "outstanding": False, "task_id": None,
+        })
+
+    project_rows = []
+    progress_rows = []
+    history_days = years * 365
+    for i in range(projects):
+        duration = rng.randint(14, 180)
+        start = anchor - timedelta(days=rng.randint(1, history_days))
+        has_start = rng.random() < 0.8
+        start_time = datetime.combine(start, datetime.min.time()) if has_start else None
+        project_rows.append({
+            "id": i + 1, "name": f"Project {i + 1}", "description": "synthetic project",
+            "status": ProjectStatus.in_progress, "estimated_duration": duration,
+            "start_time": start_time, "end_time": None,
+            "planned_end": planned_end(start_time, None, duration),
+        })
+        progress_rows.extend(_progress_history(i + 1, start, duration, anchor, rng))
+
+    latest = {row["project_id"]: row["progress"] for row in progress_rows}
+    for row in project_rows:
+        progress = latest.get(row["id"], 0.0)
+        row["status"] = (
+            ProjectStatus.completed if progress >= 1.0
+            else ProjectStatus.in_progress if progress > 0 else ProjectStatus.pending
+        )
+
+    edges = dependency_edges(projects, dag, rng)
+    dependency_rows = [{"project_id": a + 1, "depends_on_id": b + 1} for a, b in edges]
+
+    task_rows = []
+    for project_id in range(1, projects + 1):
+        project_done = latest.get(project_id, 0.0)
+        for k in range(tasks_per_project):
+            task_rows.append({
+                "id": len(task_rows) + 1, "name": f"Task {project_id}-{k + 1}", "description": None,
+                "workload": rng.choice(WORKLOADS), "finished": rng.random() < project_done,
+                "project_id": project_id, "head_id": None, "participant_count": 0,
+            })
+
+    members: Dict[int, List[int]] = {}
+    assignments = []
+    primary_tasks = []
+    for row in user_rows:
+        if row["role"] == UserRole.user and task_rows and rng.random() < 0.9:
+            # 约四分之一的员工同时参与两个任务
+            count = 2 if len(task_rows) > 1 and rng.random() < 0.25 else 1
+            for task_id in rng.sample(range(1, len(task_rows) + 1), count):
+                members.setdefault(task_id, []).append(row["id"])
+                assignments.append({"task_id": task_id, "user_id": row["id"]})
+            row["task_id"] = task_id
+            primary_tasks.append({"user_id": row["id"], "assigned_task_id": task_id})
+    for task in task_rows:
+        candidates = members.get(task["id"])
+        task["participant_count"] = len(candidates or ())
+        if candidates:
+            task["head_id"] = rng.choice(candidates)
+
+    with engine.begin() as connection:
+        # 用户与任务互相引用：先写入不带任务的用户，再写入任务，最后补上用户参与的任务
+        connection.execute(User.__table__.insert(), [{**row, "task_id": None} for row in user_rows])
+        connection.execute(Project.__table__.insert(), project_rows)
+        if dependency_rows:
+            connection.execute(project_dependencies.insert(), dependency_rows)
+            reachability.rebuild(connection)
+        if task_rows:
+            connection.execute(Task.__table__.insert(), task_rows)
+        if assignments:
+            connection.execute(task_assignments.insert(), assignments)
+            connection.execute(
+                User.__table__.update()
+                .where(User.__table__.c.id == bindparam("user_id"))
+                .values(task_id=bindparam("assigned_task_id")),
+                primary_tasks,
+            )
+        if progress_rows:
+            connection.execute(ProjectProgress.__table__.insert(), progress_rows)
+
+    return {
+        "users": len(user_rows),
+        "projects": len(project_rows),
+        "dependencies": len(dependency_rows),
+        "tasks": len(task_rows),
+        "assignments": len(assignments),
+        "project_progress": len(progress_rows),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="确定性合成组织数据生成器")
+    parser.add_argument("--db", required=True, help="输出的 SQLite 数据库文件（需不存在或为空）")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--tasks-per-project", type=int, default=8)
+    parser.add_argument("--dag", choices=DAG_SHAPES, default="layered", help="项目依赖图形状")
+    parser.add_argument("--years", type=int, default=2, help="进度历史的年数")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    engine = create_engine(f"sqlite:///{args.db}")
+    counts = generate_org(engine, args.users, args.projects, args.tasks_per_project, args.dag, args.years, args.seed)
+    print(json.dumps(counts, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,51 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import router
+from app.api.endpoints.metrics import router as metrics_router
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import RequestProfileMiddleware
+from app.core.responses import ORJSONResponse
+from app.db.instrumentation import QueryStatsMiddleware
+from app.db.session import get_engine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    启动时读取配置、创建数据库引擎、执行未应用的迁移（多个进程同时启动时由迁移锁依次执行）并启动后台任务线程。
+    导入本模块不做这些工作，工作进程与测试的冷启动只付出导入代码的开销。
+    """
+    engine = get_engine()
+    if settings.AUTO_MIGRATE:
+        from app.db.migrations import upgrade_database
+
+        upgrade_database(engine)
+    # 本进程的后台任务工作线程（JOB_WORKERS 为 0 时不启动）
+    from app.db.session import SessionLocal
+    from app.services.jobs import start_job_runner, stop_job_runner
+
+    start_job_runner(SessionLocal)
+    yield
+    stop_job_runner()
+
 
 # 创建 FastAPI 应用实例，添加元数据
+# 默认响应类使用 orjson；以 Default 包装，声明了 response_model 的接口仍可走 Pydantic 直出 JSON 的快速路径
 app = FastAPI(
     title="CollabW",
     description="后端 API",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=Default(ORJSONResponse),
+    lifespan=lifespan,
 )
 
+# ?profile=1 单请求分析（鉴权在路由依赖中完成，仅总监可用）。
+# 先于 CORS 注册，位于其内层，替换后的分析结果同样带有跨域响应头
+app.add_middleware(RequestProfileMiddleware)
+
 # 配置 CORS
 app.add_middleware(
     CORSMiddleware,
@@ -23,9 +60,18 @@ app.add_middleware(
     allow_headers=["*"],  # 允许所有HTTP头
 )
 
+# 按请求统计 SQL 查询次数与耗时，输出到响应头（QUERY_STATS_ENABLED 关闭时直接透传）
+app.add_middleware(QueryStatsMiddleware)
+
+# 记录按路由聚合的请求耗时与并发数，最后注册以包裹全部中间件
+app.add_middleware(MetricsMiddleware)
+
 # 注册所有 API 路由
 app.include_router(router, prefix="/api", tags=["api"])
 
+# Prometheus 指标采集端点，按惯例挂在根路径
+app.include_router(metrics_router, tags=["metrics"])
+
 @app.get("/")
 def read_root():
     """根路径欢迎信息"""
@@ -1,17 +1,34 @@
+import os
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+# 测试使用独立的数据库，启动时不迁移 DATABASE_URL 指向的库，也不启动连接该库的后台任务线程
+os.environ["AUTO_MIGRATE"] = "false"
+os.environ["JOB_WORKERS"] = "0"
+
 from app.db.base import Base
 from app.db.session import get_db
+from app.core.cache import get_cache_backend
+from app.core.ratelimit import get_login_limiter
+from app.services.tokens import token_versions
+from app.services.gantt import derived_intervals_cache
+from app.db.instrumentation import instrument_engine
+from app.core.constants import UserRole
+from app.core.security import create_access_token
+from app.models.user import User as UserModel
 from app.main import app
 
+# 查询预算插件：@pytest.mark.query_budget(n) 限制测试中每个请求的查询次数
+pytest_plugins = ["tests.query_budget"]
+
 # 使用内存SQLite数据库进行测试
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+instrument_engine(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def override_get_db():
@@ -51,4 +68,61 @@ def clean_db():
             db.execute(table.delete())
         db.commit()
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+    # 数据被直接清空，缓存版本号不会变化，需要同步清空缓存、令牌版本表（新用户可能复用已删除用户的ID）
+    # 与按版本号缓存的甘特图区间树；
+    # 所有请求都来自同一个测试客户端 IP，登录失败次数同样清零
+    get_cache_backend().clear()
+    token_versions.clear()
+    derived_intervals_cache.clear()
+    get_login_limiter().clear()
+
+@pytest.fixture
+def insert_dependency():
+    """直接写入依赖边，绕过接口的成环检查，用于构造迁移前遗留的循环依赖"""
+    from app.models.project import project_dependencies
+
+    def insert(project_id, depends_on_id):
+        db = TestingSessionLocal()
+        try:
+            db.execute(project_dependencies.insert().values(project_id=project_id, depends_on_id=depends_on_id))
+            db.commit()
+        finally:
+            db.close()
+    return insert
+
+@pytest.fixture
+def project_data():
+    """返回用于测试的项目数据字典"""
+    return {
+        "name": "Test Project", 
+        "description": "A project for testing.",
+        "status": "pending",
+        "estimated_duration": 100
+    }
+
+def create_project(client, name, duration=1, depends_on=(), **fields):
+    """通过接口创建项目并返回ID；fields 为其他项目字段（status、start_time 等），depends_on 为上游项目ID"""
+    project_id = client.post("/api/projects/", json={"name": name, "estimated_duration": duration, **fields}).json()["id"]
+    if depends_on:
+        client.post(f"/api/projects/{project_id}/dependencies/", json={"depends_on_ids": list(depends_on)})
+    return project_id
+
+def make_headers(role, username=None):
+    """创建指定角色的用户并返回认证请求头"""
+    username = username or f"{role.value}_user"
+    db = TestingSessionLocal()
+    try:
+        user = UserModel(username=username, email=f"{username}@example.com",
+                         hashed_password="fake_hash", role=role)
+        db.add(user)
+        db.commit()
+        token = create_access_token(data={"sub": str(user.id)})
+    finally:
+        db.close()
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def director_headers(client):
+    """创建总监用户并返回认证请求头"""
+    return make_headers(UserRole.director, "director")
@@ -0,0 +1,47 @@
+"""
+pytest 查询预算插件。
+
+用法：
+    @pytest.mark.query_budget(3)
+    def test_xxx(client): ...
+
+测试函数执行期间（不含夹具准备）每个经过应用的 HTTP 请求执行的 SQL 查询数都不能超过预算，
+可通过 path 参数只约束指定路径前缀的请求，例如 @pytest.mark.query_budget(3, path="/api/gantt")。
+"""
+import pytest
+
+from app.db.instrumentation import request_observers
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(n, path=None): 限制测试中每个请求执行的 SQL 查询次数上限"
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """收集测试函数执行期间每个请求的查询统计，超出预算时判定测试失败"""
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+
+    budget = marker.args[0] if marker.args else marker.kwargs["n"]
+    path_prefix = marker.kwargs.get("path")
+    violations = []
+
+    def observe(method, path, stats):
+        if path_prefix and not path.startswith(path_prefix):
+            return
+        if stats.count > budget:
+            shapes = "\n".join(f"    {n} x {shape}" for shape, n in stats.shapes.most_common(3))
+            violations.append(f"{method} {path}: {stats.count} 次查询，超出预算 {budget}\n{shapes}")
+
+    request_observers.append(observe)
+    try:
+        result = yield
+    finally:
+        request_observers.remove(observe)
+    if violations:
+        pytest.fail("查询次数超出预算：\n" + "\n".join(violations), pytrace=False)
+    return result
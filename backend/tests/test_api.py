@@ -1,16 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
 
-@pytest.fixture
-def project_data():
-    """返回用于测试的项目数据字典"""
-    return {
-        "name": "Test Project", 
-        "description": "A project for testing.",
-        "status": "pending",
-        "estimated_duration": 100
-    }
-
 @pytest.fixture
 def task_data():
     """返回用于测试的任务数据字典"""
@@ -149,10 +139,12 @@ def test_get_outstanding_users(client):
     assert isinstance(response.json(), list)
 
 def test_calculate_performance(client):
-    """测试计算绩效接口"""
+    """测试计算绩效接口提交后台任务，重复提交返回同一个待执行任务"""
     response = client.post("/api/users/calculate-performance")
-    # 可能会因为没有数据而失败，但接口应该可以访问
-    assert response.status_code in [200, 500]  # 允许500因为可能没有测试数据
+    assert response.status_code == 202
+    job = response.json()
+    assert job["kind"] == "users.performance" and job["status"] == "pending"
+    assert client.post("/api/users/calculate-performance").json()["id"] == job["id"]
 
 def test_project_not_found(client):
     """测试获取不存在的项目"""
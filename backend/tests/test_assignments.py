@@ -0,0 +1,116 @@
+import pytest
+from sqlalchemy import create_engine, select, text
+from app.core.constants import UserRole
+from app.db.base import Base
+from app.db.migrations import run_migrations
+from app.models.task import Task as TaskModel, task_assignments
+from app.models.user import User as UserModel
+from tests.conftest import TestingSessionLocal
+
+@pytest.fixture
+def team(client):
+    """一个项目、两个任务与三名员工"""
+    project_id = client.post("/api/projects/", json={"name": "Assign", "estimated_duration": 10}).json()["id"]
+    task_ids = [
+        client.post("/api/tasks/", json={"name": f"T{i}", "workload": "heavy", "project_id": project_id}).json()["id"]
+        for i in range(2)
+    ]
+    db = TestingSessionLocal()
+    try:
+        users = [UserModel(username=f"member{i}", email=f"member{i}@example.com", hashed_password="x",
+                           role=UserRole.user) for i in range(3)]
+        db.add_all(users)
+        db.commit()
+        user_ids = [user.id for user in users]
+    finally:
+        db.close()
+    return project_id, task_ids, user_ids
+
+def test_bulk_assign_is_idempotent_and_counts_participants(client, team):
+    """测试批量分配跳过已分配的用户，参与人数随之更新"""
+    _, (task_id, _), user_ids = team
+    response = client.post(f"/api/tasks/{task_id}/assign", json=user_ids[:2])
+    assert response.status_code == 200
+    assert response.json()["assigned"] == user_ids[:2] and response.json()["participant_count"] == 2
+
+    response = client.post(f"/api/tasks/{task_id}/assign", json=user_ids)
+    assert response.json()["assigned"] == user_ids[2:] and response.json()["participant_count"] == 3
+    assert client.get(f"/api/tasks/{task_id}").json()["participant_count"] == 3
+    assert [user["id"] for user in client.get(f"/api/tasks/{task_id}/users").json()] == user_ids
+
+    assert client.post(f"/api/tasks/{task_id}/assign", json=[999999]).status_code == 404
+
+def test_user_on_multiple_tasks(client, team):
+    """测试同一用户可以参与多个任务，项目成员去重"""
+    project_id, task_ids, user_ids = team
+    for task_id in task_ids:
+        client.post(f"/api/tasks/{task_id}/assign", json=[user_ids[0]])
+
+    assert client.get(f"/api/users/{user_ids[0]}/tasks").json() == task_ids
+    assert client.get(f"/api/users/{user_ids[0]}/task").json() == {"task": task_ids[1]}
+    members = client.get(f"/api/projects/{project_id}/members").json()
+    assert [member["id"] for member in members] == [user_ids[0]]
+
+def test_bulk_unassign_clears_head_and_repoints_task(client, team):
+    """测试批量移除更新人数、取消负责人身份，兼容字段 task_id 指向剩余任务"""
+    _, task_ids, user_ids = team
+    for task_id in task_ids:
+        client.post(f"/api/tasks/{task_id}/assign", json=user_ids)
+    client.put(f"/api/tasks/{task_ids[1]}", json={"head_id": user_ids[0]})
+
+    response = client.post(f"/api/tasks/{task_ids[1]}/unassign", json=[user_ids[0], user_ids[1], 999999])
+    assert response.json()["unassigned"] == user_ids[:2] and response.json()["participant_count"] == 1
+    assert client.get(f"/api/tasks/{task_ids[1]}").json()["head_id"] is None
+    assert client.get(f"/api/users/{user_ids[0]}/task").json() == {"task": task_ids[0]}
+
+    assert client.delete(f"/api/tasks/{task_ids[1]}/unassign/{user_ids[0]}").status_code == 404
+    assert client.delete(f"/api/tasks/{task_ids[1]}/unassign/{user_ids[2]}").status_code == 200
+    assert client.get(f"/api/tasks/{task_ids[1]}").json()["participant_count"] == 0
+
+def test_delete_task_removes_assignments(client, team):
+    """测试删除任务时移除全部分配关系"""
+    _, task_ids, user_ids = team
+    client.post(f"/api/tasks/{task_ids[0]}/assign", json=user_ids)
+    assert client.delete(f"/api/tasks/{task_ids[0]}").status_code == 200
+    assert client.get(f"/api/users/{user_ids[0]}/tasks").json() == []
+    assert client.get(f"/api/users/{user_ids[0]}/task").json() == {"task": None}
+
+def test_performance_splits_workload_by_participants(client, team):
+    """测试绩效按任务参与人数平分工作量，负责人乘以 1.2"""
+    _, task_ids, user_ids = team
+    client.post(f"/api/tasks/{task_ids[0]}/assign", json=user_ids[:2])
+    client.post(f"/api/tasks/{task_ids[1]}/assign", json=user_ids[:1])
+    client.put(f"/api/tasks/{task_ids[1]}", json={"head_id": user_ids[0]})
+
+    from app.services.user import calculate_user_performance
+    db = TestingSessionLocal()
+    try:
+        # heavy 权重 3，项目工期 10
+        assert calculate_user_performance(user_ids[0], db) == pytest.approx(3 / 2 * 10 + 3 * 1.2 * 10)
+        assert calculate_user_performance(user_ids[1], db) == pytest.approx(3 / 2 * 10)
+        assert calculate_user_performance(user_ids[2], db) == 0.0
+    finally:
+        db.close()
+
+def test_migration_backfills_assignments_from_task_id(tmp_path):
+    """测试迁移把旧的 users.task_id 回填为分配关系并统计参与人数"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE task_assignments"))
+        connection.execute(text("ALTER TABLE tasks DROP COLUMN participant_count"))
+        connection.execute(text("INSERT INTO projects (id, name, status) VALUES (1, 'P', 'pending')"))
+        connection.execute(text("INSERT INTO tasks (id, name, workload, finished, project_id) "
+                                "VALUES (1, 'A', 'light', 0, 1), (2, 'B', 'light', 0, 1)"))
+        for i in range(1, 6):
+            task_id = 1 if i <= 3 else 2 if i == 4 else "NULL"
+            connection.execute(text(f"INSERT INTO users (id, username, email, hashed_password, role, task_id) "
+                                    f"VALUES ({i}, 'u{i}', 'u{i}@example.com', 'x', 'user', {task_id})"))
+
+    assert "0002_task_assignments" in run_migrations(engine)
+    with engine.connect() as connection:
+        pairs = connection.execute(select(task_assignments).order_by(task_assignments.c.user_id)).all()
+        counts = dict(connection.execute(select(TaskModel.id, TaskModel.participant_count)).all())
+    assert [tuple(pair) for pair in pairs] == [(1, 1), (1, 2), (1, 3), (2, 4)]
+    assert counts == {1: 3, 2: 1}
+    engine.dispose()
@@ -0,0 +1,75 @@
+import json
+import networkx as nx
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+from benchmarks.coalescing import run as run_coalescing
+from benchmarks.compare import compare, load_metrics
+from benchmarks.load import run_load
+from benchmarks.login_attack import run as run_login_attack
+from benchmarks.synthetic import DAG_SHAPES, generate_org
+
+def dump_tables(engine):
+    """按主键顺序导出所有表的内容"""
+    with engine.connect() as connection:
+        return {
+            table: connection.execute(text(f"SELECT * FROM {table} ORDER BY 1, 2")).fetchall()
+            for table in ("users", "projects", "project_dependencies", "tasks", "project_progress")
+        }
+
+def test_synthetic_org_is_deterministic(tmp_path):
+    """测试相同参数与种子生成完全相同的数据，不同种子生成不同数据"""
+    engines = [create_engine(f"sqlite:///{tmp_path / name}.db") for name in ("a", "b", "c")]
+    counts = [generate_org(engine, users=60, projects=20, seed=seed) for engine, seed in zip(engines, (7, 7, 8))]
+    assert counts[0] == counts[1]
+    assert counts[0]["project_progress"] > 0 and counts[0]["assignments"] > 0
+    assert dump_tables(engines[0]) == dump_tables(engines[1])
+    assert dump_tables(engines[0]) != dump_tables(engines[2])
+
+def test_synthetic_dependency_shapes_are_acyclic(tmp_path):
+    """测试各种依赖图形状都生成无环图"""
+    for shape in DAG_SHAPES:
+        engine = create_engine(f"sqlite:///{tmp_path / shape}.db")
+        counts = generate_org(engine, users=10, projects=30, tasks_per_project=1, dag=shape, years=1)
+        with engine.connect() as connection:
+            edges = connection.execute(text("SELECT project_id, depends_on_id FROM project_dependencies")).fetchall()
+        graph = nx.DiGraph(list(edges))
+        assert counts["dependencies"] == len(edges)
+        assert nx.is_directed_acyclic_graph(graph)
+        if shape == "chain":
+            assert len(edges) == 29
+
+def test_load_driver_reports_latency(client, tmp_path):
+    """测试压测驱动输出各接口的延迟统计，且不影响测试客户端的数据库依赖"""
+    result = run_load(str(tmp_path / "load.db"), requests=6, concurrency=2,
+                      endpoints=["/api/projects/", "/api/projects/{project_id}/burn-down/"],
+                      users=20, projects=5, years=1)
+    assert set(result["endpoints"]) == {"/api/projects/", "/api/projects/{project_id}/burn-down/"}
+    for stats in result["endpoints"].values():
+        assert stats["requests"] == 6 and stats["errors"] == 0
+        assert 0 < stats["p50_ms"] <= stats["p95_ms"] <= stats["max_ms"]
+    assert client.get("/api/projects/").json() == []
+
+def test_compare_flags_regressions(tmp_path):
+    """测试结果对比识别超过阈值的退化"""
+    old, new = tmp_path / "old.json", tmp_path / "new.json"
+    old.write_text(json.dumps({"endpoints": {"/a": {"p95_ms": 10.0}, "/b": {"p95_ms": 10.0}}}))
+    new.write_text(json.dumps({"endpoints": {"/a": {"p95_ms": 10.5}, "/b": {"p95_ms": 15.0}}}))
+    rows = {row["name"]: row for row in compare(load_metrics(old), load_metrics(new), 0.10)}
+    assert not rows["/a"]["regressed"]
+    assert rows["/b"]["regressed"]
+
+def test_coalescing_benchmark_keeps_one_computation():
+    """测试合并基准：逐个计算的次数随并发数增长，合并后始终只计算一次"""
+    low, high = run_coalescing([1, 8], work=1000, rounds=1)["rows"]
+    assert high["naive"]["computations"] == 8
+    assert low["coalesced"]["computations"] == high["coalesced"]["computations"] == 1
+
+def test_login_attack_protected_phase_skips_bcrypt(client, monkeypatch):
+    """测试登录爆破压测：有防护时攻击者 IP 很快被限制，测量期间不再做密码校验，且恢复测试客户端的配置"""
+    monkeypatch.setattr(settings, "LOGIN_ATTEMPTS_PER_IP", 1)
+    result = run_login_attack(attackers=2, interval=0.05, warmup=2.0, requests=10, concurrency=2, users=5)
+    assert set(result["phases"]) == {"baseline", "unprotected", "protected"}
+    assert all(phase["errors"] == 0 for phase in result["phases"].values())
+    assert set(result["phases"]["protected"]["login_attempts"]) <= {"429"}
+    assert settings.LOGIN_ATTEMPTS_PER_IP == 1 and settings.LOGIN_HASH_WAIT_MS == 100
+    assert client.get("/api/projects/").json() == []
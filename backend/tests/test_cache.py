@@ -0,0 +1,92 @@
+from app.core.cache import MemoryCacheBackend, get_cache_backend, make_etag, etag_matches, set_cache_backend
+
+def test_memory_backend_lru_eviction():
+    """测试内存后端按最近使用淘汰"""
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", b"1")
+    backend.set("b", b"2")
+    assert backend.get("a") == b"1"  # a 变为最近使用
+    backend.set("c", b"3")
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+    assert backend.get("c") == b"3"
+
+def test_memory_backend_versions():
+    """测试实体版本号递增"""
+    backend = MemoryCacheBackend()
+    assert backend.get_versions(["projects", "tasks"]) == [0, 0]
+    backend.bump_version("projects")
+    assert backend.get_versions(["projects", "tasks"]) == [1, 0]
+
+def test_etag_matching():
+    """测试 If-None-Match 匹配规则"""
+    etag = make_etag("ns", [1], [2, 3])
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag != make_etag("ns", [1], [2, 4])
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+def test_etag_changes_with_new_backend(client, project_data):
+    """测试换用新的缓存后端（进程重启、缓存被清空）后版本号虽然相同，旧 ETag 也不再命中"""
+    client.post("/api/projects/", json=project_data)
+    etag = client.get("/api/projects/").headers["etag"]
+    previous = get_cache_backend()
+    set_cache_backend(MemoryCacheBackend())
+    try:
+        response = client.get("/api/projects/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+    finally:
+        set_cache_backend(previous)
+
+def test_projects_list_not_modified(client, project_data):
+    """测试项目列表返回 ETag 并在未变化时返回 304"""
+    client.post("/api/projects/", json=project_data)
+    response = client.get("/api/projects/")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert len(response.json()) == 1
+
+    response = client.get("/api/projects/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+def test_mutation_invalidates_cached_response(client, project_data):
+    """测试写操作后 ETag 变化且返回最新数据"""
+    create_response = client.post("/api/projects/", json=project_data)
+    project_id = create_response.json()["id"]
+    etag = client.get("/api/gantt/project-data").headers["etag"]
+
+    client.put(f"/api/projects/{project_id}", json={"name": "Renamed"})
+    response = client.get("/api/gantt/project-data", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()[0]["name"] == "Renamed"
+
+def test_critical_path_cached(client, project_data):
+    """测试关键路径接口的缓存响应"""
+    client.post("/api/projects/", json=project_data)
+    first = client.get("/api/gantt/critical-path")
+    second = client.get("/api/gantt/critical-path")
+    assert first.status_code == 200
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.json() == second.json()
+
+def test_progress_event_published_after_version_bump(client, project_data, monkeypatch):
+    """测试进度变化事件在项目缓存版本更新之后发布，客户端收到事件后拉取不会得到旧数据"""
+    from app.core.cache import entity_versions
+    from app.core.constants import CacheEntity
+    from app.services import project as project_service
+
+    project_id = client.post("/api/projects/", json=project_data).json()["id"]
+    seen = []
+    monkeypatch.setattr(project_service, "publish_event",
+                        lambda event_type, **data: seen.append(entity_versions([CacheEntity.projects])[0]))
+    before = entity_versions([CacheEntity.projects])[0]
+    client.post("/api/tasks/", json={"name": "T", "description": "d", "workload": "light",
+                                     "finished": True, "project_id": project_id})
+    assert seen and seen[0] > before
+    assert seen[0] == entity_versions([CacheEntity.projects])[0]
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from app.services.cpm import compute_cpm
+from tests.conftest import create_project
+
+
+def test_compute_cpm_forward_and_backward_pass():
+    """测试教科书示例：A(3) -> B(2)、A -> C(4)、B/C -> D(1)，B 有 2 天时差"""
+    result = compute_cpm([1, 2, 3, 4], [3, 2, 4, 1], [(2, 1), (3, 1), (4, 2), (4, 3)])
+    assert result.project_duration == 8
+    assert result.earliest_start == [0, 3, 3, 7]
+    assert result.earliest_finish == [3, 5, 7, 8]
+    assert result.latest_start == [0, 5, 3, 7]
+    assert result.latest_finish == [3, 7, 7, 8]
+    assert result.total_float == [0, 2, 0, 0]
+    assert result.free_float == [0, 2, 0, 0]
+    assert result.critical_ids() == [1, 3, 4]
+
+
+def test_compute_cpm_free_float_differs_from_total_float():
+    """测试链上前段项目的自由时差为 0，时差留给链尾项目"""
+    # 1(10) 与链 2(1) -> 3(1) 并行
+    result = compute_cpm([1, 2, 3], [10, 1, 1], [(3, 2)])
+    assert result.total_float == [0, 8, 8]
+    assert result.free_float == [0, 0, 8]
+
+
+def test_compute_cpm_matches_longest_path_on_random_dag():
+    """测试随机无环图上的项目总工期等于最长路径，且关键项目的时差均为 0"""
+    import networkx as nx
+
+    rng = random.Random(3)
+    ids = list(range(1, 201))
+    durations = [rng.randint(0, 20) for _ in ids]
+    edges = [(i, dep) for i in ids[1:] for dep in rng.sample(range(1, i), min(i - 1, rng.randint(0, 3)))]
+    result = compute_cpm(ids, durations, edges)
+
+    # 以节点工期为出边权重，所有项目连到汇点，最长路径长度即项目总工期
+    duration_of = dict(zip(ids, durations))
+    graph = nx.DiGraph()
+    graph.add_weighted_edges_from((dep, i, duration_of[dep]) for i, dep in edges)
+    graph.add_weighted_edges_from((project_id, "end", duration_of[project_id]) for project_id in ids)
+    longest = nx.dag_longest_path_length(graph)
+    assert result.project_duration == longest
+    assert all(slack >= 0 for slack in result.total_float)
+    assert all(0 <= free <= total for free, total in zip(result.free_float, result.total_float))
+    critical = set(result.critical_ids())
+    assert critical
+    assert all(result.earliest_start[i] == result.latest_start[i] for i, project_id in enumerate(ids)
+               if project_id in critical)
+
+
+def test_compute_cpm_detects_cycles():
+    """测试循环依赖抛出 ValueError"""
+    with pytest.raises(ValueError):
+        compute_cpm([1, 2, 3], [1, 1, 1], [(2, 1), (3, 2), (1, 3)])
+
+
+def test_compute_cpm_ignores_unknown_projects():
+    """测试指向不存在项目的依赖边被忽略"""
+    result = compute_cpm([1], [5], [(1, 99)])
+    assert result.earliest_start == [0] and result.project_duration == 5
+
+
+def test_schedule_endpoint(client):
+    """测试排程接口返回并列数组，已完成项目的剩余工期为 0"""
+    a = create_project(client, "A", 3)
+    b = create_project(client, "B", 2)
+    c = create_project(client, "C", 4)
+    done = create_project(client, "Done", 30, status="completed")
+    client.post(f"/api/projects/{b}/dependencies/", json={"depends_on_ids": [a]})
+    client.post(f"/api/projects/{c}/dependencies/", json={"depends_on_ids": [a, done]})
+
+    response = client.get("/api/gantt/schedule")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ids"] == [a, b, c, done]
+    assert data["duration"] == [3, 2, 4, 0]
+    assert data["project_duration"] == 7
+    assert data["earliest_start"] == [0, 3, 3, 0]
+    assert data["total_float"] == [0, 2, 0, 3]
+    assert data["critical"] == [a, c]
+
+    etag = response.headers["etag"]
+    assert client.get("/api/gantt/schedule", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_schedule_endpoint_rejects_cycles(client, insert_dependency):
+    """测试存在遗留的循环依赖时返回 409"""
+    a = create_project(client, "A", 1)
+    b = create_project(client, "B", 1)
+    client.post(f"/api/projects/{a}/dependencies/", json={"depends_on_ids": [b]})
+    insert_dependency(b, a)
+    response = client.get("/api/gantt/schedule")
+    assert response.status_code == 409
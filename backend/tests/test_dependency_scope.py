@@ -0,0 +1,64 @@
+import pytest
+
+
+@pytest.fixture
+def programme(client):
+    """
+    依赖图：2 依赖 1，3 依赖 2，4 依赖 3 和 6；5 依赖 7，与其余项目无关。
+    6 有明确的起止时间，4 的开始时间由 6 的结束时间推算
+    """
+    ids = {}
+    for name in range(1, 8):
+        project = {"name": f"P{name}", "description": "", "status": "pending", "estimated_duration": name}
+        if name == 6:
+            project.update(start_time="2030-01-01T00:00:00", end_time="2030-06-01T00:00:00")
+        ids[name] = client.post("/api/projects/", json=project).json()["id"]
+    for project, depends_on in {2: [1], 3: [2], 4: [3, 6], 5: [7]}.items():
+        client.post(f"/api/projects/{ids[project]}/dependencies/",
+                    json={"depends_on_ids": [ids[dep] for dep in depends_on]})
+    return ids
+
+
+def test_upstream_and_downstream(client, programme):
+    """测试上游、下游接口返回全部间接相连的项目，不含自身"""
+    upstream = client.get(f"/api/projects/{programme[4]}/upstream").json()
+    assert [project["id"] for project in upstream] == [programme[n] for n in (1, 2, 3, 6)]
+    downstream = client.get(f"/api/projects/{programme[1]}/downstream").json()
+    assert [project["id"] for project in downstream] == [programme[n] for n in (2, 3, 4)]
+    assert client.get(f"/api/projects/{programme[5]}/downstream").json() == []
+    assert client.get("/api/projects/99999/upstream").status_code == 404
+
+
+def test_closure_terminates_on_cycles(client, programme, insert_dependency):
+    """测试存在遗留的循环依赖时闭包查询仍能终止"""
+    insert_dependency(programme[1], programme[3])
+    upstream = client.get(f"/api/projects/{programme[2]}/upstream").json()
+    assert sorted(project["id"] for project in upstream) == [programme[n] for n in (1, 3)]
+
+
+def test_gantt_data_scoped_to_programme(client, programme):
+    """测试甘特图只返回根项目的上下游，群外的前置项目仍参与开始时间推算"""
+    response = client.get("/api/gantt/project-data", params={"root": programme[2]})
+    data = {project["id"]: project for project in response.json()}
+    assert set(data) == {programme[n] for n in (1, 2, 3, 4)}
+    assert data[programme[4]]["start_time"] == "2030-06-01"
+
+    everything = client.get("/api/gantt/project-data").json()
+    assert len(everything) == 7
+    assert [p for p in everything if p["id"] in data] == list(data.values())
+
+    both = client.get("/api/gantt/project-data", params=[("root", programme[5]), ("root", programme[1])])
+    assert {project["id"] for project in both.json()} == {programme[n] for n in (1, 2, 3, 4, 5, 7)}
+
+
+def test_critical_path_scoped_to_programme(client, programme):
+    """测试关键路径只在根项目所在的项目群内计算"""
+    scoped = client.get("/api/gantt/critical-path", params={"root": programme[5]}).json()
+    assert set(scoped["weights"]) == {str(programme[5]), str(programme[7])}
+    assert scoped["critical_path"] == [programme[7], programme[5]]
+    assert scoped["total_duration_days"] == 12
+
+    full = client.get("/api/gantt/critical-path")
+    assert len(full.json()["weights"]) == 7
+    assert full.headers["etag"] != client.get("/api/gantt/critical-path",
+                                              params={"root": programme[5]}).headers["etag"]
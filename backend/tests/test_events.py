@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+from app.core.events import EventHub, RESYNC_FRAME, HEARTBEAT_FRAME, format_sse
+
+def test_format_sse():
+    """测试 SSE 帧格式"""
+    frame = format_sse("task.created", {"id": 1}, event_id=7)
+    assert frame == b'id: 7\nevent: task.created\ndata: {"id":1}\n\n'
+
+def test_publish_without_subscribers():
+    """测试无订阅者时发布不报错"""
+    hub = EventHub()
+    hub.publish("task.created", {"id": 1})
+    assert hub.subscriber_count == 0
+
+def test_subscriber_receives_events_in_order():
+    """测试订阅者按顺序收到事件，空闲时收到心跳"""
+    async def scenario():
+        hub = EventHub()
+        subscriber = hub.subscribe()
+        hub.publish("task.created", {"id": 1})
+        hub.publish("task.finished", {"id": 1})
+        first = await subscriber.next_frame(timeout=1)
+        second = await subscriber.next_frame(timeout=1)
+        idle = await subscriber.next_frame(timeout=0.01)
+        hub.unsubscribe(subscriber)
+        return first, second, idle, hub.subscriber_count
+
+    first, second, idle, remaining = asyncio.run(scenario())
+    assert b"event: task.created" in first
+    assert b"event: task.finished" in second
+    assert idle == HEARTBEAT_FRAME
+    assert remaining == 0
+
+def test_slow_subscriber_overflow_resyncs():
+    """测试慢订阅者溢出后丢弃积压并收到 resync"""
+    async def scenario():
+        hub = EventHub(max_queue=3)
+        subscriber = hub.subscribe()
+        for i in range(5):
+            hub.publish("task.updated", {"id": i})
+        frames = [await subscriber.next_frame(timeout=1)]
+        frames.append(await subscriber.next_frame(timeout=0.01))
+        return frames, subscriber.dropped
+
+    frames, dropped = asyncio.run(scenario())
+    assert frames[0] == RESYNC_FRAME
+    assert b"task.updated" in frames[1]  # 溢出后的新事件仍可正常投递
+    assert dropped == 4
+
+def test_thousands_of_idle_subscribers():
+    """负载测试：数千个空闲订阅者都能收到工作线程发布的事件"""
+    subscriber_count = 5000
+
+    async def scenario():
+        hub = EventHub()
+        subscribers = [hub.subscribe() for _ in range(subscriber_count)]
+        waiters = [asyncio.ensure_future(s.next_frame(timeout=10)) for s in subscribers]
+        await asyncio.sleep(0)  # 让所有订阅者进入等待状态
+
+        started = time.perf_counter()
+        publisher = threading.Thread(target=hub.publish, args=("project.progress_changed", {"id": 1}))
+        publisher.start()
+        frames = await asyncio.gather(*waiters)
+        elapsed = time.perf_counter() - started
+        publisher.join()
+        return frames, elapsed
+
+    frames, elapsed = asyncio.run(scenario())
+    assert len(frames) == subscriber_count
+    assert all(b"project.progress_changed" in frame for frame in frames)
+    assert elapsed < 5
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+import sqlite3
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+from sqlalchemy import create_engine
+from app.db.base import Base
+
+def test_export_tasks_ndjson(client):
+    """测试以 NDJSON 流式导出任务"""
+    project = client.post("/api/projects/", json={"name": "Export"}).json()
+    for i in range(3):
+        client.post("/api/tasks/", json={"name": f"T{i}", "project_id": project["id"], "workload": "heavy"})
+
+    response = client.get("/api/export/tasks?format=ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["name"] for row in rows] == ["T0", "T1", "T2"]
+    assert rows[0]["workload"] == "heavy"
+
+def test_export_projects_csv(client):
+    """测试以 CSV 流式导出项目，枚举输出其值"""
+    client.post("/api/projects/", json={"name": "Export", "status": "in_progress"})
+    response = client.get("/api/export/projects?format=csv")
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert rows[0]["name"] == "Export"
+    assert rows[0]["status"] == "in_progress"
+
+def test_export_unknown_entity(client):
+    """测试导出不支持的数据类型"""
+    response = client.get("/api/export/unknown")
+    assert response.status_code == 422
+
+def test_export_million_progress_rows_flat_memory(tmp_path):
+    """测试导出一百万条进度记录时内存保持平稳"""
+    row_count = 1_000_000
+    db_path = tmp_path / "export.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO projects (id, name, status) VALUES (1, 'Big', 'pending')")
+    # 在 SQLite 内部用递归 CTE 生成数据，避免测试本身占用内存
+    conn.execute(
+        """
+        INSERT INTO project_progress (project_id, date, progress)
+        WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i + 1 < ?)
+        SELECT 1, date('2000-01-01', '+' || (i % 10000) || ' days'), (i % 100) / 100.0 FROM seq
+        """,
+        (row_count,),
+    )
+    conn.commit()
+    conn.close()
+
+    # ru_maxrss 是进程级的历史峰值，会被同一进程中先运行的测试抬高；在新的子进程中导出才能测到增长
+    script = textwrap.dedent(f"""
+        import resource
+        from sqlalchemy import create_engine
+        from app.core.constants import ExportEntity, DataFormat
+        from app.services.export import stream_export
+
+        engine = create_engine({f"sqlite:///{db_path}"!r})
+        baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        exported_rows = 0
+        for chunk in stream_export(engine, ExportEntity.progress, DataFormat.ndjson):
+            exported_rows += chunk.count(b"\\n")
+        print(exported_rows, (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb) / 1024)
+    """)
+    result = subprocess.run([sys.executable, "-c", script], cwd=Path(__file__).parents[1],
+                            capture_output=True, text=True, check=True)
+    exported_rows, peak_growth_mb = result.stdout.split()
+    engine.dispose()
+
+    assert int(exported_rows) == row_count
+    assert float(peak_growth_mb) < 64
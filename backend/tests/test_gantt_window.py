@@ -0,0 +1,130 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select, update
+
+from app.db.migrations import run_migrations
+from app.models.project import Project as ProjectModel
+from app.services.gantt import planned_end
+from app.services.intervals import IntervalTree
+from benchmarks.synthetic import generate_org
+from tests.conftest import create_project
+
+TODAY = date.today()
+
+
+def day(offset):
+    return (TODAY + timedelta(days=offset)).isoformat()
+
+
+def at(offset):
+    return f"{day(offset)}T00:00:00"
+
+
+def window_ids(client, start=None, end=None):
+    params = {key: day(value) for key, value in (("from", start), ("to", end)) if value is not None}
+    return [project["id"] for project in client.get("/api/gantt/project-data", params=params).json()]
+
+
+@pytest.fixture
+def timeline(client):
+    """
+    old：-400 ~ -300；current：-10 ~ +10；future：+100 ~ +130；
+    next 依赖 current，开始时间推算为 +10，结束于 +15；floating 无开始时间与依赖，从当天开始
+    """
+    ids = {}
+    ids["old"] = create_project(client, "old", 100, start_time=at(-400))
+    ids["current"] = create_project(client, "current", 5, start_time=at(-10), end_time=at(10))
+    ids["future"] = create_project(client, "future", 30, start_time=at(100))
+    ids["next"] = create_project(client, "next", 5, depends_on=[ids["current"]])
+    ids["floating"] = create_project(client, "floating", 2)
+    return ids
+
+
+def test_interval_tree_matches_brute_force():
+    """测试区间树的重叠查询与逐个比较的结果一致，并按开始值排序"""
+    rng = random.Random(3)
+    intervals = []
+    for value in range(300):
+        start = rng.randint(0, 1000)
+        intervals.append((start, start + rng.randint(0, 80), value))
+    tree = IntervalTree(intervals)
+    assert len(tree) == 300
+    for _ in range(200):
+        low = rng.randint(-50, 1050)
+        high = low + rng.randint(0, 100)
+        expected = sorted((start, value) for start, end, value in intervals if start <= high and end >= low)
+        assert tree.overlapping(low, high) == [value for _, value in expected]
+    assert IntervalTree([]).overlapping(0, 10) == []
+
+
+def test_window_filters_fixed_and_derived_projects(client, timeline):
+    """测试时间窗口同时筛选有开始时间的项目与依赖推算开始时间的项目，边界日期计入窗口"""
+    assert window_ids(client, -5, 5) == [timeline[n] for n in ("current", "floating")]
+    assert window_ids(client, 12, 20) == [timeline["next"]]
+    assert window_ids(client, 15, 100) == [timeline[n] for n in ("future", "next")]
+    assert window_ids(client, -300, -300) == [timeline["old"]]
+    assert window_ids(client, -299, -11) == []
+    assert window_ids(client, start=90) == [timeline["future"]]
+    assert window_ids(client, end=-300) == [timeline["old"]]
+
+
+def test_window_matches_full_data(client, timeline):
+    """测试窗口结果与全量数据中重叠的项目完全一致，指定根项目时同样生效"""
+    everything = client.get("/api/gantt/project-data").json()
+    params = {"from": day(-5), "to": day(12)}
+    windowed = client.get("/api/gantt/project-data", params=params).json()
+    assert windowed == [p for p in everything if p["start_time"] <= day(12) and p["end_time"] >= day(-5)]
+
+    scoped = client.get("/api/gantt/project-data", params={**params, "root": timeline["next"]}).json()
+    assert [p["id"] for p in scoped] == [timeline["current"], timeline["next"]]
+
+
+def test_window_follows_project_updates(client, timeline):
+    """测试修改开始时间与预计时长后，窗口查询使用新的日期"""
+    client.put(f"/api/projects/{timeline['old']}", json={"start_time": at(-2)})
+    assert timeline["old"] in window_ids(client, 50, 60)
+    client.put(f"/api/projects/{timeline['old']}", json={"estimated_duration": 1})
+    assert timeline["old"] not in window_ids(client, 50, 60)
+
+
+def test_window_reuses_derived_intervals(client, timeline, monkeypatch):
+    """测试重复的窗口查询复用推算日期的区间树，项目修改后重建"""
+    from app.services import gantt
+
+    calls = []
+    build = gantt.derived_intervals
+    monkeypatch.setattr(gantt, "derived_intervals", lambda *args: calls.append(1) or build(*args))
+    assert window_ids(client, 12, 20) == [timeline["next"]]
+    assert window_ids(client, -5, 5) == [timeline[n] for n in ("current", "floating")]
+    assert len(calls) == 1
+
+    client.put(f"/api/projects/{timeline['current']}", json={"end_time": at(20)})
+    assert window_ids(client, 12, 19) == [timeline["current"]]
+    assert window_ids(client, 21, 25) == [timeline["next"]]
+    assert len(calls) == 2
+
+
+def test_invalid_window(client):
+    """测试结束日期早于开始日期时返回 400"""
+    response = client.get("/api/gantt/project-data", params={"from": day(1), "to": day(0)})
+    assert response.status_code == 400
+
+
+def test_planned_end_backfill(tmp_path):
+    """测试迁移按开始时间、结束时间与预计时长回填 planned_end，未设置开始时间的项目保持为空"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'window.db'}")
+    generate_org(engine, users=10, projects=30, tasks_per_project=1, years=1)
+    projects = ProjectModel.__table__
+    with engine.begin() as connection:
+        expected = {row.id: row.planned_end for row in connection.execute(select(projects))}
+        connection.execute(update(projects).values(planned_end=None))
+
+    assert "0004_project_planned_end" in run_migrations(engine)
+    with engine.connect() as connection:
+        rows = connection.execute(select(projects)).all()
+    assert {row.id: row.planned_end for row in rows} == expected
+    assert all(row.planned_end == planned_end(row.start_time, row.end_time, row.estimated_duration) for row in rows)
+    assert any(row.planned_end is None for row in rows) and any(row.planned_end for row in rows)
+    engine.dispose()
@@ -0,0 +1,108 @@
+import io
+import json
+from app.core.constants import ImportEntity, DataFormat, ErrorMessage
+from app.core.security import _hash_slots, hash_concurrency
+from app.services import importer
+from app.services.importer import run_import
+from tests.conftest import TestingSessionLocal
+
+def ndjson(*records):
+    return "\n".join(json.dumps(record) for record in records) + "\n"
+
+def test_import_users_reports_row_errors(client, director_headers):
+    """测试导入用户时单行错误不影响其他行"""
+    content = ndjson(
+        {"username": "alice", "email": "alice@example.com", "password": "password123"},
+        {"username": "alice", "email": "other@example.com", "password": "password123"},  # 批内重复
+        {"username": "bob"},  # 缺少字段
+        {"username": "director", "email": "d2@example.com", "password": "password123"},  # 已存在
+        {"username": "carol", "email": "carol@example.com", "password": "password123", "role": "manager"},
+        {"username": "dave", "email": "dave@example.com", "password": "short"},  # 密码少于 8 位
+    ) + "not json\n"
+    response = client.post(
+        "/api/import/users", headers=director_headers,
+        files={"file": ("users.ndjson", content, "application/x-ndjson")},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["total"] == 7
+    assert report["inserted"] == 2
+    assert [error["row"] for error in report["errors"]] == [2, 3, 4, 6, 7]
+    assert report["errors"][-2]["error"] == ErrorMessage.PASSWORD_TOO_SHORT
+
+    users = {user["username"]: user for user in client.get("/api/users/").json()}
+    assert "alice" in users
+    assert users["alice"]["hashed_password"] != "password123"
+
+def test_import_requires_director(client):
+    """测试未认证时不能导入"""
+    response = client.post("/api/import/users", files={"file": ("u.ndjson", "", "application/x-ndjson")})
+    assert response.status_code == 401
+
+def test_import_projects_tasks_and_dependencies_by_name():
+    """测试按名称解析引用导入项目、任务与依赖"""
+    db = TestingSessionLocal()
+    try:
+        projects_csv = "name,estimated_duration,status\nAlpha,10,pending\nBeta,5,\n"
+        report = run_import(db, ImportEntity.projects, io.StringIO(projects_csv), DataFormat.csv)
+        assert (report.inserted, report.failed) == (2, 0)
+
+        tasks = ndjson(
+            {"name": "A1", "project_name": "Alpha", "workload": "heavy", "finished": True},
+            {"name": "A2", "project_name": "Alpha"},
+            {"name": "X", "project_name": "Missing"},
+        )
+        report = run_import(db, ImportEntity.tasks, io.StringIO(tasks), batch_size=2)
+        assert report.inserted == 2
+        assert [error.row for error in report.errors] == [3]
+
+        deps = ndjson(
+            {"project_name": "Beta", "depends_on_name": "Alpha"},
+            {"project_name": "Beta", "depends_on_name": "Alpha"},  # 重复边跳过
+            {"project_name": "Alpha", "depends_on_name": "Alpha"},
+        )
+        report = run_import(db, ImportEntity.dependencies, io.StringIO(deps))
+        assert report.inserted == 2
+        assert [error.row for error in report.errors] == [3]
+    finally:
+        db.close()
+
+def test_imported_data_visible_through_api(client):
+    """测试导入后接口返回最新数据（缓存已失效）"""
+    assert client.get("/api/projects/").json() == []
+    db = TestingSessionLocal()
+    try:
+        run_import(db, ImportEntity.projects, io.StringIO(ndjson({"name": "Imported"})))
+    finally:
+        db.close()
+    assert [p["name"] for p in client.get("/api/projects/").json()] == ["Imported"]
+
+def test_bulk_hashing_shares_hash_slots(monkeypatch):
+    """测试批量哈希每个在途的块占用一个本进程的哈希槽位，并发块数不超过哈希并发上限"""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    limit = hash_concurrency()
+    lock = threading.Lock()
+    in_flight, peak = [0], [0]
+
+    def slow_chunk(passwords):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+        return [password + "!" for password in passwords]
+
+    passwords = [f"p{i}" for i in range(max(limit * 4, importer.PARALLEL_HASH_THRESHOLD) * 2)]
+    with ThreadPoolExecutor(max_workers=len(passwords)) as pool:
+        monkeypatch.setattr(importer, "get_hash_pool", lambda: pool)
+        monkeypatch.setattr(importer, "_hash_chunk", slow_chunk)
+        assert importer.hash_passwords(passwords) == [password + "!" for password in passwords]
+    assert 0 < peak[0] <= limit
+    slots = _hash_slots()
+    assert all(slots.acquire(blocking=False) for _ in range(limit))  # 结束后槽位全部归还
+    for _ in range(limit):
+        slots.release()
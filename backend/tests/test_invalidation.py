@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from app.core.cache import MemoryCacheBackend
+from app.core.config import settings
+from app.core.constants import CacheEntity
+from app.core.events import HEARTBEAT_FRAME, RESYNC_FRAME, EventHub
+from app.core.invalidation import EventRelay, InvalidationBus, rotate_cache_epoch
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+@pytest.fixture
+def shared_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bus.db'}")
+    yield engine
+    engine.dispose()
+
+def test_bus_propagates_versions_between_processes(shared_engine):
+    """测试一个进程发布的失效在另一个进程追平后版本号一致"""
+    first, second = MemoryCacheBackend(), MemoryCacheBackend()
+    bus_a = InvalidationBus(shared_engine, first)
+    bus_b = InvalidationBus(shared_engine, second)
+
+    bus_a.publish([CacheEntity.projects, CacheEntity.tasks])
+    assert second.get_versions(["projects", "tasks"]) == [0, 0]
+    bus_b.sync()
+    assert second.get_versions(["projects", "tasks"]) == first.get_versions(["projects", "tasks"]) != [0, 0]
+
+    # 新启动的进程从通知表恢复版本号，ETag 与已有进程一致
+    third = MemoryCacheBackend()
+    InvalidationBus(shared_engine, third)
+    assert third.get_versions(["projects", "tasks", "users"]) == first.get_versions(["projects", "tasks", "users"])
+    assert first.epoch() == second.epoch() == third.epoch()
+
+    rotated = rotate_cache_epoch(shared_engine)
+    fourth = MemoryCacheBackend()
+    InvalidationBus(shared_engine, fourth)
+    assert fourth.epoch() == rotated != first.epoch()
+
+def test_bus_invalidates_everything_after_pruned_gap(shared_engine):
+    """测试错过的通知已被清理时，全部实体失效"""
+    stale = MemoryCacheBackend()
+    bus_stale = InvalidationBus(shared_engine, stale)
+    writer = InvalidationBus(shared_engine, MemoryCacheBackend(), retention=10)
+    for _ in range(100):
+        writer.publish([CacheEntity.users])
+    writer.publish([CacheEntity.projects])
+
+    bus_stale.sync()
+    assert all(version >= 100 for version in stale.get_versions([entity.value for entity in CacheEntity]))
+
+def test_event_relay_forwards_between_processes(shared_engine):
+    """测试一个进程发布的事件由其他进程转发给各自的订阅者，自己发布的不重复投递；错过清理掉的通知时发送 resync"""
+    async def scenario():
+        hub_a, hub_b = EventHub(), EventHub()
+        relay_a, relay_b = EventRelay(shared_engine, hub_a), EventRelay(shared_engine, hub_b, retention=10)
+        subscriber_a, subscriber_b = hub_a.subscribe(), hub_b.subscribe()
+        relay_a.publish("project.created", {"id": 1})
+        assert relay_a.poll() == 0 and relay_b.poll() == 1
+        frames = [await subscriber_b.next_frame(timeout=1), await subscriber_a.next_frame(timeout=0.01)]
+
+        for i in range(100):
+            relay_b.publish("project.updated", {"id": i})
+        relay_a.poll()
+        frames.append(await subscriber_a.next_frame(timeout=1))
+        return frames
+
+    created, idle, resync = asyncio.run(scenario())
+    assert b"event: project.created" in created and b'"id":1' in created
+    assert idle == HEARTBEAT_FRAME
+    assert resync == RESYNC_FRAME
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def workers(tmp_path):
+    """按 app.server 的方式准备数据库，然后启动三个共享同一数据库的独立工作进程"""
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'workers.db'}",
+        "SECRET_KEY": settings.SECRET_KEY,
+        "DIRECTOR_REGISTER_KEY": settings.DIRECTOR_REGISTER_KEY,
+        "MANAGER_REGISTER_KEY": settings.MANAGER_REGISTER_KEY,
+        "USER_REGISTER_KEY": settings.USER_REGISTER_KEY,
+        "AUTO_MIGRATE": "false",
+        "CACHE_INVALIDATION_BUS": "true",
+    }
+    subprocess.run([sys.executable, "-m", "app.db.migrations", "--database-url", env["DATABASE_URL"], "upgrade"],
+                   cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+    ports = [free_port() for _ in range(3)]
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                         cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        for port in ports
+    ]
+    try:
+        urls = [f"http://127.0.0.1:{port}" for port in ports]
+        deadline = time.monotonic() + 30
+        for url, process in zip(urls, processes):
+            while True:
+                assert process.poll() is None, process.stderr.read().decode()
+                try:
+                    if httpx.get(url + "/").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                assert time.monotonic() < deadline, "工作进程启动超时"
+                time.sleep(0.1)
+        yield urls
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+def test_cache_coherent_across_workers(workers):
+    """测试任一工作进程写入后，其他进程的缓存响应立即失效，且各进程的 ETag 一致"""
+    etags = [httpx.get(url + "/api/projects/").headers["etag"] for url in workers]
+    assert len(set(etags)) == 1
+
+    for i, url in enumerate(workers):
+        response = httpx.post(url + "/api/projects/", json={"name": f"Worker {i}", "status": "pending"})
+        assert response.status_code == 201
+        for other in workers:
+            response = httpx.get(other + "/api/projects/", headers={"If-None-Match": etags[0]})
+            assert response.status_code == 200
+            assert [project["name"] for project in response.json()] == [f"Worker {k}" for k in range(i + 1)]
+        etags = [httpx.get(other + "/api/projects/").headers["etag"] for other in workers]
+        assert len(set(etags)) == 1
+        assert all(httpx.get(other + "/api/projects/", headers={"If-None-Match": etags[0]}).status_code == 304
+                   for other in workers)
+
+def test_events_reach_clients_on_other_workers(workers):
+    """测试一个工作进程上的写入产生的变更事件推送给连接在其他工作进程上的 SSE 客户端"""
+    with httpx.stream("GET", workers[1] + "/api/events/stream", timeout=10) as stream:
+        lines = stream.iter_lines()
+        assert next(lines).startswith("retry:")
+        project = httpx.post(workers[0] + "/api/projects/", json={"name": "Relayed", "status": "pending"}).json()
+        for line in lines:
+            if line.startswith("event:") and line != "event: project.created":
+                continue
+            if line == "event: project.created":
+                assert next(lines) == "data: " + json.dumps({"id": project["id"]}, separators=(",", ":"))
+                break
+
+def test_server_prepare_enables_bus_for_multiple_workers(monkeypatch):
+    """测试多进程启动时主进程关闭工作进程的自动迁移并启用失效通道"""
+    from app import server
+
+    monkeypatch.setattr(settings, "AUTO_MIGRATE", False)
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION_BUS", False)
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_BACKEND", "memory")
+    monkeypatch.delenv("CACHE_INVALIDATION_BUS", raising=False)
+    monkeypatch.delenv("LOGIN_RATE_LIMIT_BACKEND", raising=False)
+    monkeypatch.setenv("AUTO_MIGRATE", "false")
+    rotated = []
+    monkeypatch.setattr("app.core.invalidation.rotate_cache_epoch", rotated.append)
+    try:
+        server.prepare(3)
+        assert settings.CACHE_INVALIDATION_BUS is True
+        assert len(rotated) == 1  # 部署时换新纪元，上次部署签发的 ETag 失效
+        assert os.environ["CACHE_INVALIDATION_BUS"] == "true"
+        assert settings.LOGIN_RATE_LIMIT_BACKEND == os.environ["LOGIN_RATE_LIMIT_BACKEND"] == "sqlite"
+    finally:
+        os.environ.pop("CACHE_INVALIDATION_BUS", None)
+        os.environ.pop("LOGIN_RATE_LIMIT_BACKEND", None)
+    assert server.worker_count(5) == 5 and server.worker_count() >= 1
@@ -0,0 +1,219 @@
+import time
+from datetime import datetime, time as dtime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.core.constants import JobKind, JobStatus
+from app.models.job import Job as JobModel
+from app.services import jobs
+from app.services.jobs import (
+    JobRunner, claim_next, enqueue, fail_stale_jobs, next_run, parse_schedule, purge_jobs, schedule_jobs,
+)
+from tests.conftest import TestingSessionLocal, create_project
+
+
+@pytest.fixture
+def runner():
+    return JobRunner(TestingSessionLocal, poll_interval=0.05)
+
+
+@pytest.fixture
+def db():
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+
+def test_performance_job_runs_in_background(client, runner):
+    """测试绩效计算以后台任务执行，轮询得到状态与结果"""
+    job = client.post("/api/users/calculate-performance").json()
+    assert client.get(f"/api/jobs/{job['id']}").json()["status"] == "pending"
+
+    assert runner.run_pending() == 1
+    finished = client.get(f"/api/jobs/{job['id']}").json()
+    assert finished["status"] == "succeeded" and finished["progress"] == 1.0
+    assert finished["result"] == {"outstanding": 0}
+    assert finished["started_at"] <= finished["finished_at"]
+    assert client.get("/api/jobs/99999").status_code == 404
+
+
+def test_only_pending_jobs_are_deduplicated(db, runner):
+    """测试相同参数的待执行任务只保留一个，参数默认值参与比较，任务开始后可以再次入队"""
+    first, created = enqueue(db, JobKind.gantt_simulation, {"trials": 10})
+    assert created
+    assert enqueue(db, JobKind.gantt_simulation, {"trials": 10, "seed": 0})[0].id == first.id
+    other, created = enqueue(db, JobKind.gantt_simulation, {"trials": 10, "seed": 1})
+    assert created and other.id != first.id
+
+    assert claim_next(db) == first.id
+    again, created = enqueue(db, JobKind.gantt_simulation, {"trials": 10})
+    assert created and again.id != first.id
+
+
+def test_progress_job(client, runner):
+    """测试进度重算任务逐个项目提交并上报进度"""
+    project_id = create_project(client, "P")
+    client.post("/api/tasks/", json={"name": "T", "workload": "light", "finished": True, "project_id": project_id})
+    db = TestingSessionLocal()
+    try:
+        job, _ = enqueue(db, JobKind.projects_progress, {"project_ids": [project_id, 99999]})
+        job_id = job.id
+    finally:
+        db.close()
+    runner.run_pending()
+    finished = client.get(f"/api/jobs/{job_id}").json()
+    assert finished["status"] == "succeeded" and finished["result"] == {"projects": 1}
+    assert client.get(f"/api/projects/{project_id}").json()["status"] == "completed"
+
+
+def test_failed_job_records_error(client, runner, insert_dependency, director_headers):
+    """测试任务执行失败时记录原因，不影响后续任务"""
+    a, b = create_project(client, "A"), create_project(client, "B")
+    insert_dependency(a, b)
+    insert_dependency(b, a)
+    failing = client.post("/api/jobs/", headers=director_headers,
+                          json={"kind": "gantt.simulation", "params": {"trials": 10}}).json()
+    succeeding = client.post("/api/users/calculate-performance").json()
+    assert runner.run_pending() == 2
+    failed = client.get(f"/api/jobs/{failing['id']}").json()
+    assert failed["status"] == "failed" and "Circular" in failed["error"]
+    assert client.get(f"/api/jobs/{succeeding['id']}").json()["status"] == "succeeded"
+    assert [job["id"] for job in client.get("/api/jobs/", params={"status": "failed"}).json()] == [failing["id"]]
+
+
+def test_export_job_download(client, runner, director_headers, tmp_path, monkeypatch):
+    """测试导出任务写入文件，完成后才能下载，内容与流式导出一致"""
+    monkeypatch.setattr(settings, "JOB_OUTPUT_DIR", str(tmp_path))
+    create_project(client, "Exported")
+    job = client.post("/api/jobs/", headers=director_headers,
+                      json={"kind": "export", "params": {"entity": "projects", "format": "csv"}}).json()
+    assert client.get(f"/api/jobs/{job['id']}/download").status_code == 409
+
+    runner.run_pending()
+    response = client.get(f"/api/jobs/{job['id']}/download")
+    assert response.status_code == 200
+    assert response.content == client.get("/api/export/projects", params={"format": "csv"}).content
+    assert "projects.csv" in response.headers["content-disposition"]
+
+    db = TestingSessionLocal()
+    try:
+        db.query(JobModel).update({"finished_at": datetime.utcnow() - timedelta(days=30)})
+        db.commit()
+        assert purge_jobs(db, datetime.utcnow() - timedelta(days=7)) == 1
+    finally:
+        db.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_create_job_validation(client, director_headers):
+    """测试提交任务需要管理员权限，参数按任务类型校验"""
+    assert client.post("/api/jobs/", json={"kind": "users.performance"}).status_code == 401
+    response = client.post("/api/jobs/", headers=director_headers,
+                           json={"kind": "gantt.simulation", "params": {"distribution": "normal"}})
+    assert response.status_code == 422
+    response = client.post("/api/jobs/", headers=director_headers, json={"kind": "export", "params": {}})
+    assert response.status_code == 422
+
+
+def test_scheduled_jobs(db):
+    """测试定时任务按计划时间入队一次，到期前不会被认领，与手动提交的同类任务互不影响"""
+    schedule = parse_schedule("users.performance@02:00, projects.progress@23:30")
+    assert schedule == [(JobKind.users_performance, dtime(2, 0)), (JobKind.projects_progress, dtime(23, 30))]
+    assert next_run(dtime(2, 0), datetime(2030, 1, 1, 1, 0)) == datetime(2030, 1, 1, 2, 0)
+    assert next_run(dtime(2, 0), datetime(2030, 1, 1, 2, 0)) == datetime(2030, 1, 2, 2, 0)
+    with pytest.raises(ValueError):
+        parse_schedule("users.performance")
+
+    now = datetime(2030, 1, 1, 12, 0)
+    schedule_jobs(db, schedule, now)
+    schedule_jobs(db, schedule, now + timedelta(minutes=1))
+    assert db.query(JobModel).count() == 2
+    assert claim_next(db) is None
+    manual, created = enqueue(db, JobKind.users_performance)
+    assert created and claim_next(db) == manual.id
+
+
+def test_stale_running_jobs_fail(db):
+    """测试心跳过期的运行中任务被标记为失败"""
+    job, _ = enqueue(db, JobKind.users_performance)
+    claim_next(db)
+    assert fail_stale_jobs(db, datetime.utcnow() - timedelta(minutes=5)) == 0
+    assert fail_stale_jobs(db, datetime.utcnow() + timedelta(seconds=1)) == 1
+    db.refresh(job)
+    assert job.status == JobStatus.failed and job.error == "worker lost"
+
+
+def test_heartbeat_without_progress_reports(db, runner, monkeypatch):
+    """测试不上报进度的处理函数执行期间仍有心跳，不会被判定为失联"""
+    monkeypatch.setattr(jobs, "HEARTBEAT_INTERVAL", 0.02)
+    stale = []
+
+    def slow(session, params, progress, job):
+        started = datetime.utcnow()
+        time.sleep(0.3)
+        other = TestingSessionLocal()
+        try:
+            stale.append(fail_stale_jobs(other, started + timedelta(seconds=0.1)))
+        finally:
+            other.close()
+        return {}
+
+    monkeypatch.setitem(jobs.HANDLERS, JobKind.users_performance, slow)
+    job, _ = enqueue(db, JobKind.users_performance)
+    assert runner.run_pending() == 1
+    assert stale == [0]
+    db.refresh(job)
+    assert job.status == JobStatus.succeeded
+
+
+def test_job_failed_while_running_keeps_failure(db, monkeypatch):
+    """测试执行期间已被标记为失联的任务，执行结束后不被改写为成功"""
+    def lost(session, params, progress, job):
+        other = TestingSessionLocal()
+        try:
+            fail_stale_jobs(other, datetime.utcnow() + timedelta(seconds=1))
+        finally:
+            other.close()
+        return {}
+
+    monkeypatch.setitem(jobs.HANDLERS, JobKind.users_performance, lost)
+    job, _ = enqueue(db, JobKind.users_performance)
+    job_id = claim_next(db)
+    assert jobs.run_job(TestingSessionLocal, job_id) == JobStatus.failed
+    db.refresh(job)
+    assert (job.status, job.error, job.result) == (JobStatus.failed, "worker lost", None)
+
+
+def test_standalone_worker_enables_invalidation_bus(client, monkeypatch, capsys):
+    """测试单独运行的工作进程在使用进程内缓存时启用失效通道，任务结果引起的失效能到达服务进程"""
+    from app.db import session
+    from tests.conftest import engine
+
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION_BUS", False)
+    monkeypatch.setattr(session, "get_engine", lambda: engine)
+    monkeypatch.setattr(session, "SessionLocal", TestingSessionLocal)
+    assert jobs.main(["--once"]) == 0
+    assert settings.CACHE_INVALIDATION_BUS is True
+    assert "CACHE_INVALIDATION_BUS" in capsys.readouterr().out
+
+
+def test_runner_threads_execute_each_job_once(client):
+    """测试多个工作线程并发认领，每个任务恰好执行一次"""
+    runner = JobRunner(TestingSessionLocal, workers=3, poll_interval=0.05)
+    runner.start()
+    try:
+        db = TestingSessionLocal()
+        try:
+            ids = [enqueue(db, JobKind.gantt_simulation, {"trials": 5, "seed": seed})[0].id for seed in range(6)]
+        finally:
+            db.close()
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            jobs = [client.get(f"/api/jobs/{job_id}").json() for job_id in ids]
+            if all(job["status"] == "succeeded" for job in jobs):
+                break
+            time.sleep(0.05)
+    finally:
+        runner.stop()
+    assert all(job["status"] == "succeeded" for job in jobs)
@@ -0,0 +1,173 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.core import ratelimit
+from app.core.config import settings
+from app.core.ratelimit import MemoryRateLimiter, SQLiteRateLimiter
+from app.core.security import _hash_slots, get_password_hash
+from app.models.user import User as UserModel, UserRole
+from main import app
+from tests.conftest import TestingSessionLocal
+
+PASSWORD = "secret-pass-1"
+
+
+@pytest.fixture
+def user(client):
+    db = TestingSessionLocal()
+    try:
+        db.add(UserModel(username="alice", email="alice@example.com",
+                         hashed_password=get_password_hash(PASSWORD), role=UserRole.user))
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def verifications(monkeypatch):
+    """统计登录接口实际执行的密码校验次数"""
+    from app.api.endpoints import auth
+
+    calls = []
+    verify = auth.verify_password
+
+    def counting(*args):
+        calls.append(1)
+        return verify(*args)
+
+    monkeypatch.setattr(auth, "verify_password", counting)
+    return calls
+
+
+def login(client, identifier="alice", password="wrong-password"):
+    return client.post("/api/auth/login", json={"identifier": identifier, "password": password})
+
+
+def test_identifier_locked_after_failures(client, user, verifications):
+    """测试同一登录标识失败次数达到上限后直接返回 429，不再校验密码，正确密码同样被拒绝"""
+    for _ in range(settings.LOGIN_ATTEMPTS_PER_IDENTIFIER):
+        assert login(client).status_code == 400
+    assert len(verifications) == settings.LOGIN_ATTEMPTS_PER_IDENTIFIER
+
+    blocked = login(client, "ALICE", PASSWORD)
+    assert blocked.status_code == 429
+    assert 0 < int(blocked.headers["retry-after"]) <= 2 * settings.LOGIN_ATTEMPT_WINDOW_SECONDS
+    assert len(verifications) == settings.LOGIN_ATTEMPTS_PER_IDENTIFIER
+    assert login(client, "bob").status_code == 400  # 其他登录标识不受影响
+
+
+def test_success_resets_identifier_failures(client, user):
+    """测试登录成功后该登录标识的失败次数清零"""
+    for _ in range(settings.LOGIN_ATTEMPTS_PER_IDENTIFIER - 1):
+        login(client)
+    assert login(client, password=PASSWORD).status_code == 200
+    for _ in range(settings.LOGIN_ATTEMPTS_PER_IDENTIFIER - 1):
+        assert login(client).status_code == 400
+    assert login(client, password=PASSWORD).status_code == 200
+
+
+def test_client_ip_locked_across_identifiers(client, user, monkeypatch):
+    """测试同一客户端 IP 对不同登录标识的失败次数累计，达到上限后全部返回 429"""
+    monkeypatch.setattr(settings, "LOGIN_ATTEMPTS_PER_IP", 3)
+    for name in ("a", "b", "c"):
+        assert login(client, name).status_code == 400
+    assert login(client, "d").status_code == 429
+    assert login(client, "alice", PASSWORD).status_code == 429
+
+
+def test_saturated_hash_slots_fail_fast(client, user, monkeypatch):
+    """测试密码哈希槽位全部占用时登录在等待时限后返回 429，而不是排队等待"""
+    monkeypatch.setattr(settings, "LOGIN_HASH_WAIT_MS", 0)
+    slots = _hash_slots()
+    held = 0
+    while slots.acquire(blocking=False):
+        held += 1
+    try:
+        response = login(client, password=PASSWORD)
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+    finally:
+        for _ in range(held):
+            slots.release()
+    assert login(client, password=PASSWORD).status_code == 200
+
+
+def test_busy_rejections_not_counted(client, user, monkeypatch):
+    """测试哈希槽位饱和导致的 429 不计入客户端 IP 的失败次数"""
+    monkeypatch.setattr(settings, "LOGIN_HASH_WAIT_MS", 0)
+    monkeypatch.setattr(settings, "LOGIN_ATTEMPTS_PER_IP", 2)
+    slots = _hash_slots()
+    held = 0
+    while slots.acquire(blocking=False):
+        held += 1
+    try:
+        for _ in range(3):
+            assert login(client, password=PASSWORD).status_code == 429
+    finally:
+        for _ in range(held):
+            slots.release()
+    assert login(client, password=PASSWORD).status_code == 200
+
+
+def forwarded_client(ip):
+    """以指定连接对端地址发起请求的测试客户端，数据库依赖沿用 client 夹具的覆盖"""
+    return TestClient(app, client=(ip, 50000))
+
+
+def test_forwarded_for_from_trusted_proxy(client, user, monkeypatch):
+    """测试来自受信任代理的请求按 X-Forwarded-For 中的客户端地址计数，其他来源伪造的该请求头被忽略"""
+    monkeypatch.setattr(settings, "LOGIN_ATTEMPTS_PER_IP", 2)
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "10.0.0.0/8")
+    proxy = forwarded_client("10.0.0.5")
+
+    def via_proxy(name, forwarded):
+        return proxy.post("/api/auth/login", json={"identifier": name, "password": "wrong-password"},
+                          headers={"X-Forwarded-For": forwarded})
+
+    assert via_proxy("a", "203.0.113.7, 10.0.0.9").status_code == 400
+    assert via_proxy("b", "198.51.100.1, 203.0.113.7").status_code == 400  # 最左侧的值由客户端填写，不可信
+    assert via_proxy("c", "203.0.113.7").status_code == 429
+    assert via_proxy("d", "203.0.113.8").status_code == 400  # 同一代理之后的其他客户端不受影响
+
+    direct = forwarded_client("192.0.2.1")
+    for name in ("e", "f"):
+        direct.post("/api/auth/login", json={"identifier": name, "password": "wrong-password"},
+                    headers={"X-Forwarded-For": "203.0.113.9"})
+    assert via_proxy("g", "203.0.113.9").status_code == 400
+    assert direct.post("/api/auth/login", json={"identifier": "h", "password": "wrong-password"},
+                       headers={"X-Forwarded-For": "203.0.113.10"}).status_code == 429
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limiter(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryRateLimiter(max_keys=2)
+        return
+    engine = create_engine(f"sqlite:///{tmp_path / 'limits.db'}")
+    yield SQLiteRateLimiter(engine)
+    engine.dispose()
+
+
+def test_sliding_window(limiter, monkeypatch):
+    """测试滑动窗口：前一窗口的次数按比例滑出，重置后清零"""
+    now = [1000.0]  # 第 10 个 100 秒窗口的开始
+    monkeypatch.setattr(ratelimit, "time", SimpleNamespace(time=lambda: now[0]))
+    for _ in range(4):
+        limiter.record("k", 100)
+    assert limiter.retry_after("k", 5, 100) == 0
+    limiter.record("k", 100)
+    wait = limiter.retry_after("k", 5, 100)
+    assert 100 < wait < 101  # 到下一窗口才开始滑出，且 5 次需要滑出一点点
+
+    now[0] = 1100.0 + 10  # 下一窗口 10%：前一窗口的 5 次计为 4.5
+    assert limiter.retry_after("k", 5, 100) == 0
+    assert limiter.retry_after("k", 4, 100) == pytest.approx(10, abs=0.01)
+    limiter.record("k", 100)
+    assert limiter.retry_after("k", 5, 100) > 0
+
+    limiter.reset("k")
+    assert limiter.retry_after("k", 1, 100) == 0
+    assert limiter.retry_after("k", 0, 100) == 0
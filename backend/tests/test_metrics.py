@@ -0,0 +1,66 @@
+from sqlalchemy import create_engine, text
+from app.core.metrics import DB_POOL_WAIT, REQUEST_LATENCY, Histogram, TimedQueuePool
+from app.core.security import get_password_hash, verify_password
+from benchmarks.metrics_overhead import run as run_overhead_benchmark
+
+def test_histogram_render_is_cumulative():
+    """测试直方图按 Prometheus 文本格式输出累积分桶"""
+    histogram = Histogram("demo_seconds", "demo", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "/a")
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+
+def test_metrics_endpoint_reports_route_templates(client):
+    """测试请求耗时按路由模板聚合，并输出线程池与并发指标"""
+    project = client.post("/api/projects/", json={"name": "P", "estimated_duration": 3}).json()
+    before = REQUEST_LATENCY.samples(("GET", "/api/projects/{project_id}", "200"))
+    client.get(f"/api/projects/{project['id']}")
+    client.get(f"/api/projects/{project['id']}")
+    after = REQUEST_LATENCY.samples(("GET", "/api/projects/{project_id}", "200"))
+    assert after["count"] - (before["count"] if before else 0) == 2
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'route="/api/projects/{project_id}"' in body
+    assert f"/api/projects/{project['id']}\"" not in body
+    assert "http_requests_in_flight 1" in body  # 仅包含 /metrics 请求本身
+    assert "threadpool_tokens_total 40" in body
+    assert "bcrypt_queue_wait_seconds" in body
+
+def test_route_template_ignores_parameter_values(client):
+    """测试路由模板不由参数值反推：两个参数取值相同时仍得到正确的模板"""
+    key = ("DELETE", "/api/tasks/{task_id}/unassign/{user_id}", "404")
+    before = REQUEST_LATENCY.samples(key)
+    client.delete("/api/tasks/3/unassign/3")
+    after = REQUEST_LATENCY.samples(key)
+    assert after["count"] - (before["count"] if before else 0) == 1
+    assert REQUEST_LATENCY.samples(("DELETE", "/api/tasks/{user_id}/unassign/{user_id}", "404")) is None
+
+def test_password_hash_records_queue_time():
+    """测试密码哈希与校验记录排队与计算耗时"""
+    from app.core.metrics import BCRYPT_QUEUE_WAIT
+    before = BCRYPT_QUEUE_WAIT.samples(("verify",))
+    verify_password("secret", get_password_hash("secret"))
+    after = BCRYPT_QUEUE_WAIT.samples(("verify",))
+    assert after["count"] == (before["count"] if before else 0) + 1
+
+def test_timed_pool_records_checkout_wait():
+    """测试连接池记录连接获取等待耗时"""
+    engine = create_engine("sqlite:///./test.db", poolclass=TimedQueuePool)
+    before = DB_POOL_WAIT.samples()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    engine.dispose()
+    assert DB_POOL_WAIT.samples()["count"] == (before["count"] if before else 0) + 1
+
+def test_metrics_middleware_overhead():
+    """测试指标中间件热路径开销保持在微秒级"""
+    result = run_overhead_benchmark(count=20000, repeat=3)
+    assert result["middleware_overhead_us"] < 50
+    assert result["histogram_observe_us"] < 20
@@ -0,0 +1,187 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, inspect, select, text
+
+from app.db.base import Base
+from app.db.migrations import (
+    backfill_checkpoints, load_migrations, migration_lock, run_backfill, run_migrations, update_in_batches,
+    upgrade_database,
+)
+from app.db.migrations import runner
+from app.db.migrations.__main__ import main as migrations_cli
+
+metadata = MetaData()
+items = Table(
+    "backfill_items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String(50)),
+    Column("slug", String(50)),
+)
+
+
+@pytest.fixture
+def scratch_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'scratch.db'}")
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(items.insert(), [{"id": i, "name": f"Item {i}"} for i in range(1, 26)])
+    yield engine
+    engine.dispose()
+
+
+def slugs(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(items.c.id, items.c.slug).order_by(items.c.id)).all()
+
+
+def test_update_in_batches_resumes_from_checkpoint(scratch_engine):
+    """测试分批回填按检查点继续，完成后再次执行不做任何处理"""
+    def to_slug(row):
+        return {"slug": row.name.lower().replace(" ", "-")}
+
+    first = update_in_batches(scratch_engine, "items_slug", items, to_slug, batch_size=10, pause=0, max_batches=1)
+    assert (first.rows, first.completed) == (10, False)
+    assert [slug for _, slug in slugs(scratch_engine)].count(None) == 15
+
+    rest = update_in_batches(scratch_engine, "items_slug", items, to_slug, batch_size=10, pause=0)
+    assert (rest.batches, rest.rows, rest.completed) == (2, 15, True)
+    assert all(slug == f"item-{id}" for id, slug in slugs(scratch_engine))
+
+    again = update_in_batches(scratch_engine, "items_slug", items, to_slug, batch_size=10, pause=0)
+    assert (again.rows, again.completed) == (0, True)
+    with scratch_engine.connect() as connection:
+        checkpoint = connection.execute(select(backfill_checkpoints)).one()
+    assert (checkpoint.last_key, checkpoint.rows_done) == (25, 25)
+
+
+def test_interrupted_batch_rolls_back_with_its_checkpoint(scratch_engine):
+    """测试某一批失败时该批写入与检查点一起回滚，重新执行从上一个检查点继续"""
+    seen = []
+
+    def process(connection, chunk):
+        seen.append([row.id for row in chunk])
+        if len(seen) == 2:
+            raise RuntimeError("interrupted")
+        connection.execute(items.update().where(items.c.id.in_([row.id for row in chunk])).values(slug="done"))
+
+    with pytest.raises(RuntimeError):
+        run_backfill(scratch_engine, "items_done", items.c.id, process, batch_size=10, pause=0)
+    assert sum(slug == "done" for _, slug in slugs(scratch_engine)) == 10
+
+    result = run_backfill(scratch_engine, "items_done", items.c.id, process, batch_size=10, pause=0)
+    assert result.completed and result.rows == 15
+    assert seen[2][0] == 11  # 从失败的那一批重新开始
+    assert all(slug == "done" for _, slug in slugs(scratch_engine))
+
+
+def test_update_in_batches_with_static_values_and_filter(scratch_engine):
+    """测试固定列值的回填只更新满足条件的行"""
+    update_in_batches(scratch_engine, "odd_slug", items, {"slug": "odd"}, where=items.c.id % 2 == 1,
+                      batch_size=4, pause=0)
+    assert [id for id, slug in slugs(scratch_engine) if slug == "odd"] == list(range(1, 26, 2))
+
+
+def test_migrations_are_ordered_and_described():
+    """测试迁移按版本顺序加载且均有说明"""
+    migrations = load_migrations()
+    ids = [item.id for item in migrations]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    assert all(item.description for item in migrations)
+
+
+def test_cli_upgrade_and_status(tmp_path, capsys):
+    """测试命令行在空库上建表并应用全部迁移，status 列出应用状态"""
+    url = f"sqlite:///{tmp_path / 'cli.db'}"
+    assert migrations_cli(["--database-url", url, "upgrade", "--pause-ms", "0"]) == 0
+    assert "0001_hot_query_indexes" in capsys.readouterr().out
+
+    engine = create_engine(url)
+    assert {"users", "tasks", "schema_migrations"} <= set(inspect(engine).get_table_names())
+    engine.dispose()
+
+    assert migrations_cli(["--database-url", url, "upgrade"]) == 0
+    assert "没有待应用的迁移" in capsys.readouterr().out
+    assert migrations_cli(["--database-url", url, "status"]) == 0
+    out = capsys.readouterr().out
+    assert "0001_hot_query_indexes" in out and "未应用" not in out
+
+
+def test_upgrade_database_created_before_migrations(tmp_path):
+    """测试迁移体系引入前建出的旧库（缺少之后新增的表、列与索引）一次升级到与模型一致的结构"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for table in ("refresh_tokens", "project_reachability", "task_assignments"):
+            connection.execute(text(f"DROP TABLE {table}"))
+        for index in ("ix_projects_planned_end_start_time", "ix_users_role", "ix_users_outstanding",
+                      "ix_tasks_project_id_finished", "ix_project_progress_project_id_date"):
+            connection.execute(text(f"DROP INDEX {index}"))
+        for table, column in (("users", "token_version"), ("tasks", "participant_count"),
+                              ("projects", "planned_end")):
+            connection.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+        connection.execute(text(
+            "INSERT INTO projects (id, name, status, start_time, estimated_duration) "
+            "VALUES (1, 'A', 'pending', '2030-01-01 00:00:00', 10), (2, 'B', 'pending', NULL, NULL)"
+        ))
+        connection.execute(text("INSERT INTO project_dependencies (project_id, depends_on_id) VALUES (2, 1)"))
+        connection.execute(text("INSERT INTO tasks (id, name, workload, finished, project_id) "
+                                "VALUES (1, 'T', 'light', 0, 1)"))
+        connection.execute(text("INSERT INTO users (id, username, email, hashed_password, role, task_id) "
+                                "VALUES (1, 'u', 'u@example.com', 'x', 'user', 1)"))
+
+    assert upgrade_database(engine) == [item.id for item in load_migrations()]
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        assert {column.name for column in table.columns} <= {c["name"] for c in inspector.get_columns(table.name)}
+        assert {index.name for index in table.indexes} <= {i["name"] for i in inspector.get_indexes(table.name)}
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT planned_end IS NOT NULL FROM projects ORDER BY id")).scalars().all() == [1, 0]
+        assert connection.execute(text("SELECT ancestor_id, descendant_id FROM project_reachability")).all() == [(1, 2)]
+        assert connection.execute(text("SELECT task_id, user_id FROM task_assignments")).all() == [(1, 1)]
+        assert connection.execute(text("SELECT participant_count FROM tasks")).scalar() == 1
+    engine.dispose()
+
+
+def test_concurrent_upgrades_are_serialized(tmp_path):
+    """测试多个进程同时在空库上升级时依次执行：只有一个进程应用迁移，其余的不因结构已变更而失败"""
+    import threading
+
+    url = f"sqlite:///{tmp_path / 'race.db'}"
+    barrier = threading.Barrier(4)
+    results, errors = [], []
+
+    def upgrade():
+        engine = create_engine(url)
+        try:
+            barrier.wait()
+            results.append(upgrade_database(engine))
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            engine.dispose()
+
+    threads = [threading.Thread(target=upgrade) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert sorted(results, key=len) == [[], [], [], [item.id for item in load_migrations()]]
+
+
+def test_stale_migration_lock_is_taken_over(tmp_path, monkeypatch):
+    """测试持有者异常退出留下的过期锁可被接管，未过期时等待其释放"""
+    from datetime import datetime, timedelta
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'lock.db'}")
+    monkeypatch.setattr(runner, "LOCK_POLL_INTERVAL", 0.01)
+    with migration_lock(engine):
+        pass
+    with engine.begin() as connection:
+        connection.execute(runner.schema_migration_lock.insert().values(
+            id=1, holder="gone", acquired_at=datetime.utcnow() - runner.LOCK_STALE_AFTER - timedelta(seconds=1)))
+    Base.metadata.create_all(engine)
+    assert run_migrations(engine) == [item.id for item in load_migrations()]
+    with engine.connect() as connection:
+        assert connection.execute(select(runner.schema_migration_lock)).all() == []
+    engine.dispose()
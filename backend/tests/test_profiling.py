@@ -0,0 +1,84 @@
+import threading
+import time
+import pytest
+from app.core.constants import UserRole
+from app.core.profiling import SamplingProfiler
+from tests.conftest import make_headers
+
+def busy_loop(stop):
+    """持续占用 CPU 直到收到停止信号"""
+    total = 0
+    while not stop.is_set():
+        total += sum(range(1000))
+
+def test_sampling_profiler_collapses_busy_thread():
+    """测试采样分析器输出包含繁忙线程调用栈的折叠栈"""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        profiler = SamplingProfiler(interval=0.002)
+        profiler.run(0.2)
+    finally:
+        stop.set()
+        worker.join()
+    output = profiler.render_collapsed()
+    busy_lines = [line for line in output.splitlines() if line.startswith("busy-worker;")]
+    assert busy_lines and all("busy_loop (test_profiling.py" in line for line in busy_lines)
+    assert int(busy_lines[0].rsplit(" ", 1)[1]) > 0
+
+def test_sample_endpoint_requires_director(client):
+    """测试采样接口仅总监可用，返回折叠栈文本"""
+    response = client.get("/api/profiling/sample", params={"seconds": 0.1},
+                          headers=make_headers(UserRole.manager))
+    assert response.status_code == 403
+
+    response = client.get("/api/profiling/sample", params={"seconds": 0.1, "include_idle": True},
+                          headers=make_headers(UserRole.director))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    assert response.text.strip()
+
+def test_concurrent_sample_rejected(client):
+    """测试已有采样任务时再次请求立即返回 409，而不是排队等待"""
+    headers = make_headers(UserRole.director)
+    responses = []
+    running = threading.Thread(target=lambda: responses.append(
+        client.get("/api/profiling/sample", params={"seconds": 0.5, "include_idle": True}, headers=headers)))
+    running.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not SamplingProfiler.is_running() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        busy = client.get("/api/profiling/sample", params={"seconds": 0.1}, headers=headers)
+        assert busy.status_code == 409
+    finally:
+        running.join()
+    response = responses[0]
+    assert response.status_code == 200
+    assert "sampling-profiler" not in response.text  # 采样线程自身不计入
+
+def test_request_profile_returns_cprofile_summary(client):
+    """测试总监携带 ?profile=1 时返回该请求的 cProfile 摘要"""
+    headers = make_headers(UserRole.director)
+    client.post("/api/projects/", json={"name": "P", "estimated_duration": 3})
+
+    origin = "http://localhost:5173"
+    response = client.get("/api/gantt/critical-path", params={"profile": 1}, headers={**headers, "Origin": origin})
+    assert response.status_code == 200
+    assert response.headers["X-Original-Status"] == "200"
+    assert response.headers["access-control-allow-origin"] == origin  # 浏览器端可读取分析结果
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "function calls" in response.text
+    assert "critical_path" in response.text
+
+    normal = client.get("/api/gantt/critical-path", headers=headers)
+    assert normal.headers["content-type"] == "application/json"
+
+@pytest.mark.parametrize("role", [UserRole.user, None])
+def test_request_profile_forbidden_for_others(client, role):
+    """测试非总监或未登录用户请求分析时返回 403"""
+    headers = make_headers(role) if role else {}
+    response = client.get("/api/tasks/", params={"profile": 1}, headers=headers)
+    assert response.status_code == 403
@@ -0,0 +1,126 @@
+import re
+from datetime import date, timedelta
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+from app.api.endpoints import projects as project_endpoints, tasks as task_endpoints, users as user_endpoints
+from app.db.base import Base
+from app.db.migrations import load_migrations, run_migrations
+from app.models.project import ProjectProgress as ProjectProgressModel
+from app.models.task import task_assignments
+from app.models.user import User as UserModel
+from app.services import (
+    gantt as gantt_service, project as project_service, reachability, serializers, sync, tokens,
+    user as user_service,
+)
+from benchmarks.synthetic import generate_org
+
+# 计划中对数据表出现不带索引的 SCAN 即为全表扫描（子查询物化结果的扫描不计）
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+TABLES = set(Base.metadata.tables)
+
+def reuse_refresh_token(db, user_id):
+    """签发、换发后再次使用同一个刷新令牌，覆盖重复使用检测与吊销整个登录会话"""
+    token = tokens.issue_refresh_token(db, user_id)
+    db.commit()
+    tokens.rotate_refresh_token(db, token)
+    with pytest.raises(HTTPException):
+        tokens.rotate_refresh_token(db, token)
+
+# 热点操作：调用真实的接口函数与服务函数，捕获其发出的全部查询
+HOT_OPERATIONS = {
+    "read_users": lambda db, ids: user_endpoints.read_users(db),
+    "get_outstanding_users": lambda db, ids: user_endpoints.get_outstanding_users(db),
+    "get_user_headed_task": lambda db, ids: user_endpoints.get_user_headed_task(ids.user, db),
+    "get_project_members": lambda db, ids: project_endpoints.get_project_members(ids.project, db),
+    "get_project_tasks": lambda db, ids: project_endpoints.get_project_tasks(ids.project, db),
+    "get_task_users": lambda db, ids: task_endpoints.get_task_users(ids.task, db),
+    "get_user_tasks": lambda db, ids: user_endpoints.get_user_tasks(ids.user, db),
+    "update_project_progress": lambda db, ids: project_service.update_project_progress(ids.project, db),
+    "get_filled_project_progress": lambda db, ids: project_service.get_filled_project_progress(ids.project, db),
+    "calculate_user_performance": lambda db, ids: user_service.calculate_user_performance(ids.user, db),
+    "fetch_latest_progress": lambda db, ids: serializers.fetch_latest_progress(db),
+    "get_changes_since": lambda db, ids: sync.get_changes_since(db, ids.cursor),
+    "get_upstream_projects": lambda db, ids: serializers.fetch_project_dicts(
+        db, gantt_service.upstream_ids_query([ids.project])),
+    "get_downstream_projects": lambda db, ids: serializers.fetch_project_dicts(
+        db, gantt_service.downstream_ids_query([ids.project])),
+    "build_gantt_data_scoped": lambda db, ids: gantt_service.build_gantt_data(db, [ids.project]),
+    "build_gantt_window": lambda db, ids: gantt_service.build_gantt_data(
+        db, window=(date.today() - timedelta(days=30), date.today() + timedelta(days=30))),
+    "is_upstream": lambda db, ids: reachability.is_upstream(db, ids.project, ids.project + 1),
+    "cycle_dependencies": lambda db, ids: reachability.cycle_dependencies(db, ids.project, range(1, 10)),
+    "refresh_reachability": lambda db, ids: reachability.refresh(db, [ids.project]),
+    "reuse_refresh_token": lambda db, ids: reuse_refresh_token(db, ids.user),
+}
+
+@pytest.fixture(scope="module")
+def seeded_engine(tmp_path_factory):
+    """生成合成组织数据并执行迁移（含 ANALYZE）的数据库"""
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    generate_org(engine, users=300, projects=60, tasks_per_project=8, years=2)
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+def explain(connection, statement, parameters):
+    """返回 EXPLAIN QUERY PLAN 的各行描述"""
+    return [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+@pytest.mark.parametrize("name", list(HOT_OPERATIONS))
+def test_hot_queries_use_indexes(seeded_engine, name):
+    """测试热点操作发出的每条查询都命中索引，没有全表扫描"""
+    db = sessionmaker(bind=seeded_engine)()
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")) and not executemany:
+            captured.append((statement, parameters))
+
+    try:
+        ids = SimpleNamespace(
+            user=db.query(UserModel.id).filter(UserModel.task_id.isnot(None)).order_by(UserModel.id).limit(1).scalar(),
+            project=db.query(ProjectProgressModel.project_id).order_by(ProjectProgressModel.id).limit(1).scalar(),
+            task=db.query(task_assignments.c.task_id).order_by(task_assignments.c.task_id).limit(1).scalar(),
+            cursor=sync.get_current_cursor(db),
+        )
+        event.listen(seeded_engine, "before_cursor_execute", capture)
+        try:
+            HOT_OPERATIONS[name](db, ids)
+        finally:
+            event.remove(seeded_engine, "before_cursor_execute", capture)
+        db.rollback()
+    finally:
+        db.close()
+
+    assert captured, f"{name} 没有发出查询"
+    with seeded_engine.connect() as connection:
+        for statement, parameters in captured:
+            plan = explain(connection, statement, parameters)
+            scans = [line for line in plan
+                     if FULL_SCAN.match(line) and FULL_SCAN.match(line).group(1) in TABLES]
+            assert not scans, f"{name} 出现全表扫描 {scans}:\n{statement}\n" + "\n".join(plan)
+
+def test_migration_upgrades_legacy_schema(tmp_path):
+    """测试迁移为旧结构的数据库补齐复合索引并移除冗余的单列索引"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for name in ("ix_users_role", "ix_users_outstanding", "ix_tasks_project_id_finished",
+                     "ix_project_progress_project_id_date", "ix_project_dependencies_depends_on_id"):
+            connection.execute(text(f"DROP INDEX {name}"))
+        connection.execute(text("CREATE INDEX ix_tasks_project_id ON tasks (project_id)"))
+        connection.execute(text("CREATE INDEX ix_project_progress_project_id ON project_progress (project_id)"))
+
+    assert run_migrations(engine) == [item.id for item in load_migrations()]
+    assert run_migrations(engine) == []
+
+    inspector = inspect(engine)
+    task_indexes = {index["name"] for index in inspector.get_indexes("tasks")}
+    progress_indexes = {index["name"] for index in inspector.get_indexes("project_progress")}
+    assert "ix_tasks_project_id_finished" in task_indexes and "ix_tasks_project_id" not in task_indexes
+    assert "ix_project_progress_project_id_date" in progress_indexes
+    assert "ix_project_progress_project_id" not in progress_indexes
+    assert {"ix_users_role", "ix_users_outstanding"} <= {index["name"] for index in inspector.get_indexes("users")}
@@ -0,0 +1,74 @@
+import pytest
+from app.db.instrumentation import normalize_statement, track_queries
+from app.models.project import Project as ProjectModel
+from tests.conftest import TestingSessionLocal, create_project
+
+def create_projects(client, count):
+    """创建多个带任务的项目"""
+    for i in range(count):
+        project_id = create_project(client, f"P{i}", 3)
+        client.post("/api/tasks/", json={"name": f"T{i}", "project_id": project_id})
+
+def test_normalize_statement_collapses_parameters():
+    """测试仅参数与 IN 列表长度不同的语句归一化为同一形态"""
+    a = normalize_statement("SELECT * FROM tasks\n WHERE id IN (?, ?, ?) LIMIT 10")
+    b = normalize_statement("SELECT * FROM tasks WHERE id IN (?) LIMIT 20")
+    assert a == b
+
+def test_failed_statement_keeps_timings_aligned(client):
+    """测试语句执行失败后开始时间出栈，之后的查询耗时不错位"""
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    db = TestingSessionLocal()
+    try:
+        with track_queries() as stats:
+            with pytest.raises(OperationalError):
+                db.execute(text("SELECT * FROM missing_table"))
+            db.rollback()
+            db.execute(text("SELECT 1"))
+            assert db.connection().info["query_start_time"] == []
+    finally:
+        db.close()
+    assert stats.count == 2
+
+def test_track_queries_flags_repeated_statements(client):
+    """测试逐个访问懒加载关系时识别出疑似 N+1 查询"""
+    create_projects(client, 6)
+    db = TestingSessionLocal()
+    try:
+        with track_queries() as stats:
+            for project in db.query(ProjectModel).all():
+                project.tasks
+    finally:
+        db.close()
+    assert stats.count == 7
+    repeated = stats.repeated_statements(threshold=5)
+    assert len(repeated) == 1 and repeated[0][1] == 6
+    assert "FROM tasks" in repeated[0][0]
+
+def test_response_headers_report_query_stats(client):
+    """测试响应头输出查询次数与数据库耗时"""
+    create_projects(client, 2)
+    response = client.get("/api/tasks/")
+    assert response.headers["X-DB-Query-Count"] == "1"
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
+    assert "X-DB-N-Plus-One" not in response.headers
+
+@pytest.fixture
+def many_projects(client):
+    """在测试函数执行前准备 20 个项目，准备阶段的请求不计入查询预算"""
+    create_projects(client, 20)
+
+@pytest.mark.query_budget(3)
+def test_list_endpoints_query_budget(client, many_projects):
+    """测试列表类接口的查询次数不随数据量增长"""
+    client.get("/api/projects/")
+    client.get("/api/tasks/")
+    client.get("/api/gantt/project-data")
+
+@pytest.mark.xfail(strict=True, reason="项目列表需要多次查询，超出预算时插件应判定测试失败")
+@pytest.mark.query_budget(1, path="/api/projects")
+def test_query_budget_violation_fails(client, many_projects):
+    """测试请求超出查询预算时测试失败"""
+    client.get("/api/projects/")
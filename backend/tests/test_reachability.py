@@ -0,0 +1,133 @@
+import io
+import json
+import random
+
+import networkx as nx
+import pytest
+from sqlalchemy import create_engine, select, text
+
+from app.core.constants import ImportEntity
+from app.db.migrations import run_migrations
+from app.models.project import project_dependencies, project_reachability
+from app.services import reachability
+from app.services.importer import run_import
+from benchmarks.synthetic import generate_org
+from tests.conftest import TestingSessionLocal, create_project
+
+
+def create_projects(client, count):
+    return [create_project(client, f"R{i}") for i in range(count)]
+
+
+def set_dependencies(client, project_id, depends_on_ids):
+    return client.post(f"/api/projects/{project_id}/dependencies/", json={"depends_on_ids": depends_on_ids})
+
+
+def closure_pairs(connection):
+    return set(connection.execute(select(project_reachability.c.ancestor_id, project_reachability.c.descendant_id)))
+
+
+def expected_pairs(connection):
+    """由依赖边直接计算的 (上游, 下游) 全部可达对"""
+    graph = nx.DiGraph()
+    graph.add_edges_from((dep, project) for project, dep in connection.execute(select(project_dependencies)))
+    return {(ancestor, node) for node in graph for ancestor in nx.ancestors(graph, node)}
+
+
+def test_add_dependencies_rejects_cycles(client):
+    """测试新增依赖时拒绝依赖自身和形成循环的依赖，菱形依赖正常接受"""
+    a, b, c, d = create_projects(client, 4)
+    assert set_dependencies(client, b, [a]).status_code == 200
+    assert set_dependencies(client, c, [a]).status_code == 200
+    assert set_dependencies(client, d, [b, c]).status_code == 200
+
+    assert set_dependencies(client, a, [a]).status_code == 409
+    assert set_dependencies(client, a, [c, d]).status_code == 409
+    assert client.get(f"/api/projects/{a}/upstream").json() == []  # 被拒绝的依赖没有写入
+
+
+def test_check_upstream(client):
+    """测试上游判断接口"""
+    a, b, c = create_projects(client, 3)
+    set_dependencies(client, b, [a])
+    set_dependencies(client, c, [b])
+    assert client.get(f"/api/projects/{c}/upstream/{a}").json()["is_upstream"] is True
+    assert client.get(f"/api/projects/{a}/upstream/{c}").json()["is_upstream"] is False
+    assert client.get(f"/api/projects/{c}/upstream/{c}").json()["is_upstream"] is False
+
+
+def test_removed_dependencies_refresh_downstream(client):
+    """测试移除依赖和删除项目后，下游项目的可达关系随之更新，原本成环的依赖可以添加"""
+    a, b, c, d = create_projects(client, 4)
+    set_dependencies(client, b, [a])
+    set_dependencies(client, c, [b])
+    set_dependencies(client, d, [c])
+    assert set_dependencies(client, a, [d]).status_code == 409
+
+    set_dependencies(client, b, [])
+    assert client.get(f"/api/projects/{d}/upstream/{a}").json()["is_upstream"] is False
+    assert client.get(f"/api/projects/{d}/upstream/{b}").json()["is_upstream"] is True
+    assert set_dependencies(client, a, [d]).status_code == 200
+
+    client.delete(f"/api/projects/{c}")
+    assert client.get(f"/api/projects/{a}/upstream/{b}").json()["is_upstream"] is False
+    assert set_dependencies(client, b, [a]).status_code == 200
+
+
+def test_random_edits_keep_closure_exact(client):
+    """测试随机增删依赖与项目后，闭包表与依赖图的传递闭包完全一致"""
+    rng = random.Random(5)
+    ids = create_projects(client, 15)
+    for step in range(60):
+        project_id = rng.choice(ids)
+        if step % 20 == 19:
+            client.delete(f"/api/projects/{project_id}")
+            ids.remove(project_id)
+            continue
+        depends_on = rng.sample(ids, rng.randint(0, 3))
+        response = set_dependencies(client, project_id, depends_on)
+        assert response.status_code in (200, 409)
+
+    db = TestingSessionLocal()
+    try:
+        assert closure_pairs(db) == expected_pairs(db)
+        assert closure_pairs(db)
+    finally:
+        db.close()
+
+
+def test_import_rejects_cyclic_dependencies(client):
+    """测试导入依赖时逐行检查成环，同一批中前面的边对后面的行生效"""
+    a, b, c = create_projects(client, 3)
+    lines = "".join(json.dumps(edge) + "\n" for edge in (
+        {"project_id": b, "depends_on_id": a},
+        {"project_id": c, "depends_on_id": b},
+        {"project_id": a, "depends_on_id": c},  # 成环
+        {"project_id": c, "depends_on_id": a},
+    ))
+    db = TestingSessionLocal()
+    try:
+        report = run_import(db, ImportEntity.dependencies, io.StringIO(lines))
+        assert report.inserted == 3
+        assert [error.row for error in report.errors] == [3]
+        assert reachability.is_upstream(db, a, c)
+        assert closure_pairs(db) == expected_pairs(db)
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("shape", ["layered", "random"])
+def test_synthetic_and_migrated_closure_match_graph(tmp_path, shape):
+    """测试合成数据的全量重建、迁移回填得到的闭包表都与依赖图一致"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'closure.db'}")
+    generate_org(engine, users=10, projects=40, tasks_per_project=1, dag=shape, years=1)
+    with engine.connect() as connection:
+        expected = expected_pairs(connection)
+        assert closure_pairs(connection) == expected
+
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE project_reachability"))
+    assert "0003_project_reachability" in run_migrations(engine)
+    with engine.connect() as connection:
+        assert closure_pairs(connection) == expected
+    engine.dispose()
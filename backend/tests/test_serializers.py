@@ -0,0 +1,67 @@
+from typing import List
+from pydantic import TypeAdapter
+from app.models.project import Project as ProjectModel
+from app.models.task import Task as TaskModel
+from app.schemas.project import Project as ProjectSchema
+from app.schemas.task import Task as TaskSchema
+from app.services.gantt import get_dependency_end_time
+from tests.conftest import TestingSessionLocal
+
+def create_sample_data(client):
+    """创建带依赖、任务与进度的样本数据"""
+    base = client.post("/api/projects/", json={
+        "name": "Base", "estimated_duration": 5, "start_time": "2026-01-01T00:00:00"
+    }).json()
+    follow = client.post("/api/projects/", json={"name": "Follow", "estimated_duration": 3}).json()
+    client.post(f"/api/projects/{follow['id']}/dependencies/", json={"depends_on_ids": [base["id"]]})
+    client.post("/api/tasks/", json={"name": "T1", "project_id": base["id"], "workload": "heavy", "finished": True})
+    client.post("/api/tasks/", json={"name": "T2", "project_id": base["id"]})
+    return base, follow
+
+def test_fast_project_list_matches_schema(client):
+    """测试项目列表快速序列化结果与 Pydantic 输出模型一致"""
+    create_sample_data(client)
+    fast = client.get("/api/projects/").json()
+
+    db = TestingSessionLocal()
+    try:
+        adapter = TypeAdapter(List[ProjectSchema])
+        expected = adapter.dump_python(
+            adapter.validate_python(db.query(ProjectModel).all(), from_attributes=True), mode="json"
+        )
+    finally:
+        db.close()
+    assert fast == expected
+
+def test_fast_task_list_matches_schema(client):
+    """测试任务列表快速序列化结果与 Pydantic 输出模型一致"""
+    base, _ = create_sample_data(client)
+    fast = client.get("/api/tasks/").json()
+    fast_project_tasks = client.get(f"/api/projects/{base['id']}/tasks").json()
+
+    db = TestingSessionLocal()
+    try:
+        adapter = TypeAdapter(List[TaskSchema])
+        expected = adapter.dump_python(
+            adapter.validate_python(db.query(TaskModel).all(), from_attributes=True), mode="json"
+        )
+    finally:
+        db.close()
+    assert fast == expected
+    assert fast_project_tasks == expected
+
+def test_gantt_dates_follow_dependencies(client):
+    """测试甘特图中无开始时间的项目以依赖的结束时间为开始时间"""
+    base, follow = create_sample_data(client)
+    data = {item["id"]: item for item in client.get("/api/gantt/project-data").json()}
+
+    db = TestingSessionLocal()
+    try:
+        project = db.query(ProjectModel).filter(ProjectModel.id == follow["id"]).first()
+        expected_start = get_dependency_end_time(project, db).strftime("%Y-%m-%d")
+    finally:
+        db.close()
+    assert data[follow["id"]]["start_time"] == expected_start == "2026-01-06"
+    assert data[follow["id"]]["end_time"] == "2026-01-09"
+    assert data[follow["id"]]["dependencies"] == [base["id"]]
+    assert data[base["id"]]["progress"] == 75.0
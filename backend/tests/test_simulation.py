@@ -0,0 +1,83 @@
+import pytest
+
+from app.core.constants import SimulationDistribution
+from app.services.simulation import get_simulation_pool, quantile_table, simulate
+from tests.conftest import create_project
+
+
+@pytest.mark.parametrize("distribution", list(SimulationDistribution))
+def test_quantile_table_moments(distribution):
+    """测试分位数表的取值范围与均值符合 PERT / 三角分布的公式"""
+    table = quantile_table(distribution, 0.8, 1.5)
+    expected = (0.8 + 4 + 1.5) / 6 if distribution == SimulationDistribution.pert else (0.8 + 1 + 1.5) / 3
+    assert table[0] == pytest.approx(0.8) and table[-1] == pytest.approx(1.5)
+    assert table.mean() == pytest.approx(expected, abs=1e-4)
+
+
+def test_simulation_without_spread_is_deterministic():
+    """测试工期不确定性为零时各分位数都等于关键路径工期"""
+    result = simulate([1, 2, 3], [3, 2, 4], [(2, 1), (3, 2)], trials=50, optimistic=1, pessimistic=1)
+    assert result["finish_days"] == {"p50": 9, "p80": 9, "p95": 9}
+    assert result["criticality"] == [1, 1, 1]
+
+
+def test_simulation_percentiles_and_criticality():
+    """测试分位数递增且位于工期范围内，远长于另一分支的项目总是关键"""
+    # 1(100) 与链 2(5) -> 3(5) 并行
+    result = simulate([1, 2, 3], [100, 5, 5], [(3, 2)], trials=2000, seed=1)
+    days = result["finish_days"]
+    assert 80 <= days["p50"] <= days["p80"] <= days["p95"] <= 150
+    assert result["criticality"] == [1, 0, 0]
+
+
+def test_simulation_is_reproducible_across_workers(monkeypatch):
+    """测试相同种子的结果可复现，且与是否使用进程池无关"""
+    ids = list(range(1, 41))
+    durations = [i % 7 + 1 for i in ids]
+    edges = [(i, i - 1) for i in ids[1:] if i % 3] + [(i, i - 5) for i in ids[5:] if i % 4 == 0]
+    kwargs = dict(trials=300, seed=7, distribution=SimulationDistribution.triangular)
+    single = simulate(ids, durations, edges, **kwargs)
+    assert simulate(ids, durations, edges, **kwargs) == single
+    assert simulate(ids, durations, edges, trials=300, seed=8) != single
+
+    monkeypatch.setattr("app.services.simulation.CHUNK_CELLS", len(ids) * 100)  # 拆成三批
+    chunked = simulate(ids, durations, edges, **kwargs)
+    assert simulate(ids, durations, edges, workers=2, **kwargs) == chunked
+    # 进程池以 spawn 方式启动并在调用之间复用
+    pool = get_simulation_pool(2)
+    assert pool._mp_context.get_start_method() == "spawn"
+    assert simulate(ids, durations, edges, workers=2, **kwargs) == chunked
+    assert get_simulation_pool(2) is pool
+
+
+def test_simulation_endpoint(client):
+    """测试模拟接口返回完工日期分位数与关键度，并按参数缓存"""
+    a = create_project(client, "A", 10)
+    b = create_project(client, "B", 20)
+    client.post(f"/api/projects/{b}/dependencies/", json={"depends_on_ids": [a]})
+
+    response = client.get("/api/gantt/simulation", params={"trials": 200})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["trials"] == 200
+    assert data["deterministic_days"] == 30
+    assert data["ids"] == [a, b] and data["criticality"] == [1, 1]
+    assert set(data["finish_dates"]) == {"p50", "p80", "p95"}
+    assert data["start_date"] <= data["finish_dates"]["p50"] <= data["finish_dates"]["p95"]
+
+    etag = response.headers["etag"]
+    assert client.get("/api/gantt/simulation", params={"trials": 200},
+                      headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/gantt/simulation", params={"trials": 201}).headers["etag"] != etag
+    assert client.get("/api/gantt/simulation", params={"distribution": "normal"}).status_code == 422
+    assert client.get("/api/gantt/simulation", params={"optimistic": 1.2}).status_code == 422
+    assert client.get("/api/gantt/simulation", params={"seed": -1}).status_code == 422
+
+
+def test_simulation_endpoint_rejects_cycles(client, insert_dependency):
+    """测试存在遗留的循环依赖时返回 409"""
+    a = create_project(client, "A", 1)
+    b = create_project(client, "B", 1)
+    client.post(f"/api/projects/{a}/dependencies/", json={"depends_on_ids": [b]})
+    insert_dependency(b, a)
+    assert client.get("/api/gantt/simulation").status_code == 409
@@ -0,0 +1,136 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from app.core import cache
+from app.core.cache import cached_response, get_cache_backend
+from app.core.config import settings
+from app.core.constants import CacheEntity
+from app.core.singleflight import SingleFlight
+
+REQUEST = SimpleNamespace(headers={})
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def run_concurrently(count, fn):
+    """count 个线程同时调用 fn，返回各自的结果或异常"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        try:
+            results[index] = fn()
+        except Exception as exc:
+            results[index] = exc
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def slow_compute(calls, release=None, value=None):
+    def compute():
+        calls.append(1)
+        if release is not None:
+            release.wait(5)
+        else:
+            time.sleep(0.05)
+        return value if value is not None else {"calls": len(calls)}
+    return compute
+
+
+def test_single_flight_shares_result_and_error():
+    """测试并发的相同键只执行一次，结果与异常都传给全部等待者，结束后可重新执行"""
+    group = SingleFlight()
+    calls = []
+    results = run_concurrently(8, lambda: group.do("k", slow_compute(calls, value="done")))
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert {result for result, _ in results} == {"done"}
+    assert len(group) == 0
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.05)
+        raise ValueError("boom")
+
+    calls.clear()
+    errors = run_concurrently(4, lambda: group.do("k", fail))
+    assert len(calls) == 1
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert group.do("k", lambda: 1) == (1, False)
+
+
+def test_cached_response_coalesces_concurrent_misses():
+    """测试缓存未命中时并发的相同请求只计算一次，得到相同的响应体与 ETag"""
+    calls = []
+    responses = run_concurrently(10, lambda: cached_response(
+        REQUEST, "test:coalesce", [CacheEntity.projects], slow_compute(calls)))
+    assert len(calls) == 1
+    assert {response.body for response in responses} == {b'{"calls":1}'}
+    assert len({response.headers["etag"] for response in responses}) == 1
+
+
+def test_stale_response_served_during_refresh():
+    """测试失效后重新计算期间，其他请求立即拿到旧响应与旧 ETag，计算结束后返回新结果"""
+    entities = [CacheEntity.projects]
+    old = cached_response(REQUEST, "test:stale", entities, lambda: {"v": 1})
+    get_cache_backend().bump_version(CacheEntity.projects.value)
+
+    release, calls = threading.Event(), []
+    leader = threading.Thread(target=cached_response,
+                              args=(REQUEST, "test:stale", entities, slow_compute(calls, release, {"v": 2})))
+    leader.start()
+    try:
+        wait_until(lambda: len(cache._flights) == 1)
+        stale = cached_response(REQUEST, "test:stale", entities, slow_compute(calls))
+        assert stale.body == b'{"v":1}'
+        assert stale.headers["etag"] == old.headers["etag"]
+        assert "age" in stale.headers
+        revalidated = cached_response(SimpleNamespace(headers={"if-none-match": old.headers["etag"]}),
+                                      "test:stale", entities, slow_compute(calls))
+        assert revalidated.status_code == 304
+    finally:
+        release.set()
+        leader.join()
+    assert len(calls) == 1
+
+    fresh = cached_response(REQUEST, "test:stale", entities, slow_compute(calls))
+    assert fresh.body == b'{"v":2}'
+    assert fresh.headers["etag"] != old.headers["etag"]
+
+
+def test_stale_response_respects_max_age(monkeypatch):
+    """测试旧响应超过 CACHE_STALE_SECONDS 后不再返回，请求等待合并中的计算结果"""
+    monkeypatch.setattr(settings, "CACHE_STALE_SECONDS", 0)
+    entities = [CacheEntity.tasks]
+    cached_response(REQUEST, "test:max-age", entities, lambda: {"v": 1})
+    get_cache_backend().bump_version(CacheEntity.tasks.value)
+
+    release, calls = threading.Event(), []
+    leader = threading.Thread(target=cached_response,
+                              args=(REQUEST, "test:max-age", entities, slow_compute(calls, release, {"v": 2})))
+    leader.start()
+    wait_until(lambda: len(cache._flights) == 1)
+    follower = []
+    thread = threading.Thread(target=lambda: follower.append(
+        cached_response(REQUEST, "test:max-age", entities, slow_compute(calls))))
+    thread.start()
+    time.sleep(0.05)
+    assert follower == []  # 仍在等待
+    release.set()
+    leader.join()
+    thread.join()
+    assert follower[0].body == b'{"v":2}'
+    assert len(calls) == 1
+
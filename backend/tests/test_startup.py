@@ -0,0 +1,27 @@
+import json
+import os
+import subprocess
+import sys
+from benchmarks.importtime import BACKEND_DIR, DEFAULT_BUDGET_MS, best_of
+
+# 这些依赖只在首次使用时导入（关键路径、密码哈希、JWT）
+LAZY_MODULES = ("networkx", "passlib", "jose", "bcrypt")
+
+def test_import_defers_heavy_dependencies_settings_and_engine():
+    """测试导入应用不加载重量级可选依赖，也不创建配置与数据库引擎"""
+    code = (
+        "import json, sys, main\n"
+        "from app.core.config import get_settings\n"
+        "from app.db import session\n"
+        f"print(json.dumps({{'loaded': [m for m in {LAZY_MODULES!r} if m in sys.modules],"
+        " 'settings': get_settings.cache_info().currsize, 'engine': session._engine is not None}))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == {"loaded": [], "settings": 0, "engine": False}
+
+def test_import_time_within_budget():
+    """测试冷启动导入耗时在预算内（IMPORT_TIME_BUDGET_MS 可覆盖默认预算）"""
+    budget_ms = float(os.environ.get("IMPORT_TIME_BUDGET_MS", DEFAULT_BUDGET_MS))
+    cumulative = best_of("main", runs=3)
+    slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:10]
+    assert cumulative["main"] / 1000 <= budget_ms, "\n".join(f"{v / 1000:.1f} ms {k}" for k, v in slowest)
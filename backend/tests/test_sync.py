@@ -0,0 +1,51 @@
+
+def test_full_snapshot_without_cursor(client, project_data):
+    """测试不带游标时返回全量快照"""
+    client.post("/api/projects/", json=project_data)
+    response = client.get("/api/sync/")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["full"] is True
+    assert data["cursor"] > 0
+    assert [p["name"] for p in data["projects"]] == [project_data["name"]]
+
+def test_changes_since_cursor(client, project_data):
+    """测试游标之后只返回变化的实体"""
+    first = client.post("/api/projects/", json=project_data).json()
+    cursor = client.get("/api/sync/").json()["cursor"]
+
+    second = client.post("/api/projects/", json={**project_data, "name": "Second"}).json()
+    response = client.get(f"/api/sync/?since={cursor}")
+    data = response.json()
+    assert data["full"] is False
+    assert [p["id"] for p in data["projects"]] == [second["id"]]
+    assert first["id"] not in [p["id"] for p in data["projects"]]
+    assert data["cursor"] > cursor
+
+    # 没有新变更时游标保持不变
+    idle = client.get(f"/api/sync/?since={data['cursor']}").json()
+    assert idle["cursor"] == data["cursor"]
+    assert idle["projects"] == []
+
+def test_deleted_entities_return_tombstones(client, project_data):
+    """测试删除项目后返回项目与级联任务的墓碑"""
+    project = client.post("/api/projects/", json=project_data).json()
+    task = client.post("/api/tasks/", json={"name": "Task", "project_id": project["id"]}).json()
+    cursor = client.get("/api/sync/").json()["cursor"]
+
+    client.delete(f"/api/projects/{project['id']}")
+    data = client.get(f"/api/sync/?since={cursor}").json()
+    assert data["deleted"]["projects"] == [project["id"]]
+    assert data["deleted"]["tasks"] == [task["id"]]
+    assert data["projects"] == []
+
+def test_changes_paginated_with_has_more(client, project_data):
+    """测试超过 limit 时分页拉取"""
+    for i in range(3):
+        client.post("/api/projects/", json={**project_data, "name": f"P{i}"})
+    page = client.get("/api/sync/?since=0&limit=2").json()
+    assert page["has_more"] is True
+    rest = client.get(f"/api/sync/?since={page['cursor']}&limit=2").json()
+    assert rest["has_more"] is False
+    names = [p["name"] for p in page["projects"] + rest["projects"]]
+    assert sorted(names) == ["P0", "P1", "P2"]
@@ -0,0 +1,255 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.instrumentation import request_observers
+from app.models.refresh_token import RefreshToken
+from app.models.user import User as UserModel, UserRole
+from app.services.tokens import hash_token, purge_refresh_tokens, token_versions, token_versions_shared
+from tests.conftest import TestingSessionLocal
+
+PASSWORD = "secret-pass-1"
+
+
+def create_user(username, role):
+    db = TestingSessionLocal()
+    try:
+        user = UserModel(username=username, email=f"{username}@example.com",
+                         hashed_password=get_password_hash(PASSWORD), role=role)
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def user(client):
+    """创建可登录的用户"""
+    return create_user("alice", UserRole.user)
+
+
+@pytest.fixture
+def director(client):
+    """创建可登录的总监用户"""
+    return create_user("boss", UserRole.director)
+
+
+def login(client, identifier="alice"):
+    response = client.post("/api/auth/login", json={"identifier": identifier, "password": PASSWORD})
+    assert response.status_code == 200
+    return response.json()
+
+
+def bearer(tokens):
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def submit_job(client, tokens):
+    """总监与经理才能提交的后台任务"""
+    return client.post("/api/jobs/", json={"kind": "users.performance"}, headers=bearer(tokens))
+
+
+def refresh(client, token):
+    return client.post("/api/auth/refresh", json={"refresh_token": token})
+
+
+def token_rows():
+    db = TestingSessionLocal()
+    try:
+        return db.scalars(select(RefreshToken).order_by(RefreshToken.id)).all()
+    finally:
+        db.close()
+
+
+def test_refresh_rotates_token(client, user, monkeypatch):
+    """测试刷新换发新的访问令牌与刷新令牌，不做密码校验，库中只存令牌摘要"""
+    tokens = login(client)
+    assert tokens["token_type"] == "bearer"
+    monkeypatch.setattr("app.core.security.verify_password",
+                        lambda *args: pytest.fail("刷新不应校验密码"))
+
+    response = refresh(client, tokens["refresh_token"])
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {rotated['access_token']}"})
+    assert me.json()["id"] == user
+
+    rows = token_rows()
+    assert [row.token_hash for row in rows] == [hash_token(tokens["refresh_token"]),
+                                                hash_token(rotated["refresh_token"])]
+    assert rows[0].used_at is not None and rows[1].used_at is None
+    assert rows[0].family_id == rows[1].family_id
+    assert refresh(client, rotated["refresh_token"]).status_code == 200
+
+
+def test_reused_token_revokes_family(client, user):
+    """测试已换发过的令牌再次使用时，同一次登录换发出的令牌全部吊销，其他登录会话不受影响"""
+    first = login(client)
+    other = login(client)
+    second = refresh(client, first["refresh_token"]).json()
+
+    reused = refresh(client, first["refresh_token"])
+    assert reused.status_code == 401
+    assert refresh(client, second["refresh_token"]).status_code == 401
+    assert refresh(client, other["refresh_token"]).status_code == 200
+
+
+def test_invalid_and_expired_tokens_rejected(client, user):
+    """测试未知、过期与注销后的令牌都被拒绝，过期令牌由清理任务删除"""
+    assert refresh(client, "not-a-token").status_code == 401
+
+    tokens = login(client)
+    db = TestingSessionLocal()
+    try:
+        db.execute(update(RefreshToken).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+        assert refresh(client, tokens["refresh_token"]).status_code == 401
+        assert purge_refresh_tokens(db) == 1
+    finally:
+        db.close()
+
+    tokens = login(client)
+    assert client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]}).status_code == 200
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+
+
+def test_password_change_revokes_refresh_tokens(client, user):
+    """测试修改密码后已签发的刷新令牌全部失效"""
+    tokens = login(client)
+    response = client.put("/api/auth/change-password",
+                          json={"current_password": PASSWORD, "new_password": "another-pass-2"},
+                          headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 200
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+
+
+def test_access_token_carries_role_and_version(client, director):
+    """测试访问令牌携带角色与令牌版本号，令牌版本表加载后按角色鉴权不再查询用户表"""
+    from jose import jwt
+
+    tokens = login(client, "boss")
+    claims = jwt.get_unverified_claims(tokens["access_token"])
+    assert (claims["sub"], claims["role"], claims["ver"]) == (str(director), "director", 0)
+    assert submit_job(client, tokens).status_code == 202
+
+    shapes = []
+    request_observers.append(lambda method, path, stats: shapes.extend(stats.shapes))
+    try:
+        assert submit_job(client, tokens).status_code == 202
+    finally:
+        request_observers.pop()
+    assert shapes and not [shape for shape in shapes if "users" in shape]
+    assert len(token_versions) == 1
+
+
+def test_role_demotion_revokes_access_tokens(client, director):
+    """测试角色变更后旧访问令牌失效，刷新得到携带新角色的令牌"""
+    tokens = login(client, "boss")
+    assert submit_job(client, tokens).status_code == 202
+
+    response = client.put(f"/api/users/{director}",
+                          json={"username": "boss", "email": "boss@example.com", "role": "user"})
+    assert response.status_code == 200
+    assert submit_job(client, tokens).status_code == 401
+    assert client.get("/api/auth/me", headers=bearer(tokens)).status_code == 401
+
+    refreshed = refresh(client, tokens["refresh_token"]).json()
+    assert submit_job(client, refreshed).status_code == 403
+    assert client.get("/api/auth/me", headers=bearer(refreshed)).json()["role"] == "user"
+
+
+def test_password_change_revokes_access_tokens(client, director):
+    """测试修改密码后旧访问令牌失效，重新登录的令牌可用；其他用户的令牌不受影响"""
+    create_user("alice", UserRole.manager)
+    tokens, other = login(client, "boss"), login(client, "alice")
+    response = client.put("/api/auth/change-password",
+                          json={"current_password": PASSWORD, "new_password": "another-pass-2"},
+                          headers=bearer(tokens))
+    assert response.status_code == 200
+    assert submit_job(client, tokens).status_code == 401
+    assert submit_job(client, other).status_code == 202
+
+    relogin = client.post("/api/auth/login", json={"identifier": "boss", "password": "another-pass-2"}).json()
+    assert submit_job(client, relogin).status_code == 202
+
+
+def test_stale_version_table_falls_back_to_user_row(client, director):
+    """测试令牌版本表未追平（其他进程刚写入）时按主键补齐，而不是误判令牌失效"""
+    db = TestingSessionLocal()
+    try:
+        tokens = login(client, "boss")
+        assert submit_job(client, tokens).status_code == 202
+        # 模拟其他进程修改了密码并重新登录：令牌版本号比本进程的表新
+        db.execute(update(UserModel).values(token_version=UserModel.token_version + 1))
+        db.commit()
+        assert submit_job(client, tokens).status_code == 202  # 版本表尚未追平，旧令牌仍在表中有效
+        fresh = login(client, "boss")
+        assert submit_job(client, fresh).status_code == 202
+        assert submit_job(client, tokens).status_code == 401
+    finally:
+        db.close()
+
+
+def user_queries(client, tokens):
+    """提交任务，返回鉴权期间查询用户表的语句形态"""
+    shapes = []
+    request_observers.append(lambda method, path, stats: shapes.extend(stats.shapes))
+    try:
+        assert submit_job(client, tokens).status_code == 202
+    finally:
+        request_observers.pop()
+    return [shape for shape in shapes if "users" in shape]
+
+
+def test_users_write_reloads_only_requesting_user(client, director):
+    """测试用户表写入后令牌版本表只按主键重新加载发起请求的用户，而不是整表重新加载"""
+    for name in ("alice", "carol", "dave"):
+        create_user(name, UserRole.user)
+    tokens = login(client, "boss")
+    assert submit_job(client, tokens).status_code == 202
+    response = client.put(f"/api/users/{create_user('erin', UserRole.user)}",
+                          json={"username": "erin", "email": "erin@example.com", "role": "manager"})
+    assert response.status_code == 200
+
+    assert len(user_queries(client, tokens)) == 1
+    assert len(token_versions) == 1
+    assert user_queries(client, tokens) == []
+
+
+def test_expired_version_entry_reloaded(client, director, monkeypatch):
+    """测试令牌版本表条目超过最长使用时间后重新加载，未经缓存版本号通知的吊销也能生效"""
+    tokens = login(client, "boss")
+    assert submit_job(client, tokens).status_code == 202
+    db = TestingSessionLocal()
+    try:
+        db.execute(update(UserModel).values(token_version=UserModel.token_version + 1))
+        db.commit()
+    finally:
+        db.close()
+    assert submit_job(client, tokens).status_code == 202
+    monkeypatch.setattr(settings, "TOKEN_VERSION_MAX_AGE_SECONDS", 0)
+    assert submit_job(client, tokens).status_code == 401
+
+
+def test_unshared_versions_check_user_row(client, director, monkeypatch):
+    """测试多进程且缓存版本号不共享时每次鉴权都按主键查询用户，其他进程的吊销立即生效"""
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+    tokens = login(client, "boss")
+    assert submit_job(client, tokens).status_code == 202
+    assert len(user_queries(client, tokens)) == 1
+
+    db = TestingSessionLocal()
+    try:
+        db.execute(update(UserModel).values(token_version=UserModel.token_version + 1))
+        db.commit()
+    finally:
+        db.close()
+    assert submit_job(client, tokens).status_code == 401
+
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION_BUS", True)
+    assert token_versions_shared()